@@ -0,0 +1,120 @@
+"""
+Box score parser benchmark.
+
+Parses the saved ergebnisDetails.jsp sample pages in
+benchmarks/fixtures/box_scores with the original BeautifulSoup
+implementation and with the single-pass parser (every available backend),
+checks that all engines return identical results and reports pages/second
+and peak memory per page. The pages in fixtures/box_scores/malformed are
+only checked against the html.parser backend, lxml repairs their markup.
+
+Usage (from the repository root):
+    python benchmarks/benchmark_box_score_parser.py [--seconds 3] [pages.html ...]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path to import crawler
+sys.path.append('.')
+
+from crawler import box_score_parser
+from crawler.main import BasketballBundCrawler
+from crawler.records import Game
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'box_scores')
+MALFORMED = os.path.join(FIXTURES, 'malformed')
+GAME = Game.from_api({'homeTeam': {'teamPermanentId': 153170}, 'guestTeam': {'teamPermanentId': 168416}})
+
+
+def make_crawler():
+    with patch.dict(os.environ, {
+        'SUPABASE_URL': 'https://example.supabase.co',
+        'SUPABASE_KEY': 'fake-key',
+        'LEAGUE_ID': '49400'
+    }), patch('crawler.main.create_client', return_value=MagicMock()):
+        return BasketballBundCrawler(parser_engine='soup')
+
+
+def engines(crawler):
+    """Yield (name, parse, checks malformed pages) per engine"""
+    yield 'soup (current)', lambda page: crawler.parse_box_score_data(page, '1', GAME), True
+    for backend in box_score_parser.BACKENDS:
+        if backend == 'lxml' and box_score_parser.etree is None:
+            continue
+        yield f'single-pass ({backend})', (
+            lambda page, backend=backend: box_score_parser.parse_box_score(page, '1', GAME, '49400', backend=backend)
+        ), backend != 'lxml'
+
+
+def measure_throughput(parse, pages, seconds):
+    parsed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for page in pages:
+            parse(page)
+        parsed += len(pages)
+    return parsed / (time.perf_counter() - start)
+
+
+def measure_peak_memory(parse, pages):
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        parse(page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Box score parser benchmark")
+    parser.add_argument('pages', nargs='*',
+                        help="HTML pages (default: benchmarks/fixtures/box_scores/*.html and malformed/*.html)")
+    parser.add_argument('--seconds', type=float, default=3.0, help="time budget per engine")
+    args = parser.parse_args(argv)
+
+    paths = args.pages or sorted(glob.glob(os.path.join(FIXTURES, '*.html')))
+    malformed = set() if args.pages else set(glob.glob(os.path.join(MALFORMED, '*.html')))
+    paths = paths + sorted(malformed)
+    pages = [open(path, 'rb').read() for path in paths]
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / 1024:.0f} KiB total")
+
+    logging.disable(logging.CRITICAL)
+    crawler = make_crawler()
+    results = []
+    reference = None
+    mismatches = 0
+
+    for name, parse, checks_malformed in engines(crawler):
+        outputs = [parse(page) for page in pages]
+        if reference is None:
+            reference = outputs
+        else:
+            for path, got, expected in zip(paths, outputs, reference):
+                if path in malformed and not checks_malformed:
+                    continue
+                if got != expected:
+                    mismatches += 1
+                    print(f"MISMATCH: {name} differs from soup on {os.path.basename(path)}")
+
+        results.append((name, measure_throughput(parse, pages, args.seconds), measure_peak_memory(parse, pages)))
+
+    baseline = results[0][1]
+    print(f"\n{'engine':<26}{'pages/s':>10}{'speedup':>10}{'peak KiB/page':>16}")
+    for name, pages_per_second, peak in results:
+        print(f"{name:<26}{pages_per_second:>10.1f}{pages_per_second / baseline:>9.1f}x{peak / 1024:>16.0f}")
+
+    if mismatches:
+        print(f"\n{mismatches} page(s) parsed differently")
+        return 1
+    print("\nAll engines returned identical results")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+End-to-end crawler benchmark with regression thresholds.
+
+Runs the real crawler stages against local stand-ins, a replayed synthetic
+league (crawler/replay_server.py) for basketball-bund.net and the SQLite
+PostgREST stand-in (crawler/supabase_standin.py) for Supabase, at several
+league sizes:
+
+    rest_fetch            competition list, table and spielplan
+    box_score_fetch       fetch_box_scores() with the configured engine (download + parse)
+    parse                 parsing the box score pages alone
+    transform_games       transform_games_data()
+    transform_standings   transform_standings_data()
+    transform_box_scores  transform_box_scores_data()
+    store                 store_data() into an empty database
+    store_unchanged       store_data() of the same data again (change detection)
+
+Per stage the JSON result holds wall time, CPU time, peak RSS and the
+requests sent to both stand-ins. The stand-ins run in their own process,
+every repeat in a fresh crawler process, so CPU time and RSS are the
+crawler's own. compare fails when a stage got slower or heavier than the
+threshold, or sends more requests, than in the baseline.
+
+Usage (from the repository root):
+    python benchmarks/benchmark_crawler.py run --teams 4 8 16 --output results.json
+    python benchmarks/benchmark_crawler.py compare baseline.json results.json --threshold 0.25
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+# Add parent directory to path to import crawler
+sys.path.append('.')
+
+from benchmarks.synthetic_league import build_cassette
+from crawler.replay_server import ReplayServer
+from crawler.supabase_standin import SupabaseStandin, StandinStore, STANDIN_KEY
+
+RESULTS_VERSION = 1
+LEAGUE_ID = '49400'
+STAGES = ('rest_fetch', 'box_score_fetch', 'parse', 'transform_games', 'transform_standings',
+          'transform_box_scores', 'store', 'store_unchanged')
+TIMED_METRICS = ('wall_s', 'cpu_s')
+REQUEST_METRICS = ('http_requests', 'supabase_requests')
+
+
+def reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux), so the next peak is per stage"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    """Peak resident set size since the last reset_peak_rss() (since start where unsupported)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def serve(conn, n_teams, latency, supabase_latency):
+    """Stand-in process: replay the synthetic league and serve the Supabase stand-in"""
+    cassette, _ = build_cassette(LEAGUE_ID, n_teams)
+    store = StandinStore()
+    store.write('seasons', [{'name': 'Benchmark', 'league_id': LEAGUE_ID, 'is_current': True,
+                             'our_team_id': '900001'}])
+    with ReplayServer(cassette, latency=latency) as replay, \
+            SupabaseStandin(store, latency=supabase_latency) as standin:
+        conn.send((replay.base_url, standin.base_url))
+        while conn.recv() == 'stats':
+            conn.send({'http': replay.stats()['requests'], 'supabase': standin.stats()['totals']})
+
+
+class StageTimer:
+    """Measures the stages of one crawler run"""
+    def __init__(self, server):
+        self.server = server
+        self.stages = {}
+
+    def server_stats(self):
+        self.server.send('stats')
+        return self.server.recv()
+
+    def measure(self, stage, function, *args):
+        before = self.server_stats()
+        reset_peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = function(*args)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        peak = peak_rss_kb()
+        after = self.server_stats()
+
+        self.stages[stage] = {
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'peak_rss_kb': peak,
+            'http_requests': after['http'] - before['http'],
+            'supabase_requests': after['supabase']['requests'] - before['supabase']['requests'],
+            'supabase_bytes': (after['supabase']['bytes_in'] + after['supabase']['bytes_out']
+                               - before['supabase']['bytes_in'] - before['supabase']['bytes_out'])
+        }
+        return result
+
+
+def run_crawler(server, result_conn, urls, n_teams, options):
+    """Crawler process: run all stages once and send back the measurements"""
+    try:
+        logging.disable(logging.CRITICAL)
+        replay_url, standin_url = urls
+        os.environ.update({'SUPABASE_URL': standin_url, 'SUPABASE_KEY': STANDIN_KEY, 'LEAGUE_ID': LEAGUE_ID})
+        from crawler.main import BasketballBundCrawler
+
+        cassette, _ = build_cassette(LEAGUE_ID, n_teams)
+        timer = StageTimer(server)
+        crawler = BasketballBundCrawler(base_url=replay_url, full_crawl=True, request_interval=0, **options)
+
+        def rest_fetch():
+            return crawler.fetch_competition_list(), crawler.fetch_competition_table(), crawler.fetch_competition_spielplan()
+
+        league_details, standings, games = timer.measure('rest_fetch', rest_fetch)
+        teams = crawler.extract_teams_from_data(standings, games)
+        box_scores = timer.measure('box_score_fetch', crawler.fetch_box_scores, games, teams)
+
+        pages = [
+            (game_id, game, cassette.lookup('GET', crawler.box_score_url(game_id))[2])
+            for game_id, game in crawler.select_games_to_fetch(games)
+        ]
+        timer.measure('parse', lambda: [crawler.parse_box_score_data(page, game_id, game)
+                                        for game_id, game, page in pages])
+
+        timer.measure('transform_games', crawler.transform_games_data, games)
+        timer.measure('transform_standings', crawler.transform_standings_data, standings)
+        timer.measure('transform_box_scores', crawler.transform_box_scores_data, box_scores, games)
+
+        data = {
+            'league_id': crawler.league_id,
+            'scraped_at': datetime.now(timezone.utc).isoformat(),
+            'league_details': league_details,
+            'teams': teams,
+            'games': games,
+            'standings': standings,
+            'box_scores': box_scores,
+            'streamed_box_scores': crawler.streamed_box_scores
+        }
+        timer.measure('store', crawler.store_data, data)
+        # A new crawler starts without the fingerprints the first one wrote
+        rerun = BasketballBundCrawler(base_url=replay_url, full_crawl=True, request_interval=0, **options)
+        timer.measure('store_unchanged', rerun.store_data, data)
+
+        result_conn.send({
+            'teams': n_teams,
+            'games': len(games),
+            'box_score_entries': len(box_scores) + crawler.streamed_box_scores,
+            'stages': timer.stages
+        })
+    except BaseException as e:
+        result_conn.send({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_size(n_teams, options, latency, supabase_latency):
+    """One measured run of a league size, with fresh stand-ins and a fresh crawler process"""
+    context = multiprocessing.get_context('fork')
+    server_conn, server_child = context.Pipe()
+    result_conn, result_child = context.Pipe()
+    server = context.Process(target=serve, args=(server_child, n_teams, latency, supabase_latency), daemon=True)
+    server.start()
+    try:
+        urls = server_conn.recv()
+        crawler = context.Process(target=run_crawler, args=(server_conn, result_child, urls, n_teams, options))
+        crawler.start()
+        result = result_conn.recv()
+        crawler.join()
+    finally:
+        server_conn.send('stop')
+        server.join(timeout=10)
+    if 'error' in result:
+        raise RuntimeError(f"Benchmark of {n_teams} teams failed: {result['error']}")
+    return result
+
+
+def best_of(runs):
+    """Combine repeats: the fastest time and lowest RSS per stage, requests of the first run"""
+    combined = dict(runs[0], stages={})
+    for stage in runs[0]['stages']:
+        measured = [run['stages'][stage] for run in runs]
+        combined['stages'][stage] = dict(
+            measured[0],
+            wall_s=min(m['wall_s'] for m in measured),
+            cpu_s=min(m['cpu_s'] for m in measured),
+            peak_rss_kb=min(m['peak_rss_kb'] for m in measured)
+        )
+    return combined
+
+
+def run(args):
+    options = {
+        'fetch_mode': args.fetch_mode,
+        'max_concurrency': args.concurrency,
+        'parse_workers': args.parse_workers
+    }
+    results = []
+    for n_teams in args.teams:
+        runs = [run_size(n_teams, options, args.latency, args.supabase_latency) for _ in range(args.repeat)]
+        results.append(best_of(runs))
+        print_size(results[-1])
+
+    payload = {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': dict(options, repeat=args.repeat, latency=args.latency, supabase_latency=args.supabase_latency),
+        'sizes': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nWrote {args.output}")
+    return 0
+
+
+def print_size(result):
+    print(f"\n{result['teams']} teams, {result['games']} games, {result['box_score_entries']} box score entries")
+    print(f"{'stage':<22}{'wall s':>9}{'cpu s':>9}{'peak MiB':>10}{'http':>7}{'supabase':>10}{'KiB':>9}")
+    for stage, m in result['stages'].items():
+        print(f"{stage:<22}{m['wall_s']:>9.3f}{m['cpu_s']:>9.3f}{m['peak_rss_kb'] / 1024:>10.1f}"
+              f"{m['http_requests']:>7}{m['supabase_requests']:>10}{m['supabase_bytes'] / 1024:>9.1f}")
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        payload = json.load(f)
+    if payload.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version {payload.get('version')} in {path}")
+    return {size['teams']: size for size in payload['sizes']}
+
+
+def regressions(baseline, current, threshold, min_seconds, min_rss_kb):
+    """(size, stage, metric, baseline, current) of every stage that regressed"""
+    found = []
+    for teams, size in current.items():
+        if teams not in baseline:
+            continue
+        for stage, measured in size['stages'].items():
+            reference = baseline[teams]['stages'].get(stage)
+            if reference is None:
+                continue
+            for metric in TIMED_METRICS:
+                if measured[metric] > reference[metric] * (1 + threshold) and \
+                        measured[metric] - reference[metric] > min_seconds:
+                    found.append((teams, stage, metric, reference[metric], measured[metric]))
+            if measured['peak_rss_kb'] > reference['peak_rss_kb'] * (1 + threshold) and \
+                    measured['peak_rss_kb'] - reference['peak_rss_kb'] > min_rss_kb:
+                found.append((teams, stage, 'peak_rss_kb', reference['peak_rss_kb'], measured['peak_rss_kb']))
+            # Request counts are deterministic, any increase is a regression
+            for metric in REQUEST_METRICS:
+                if measured[metric] > reference[metric]:
+                    found.append((teams, stage, metric, reference[metric], measured[metric]))
+    return found
+
+
+def compare(args):
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    shared = sorted(set(baseline) & set(current))
+    if not shared:
+        print("No league size is in both results")
+        return 2
+
+    found = regressions(baseline, current, args.threshold, args.min_seconds, args.min_rss_kb)
+    print(f"{'teams':>6} {'stage':<22}{'wall s':>16}{'cpu s':>16}{'requests':>12}")
+    for teams in shared:
+        for stage, measured in current[teams]['stages'].items():
+            reference = baseline[teams]['stages'].get(stage)
+            if reference is None:
+                continue
+            requests_then = reference['http_requests'] + reference['supabase_requests']
+            requests_now = measured['http_requests'] + measured['supabase_requests']
+            print(f"{teams:>6} {stage:<22}{reference['wall_s']:>7.3f} → {measured['wall_s']:<6.3f}"
+                  f"{reference['cpu_s']:>7.3f} → {measured['cpu_s']:<6.3f}{requests_then:>5} → {requests_now:<4}")
+
+    if found:
+        print(f"\n{len(found)} regressions beyond {args.threshold:.0%}:")
+        for teams, stage, metric, before, after in found:
+            print(f"  {teams} teams {stage} {metric}: {before:g} → {after:g}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end crawler benchmark against local stand-ins")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="benchmark all stages at several league sizes")
+    run_parser.add_argument('--teams', type=int, nargs='+', default=[4, 8, 16],
+                            help="league sizes in teams (default: 4 8 16)")
+    run_parser.add_argument('--repeat', type=int, default=3, help="runs per size, the best is kept (default: 3)")
+    run_parser.add_argument('--fetch-mode', choices=['sync', 'async'], default='async')
+    run_parser.add_argument('--concurrency', type=int, default=4, help="async box score concurrency (default: 4)")
+    run_parser.add_argument('--parse-workers', type=int, default=0,
+                            help="parse processes (default: 0, parse inline so CPU time includes it)")
+    run_parser.add_argument('--latency', type=float, default=0.0, help="basketball-bund.net stand-in latency")
+    run_parser.add_argument('--supabase-latency', type=float, default=0.0, help="Supabase stand-in latency")
+    run_parser.add_argument('--output', help="write the results as JSON to this file")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help="fail on regressions against a baseline")
+    compare_parser.add_argument('baseline', help="results JSON of the baseline")
+    compare_parser.add_argument('current', help="results JSON to check")
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help="allowed relative increase of time and peak RSS (default: 0.2)")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.01,
+                                help="time differences below this are noise (default: 0.01)")
+    compare_parser.add_argument('--min-rss-kb', type=int, default=2048,
+                                help="peak RSS differences below this are noise (default: 2048)")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
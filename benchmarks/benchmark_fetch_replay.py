@@ -0,0 +1,84 @@
+"""
+Fetch phase benchmark against the local basketball-bund.net stand-in.
+
+Replays a cassette (a synthetic league by default, or one recorded with
+`main.py --record`) with crawler/replay_server.py and measures the REST
+fetch plus box score fetch phase for the sync engine and the async engine
+at several concurrency levels.
+
+Usage (from the repository root):
+    python benchmarks/benchmark_fetch_replay.py [--teams 10] [--latency 0.05] [--concurrency 1 4 8]
+    python benchmarks/benchmark_fetch_replay.py --cassette cassette.json.gz --league 49400
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path to import crawler
+sys.path.append('.')
+
+from benchmarks.synthetic_league import build_cassette
+from crawler.cassette import Cassette
+from crawler.main import BasketballBundCrawler
+from crawler.replay_server import ReplayServer
+
+
+def make_crawler(base_url, league_id, **options):
+    with patch.dict(os.environ, {
+        'SUPABASE_URL': 'https://example.supabase.co',
+        'SUPABASE_KEY': 'fake-key',
+        'LEAGUE_ID': league_id
+    }), patch('crawler.main.create_client', return_value=MagicMock()):
+        crawler = BasketballBundCrawler(base_url=base_url, full_crawl=True, **options)
+    crawler.season_id = None
+    return crawler
+
+
+def run_fetch(crawler):
+    """REST fetch plus box score fetch, returns (seconds, games, box score entries)"""
+    start = time.perf_counter()
+    crawler.fetch_competition_list()
+    crawler.fetch_competition_table()
+    games = crawler.fetch_competition_spielplan()
+    box_scores = crawler.fetch_box_scores(games)
+    return time.perf_counter() - start, len(games), len(box_scores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch phase benchmark against a replayed cassette")
+    parser.add_argument('--cassette', help="recorded cassette (default: synthetic league)")
+    parser.add_argument('--league', default='49400', help="league id of the cassette (default: 49400)")
+    parser.add_argument('--teams', type=int, default=10, help="teams of the synthetic league (default: 10)")
+    parser.add_argument('--latency', type=float, default=0.05, help="server latency in seconds (default: 0.05)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="random extra latency (default: 0.02)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of injected 503 responses")
+    parser.add_argument('--request-interval', type=float, default=0.0, help="crawler request interval (default: 0)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8], help="async concurrency levels")
+    args = parser.parse_args(argv)
+
+    cassette = Cassette.load(args.cassette) if args.cassette else build_cassette(args.league, args.teams)[0]
+    logging.disable(logging.CRITICAL)
+
+    runs = [('sync', {'fetch_mode': 'sync'})]
+    runs += [(f'async x{n}', {'fetch_mode': 'async', 'max_concurrency': n}) for n in args.concurrency]
+
+    print(f"{len(cassette)} recorded responses, latency {args.latency}s +{args.jitter}s, "
+          f"error rate {args.error_rate:.0%}")
+    print(f"\n{'engine':<12}{'seconds':>9}{'games':>7}{'entries':>9}{'pages/s':>9}{'in flight':>11}{'conns':>7}")
+    for name, options in runs:
+        with ReplayServer(cassette, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          seed=1) as server:
+            crawler = make_crawler(server.base_url, args.league, request_interval=args.request_interval,
+                                   parse_workers=0, **options)
+            seconds, games, entries = run_fetch(crawler)
+            stats = server.stats()
+            connections = crawler.transport.stats()['connections_opened']
+        print(f"{name:<12}{seconds:>9.2f}{games:>7}{entries:>9}{games / seconds:>9.1f}"
+              f"{stats['max_in_flight']:>11}{connections:>7}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Synthetic basketball-bund.net league for offline benchmarks.
+
+Builds a cassette (see crawler/cassette.py) with the competition list,
+table and spielplan REST responses of a double round robin league of
+n_teams teams, plus one box score page per game taken in turn from the
+sample pages in benchmarks/fixtures/box_scores.
+"""
+import glob
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.cassette import Cassette
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'box_scores')
+LIVE = 'https://www.basketball-bund.net'
+
+
+def rest(data):
+    return json.dumps({'status': '0', 'message': None, 'data': data}).encode('utf-8')
+
+
+def league_games(league_id, n_teams):
+    teams = [{'teamPermanentId': 900000 + n, 'teamname': f'Team {n}'} for n in range(1, n_teams + 1)]
+    games = []
+    for home in teams:
+        for guest in teams:
+            if home is guest:
+                continue
+            match_id = int(league_id) * 1000 + len(games) + 1
+            home_score = 60 + (match_id * 7) % 30
+            guest_score = 60 + (match_id * 11) % 30
+            games.append({
+                'matchId': match_id,
+                'kickoffDate': f"2025-{10 + len(games) // 60:02d}-{1 + len(games) % 28:02d}",
+                'kickoffTime': '19:30',
+                'homeTeam': dict(home),
+                'guestTeam': dict(guest),
+                'result': f"{home_score}:{guest_score}",
+                'ergebnisbestaetigt': True,
+                'abgesagt': False
+            })
+    standings = [
+        {'team': dict(team), 'rang': rank, 'anzspiele': 2 * (n_teams - 1), 's': n_teams - rank,
+         'n': rank - 1, 'anzGewinnpunkte': 2 * (n_teams - rank), 'koerbe': 1500, 'gegenKoerbe': 1450,
+         'korbdiff': 50}
+        for rank, team in enumerate(teams, start=1)
+    ]
+    return games, standings
+
+
+def build_cassette(league_id='49400', n_teams=10):
+    """Cassette of a synthetic league, returns (cassette, games)"""
+    pages = [open(path, 'rb').read() for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html')))]
+    games, standings = league_games(league_id, n_teams)
+
+    cassette = Cassette()
+    cassette.record('POST', f"{LIVE}/rest/competition/list", [int(league_id)], 200, 'application/json',
+                    rest({'ligaId': int(league_id), 'liganame': 'Synthetic League'}))
+    cassette.record('GET', f"{LIVE}/rest/competition/table/id/{league_id}", None, 200, 'application/json',
+                    rest({'tabelle': {'entries': standings}}))
+    cassette.record('GET', f"{LIVE}/rest/competition/spielplan/id/{league_id}", None, 200, 'application/json',
+                    rest({'matches': games}))
+    for index, game in enumerate(games):
+        url = (f"{LIVE}/public/ergebnisDetails.jsp?type=1&spielplan_id={game['matchId']}"
+               f"&liga_id={league_id}&defaultview=1")
+        cassette.record('GET', url, None, 200, 'text/html', pages[index % len(pages)])
+    return cassette, games
@@ -0,0 +1,461 @@
+"""
+Single-pass box score page parser.
+
+Walks an ergebnisDetails.jsp page once and collects every table, row and
+cell into a compact model, then extracts both player tables and the
+quarter scores from that model. The result is identical to the
+BeautifulSoup implementation in BasketballBundCrawler (parse_player_stats /
+extract_quarter_scores), including its lookup rules: find_all() is
+recursive, so a table's rows include rows of nested tables and a row's
+cells include cells of nested rows.
+
+The stdlib html.parser is the default tokenizer. It replays
+BeautifulSoup's tree building rules (no implicit closing of unclosed
+tags), so it matches the soup implementation even on malformed markup.
+lxml is faster and can be chosen explicitly when it is installed, but it
+repairs such markup and is only guaranteed identical on well-formed pages.
+"""
+
+import codecs
+import logging
+import re
+import time
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional, the stdlib backend works without it
+    etree = None
+
+try:
+    from crawler.records import BoxScoreEntry
+except ImportError:
+    from records import BoxScoreEntry
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('lxml', 'html.parser')
+DEFAULT_BACKEND = 'html.parser'
+
+# Elements BeautifulSoup treats as empty: they never contain other nodes
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer'
+])
+
+# Text inside these is not a plain NavigableString in BeautifulSoup and is
+# therefore left out of get_text()
+STRING_CONTAINERS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# Same declaration lookup as bs4's EncodingDetector
+XML_ENCODING_RE = re.compile(rb'^\s*<\?.*encoding=[\'"](.*?)[\'"].*\?>')
+HTML_META_RE = re.compile(rb'<\s*meta[^>]+charset\s*=\s*["\']?([^>]*?)[ /;\'">]', re.I)
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32le'),
+    (codecs.BOM_UTF32_BE, 'utf-32be'),
+    (codecs.BOM_UTF16_LE, 'utf-16le'),
+    (codecs.BOM_UTF16_BE, 'utf-16be'),
+)
+
+
+def decode_page(content):
+    """Decode page bytes the way BeautifulSoup does.
+
+    Order: byte-order mark, declared encoding (XML declaration or meta
+    charset near the top of the page), utf-8, windows-1252.
+    """
+    if isinstance(content, str):
+        return content
+
+    candidates = []
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            content = content[len(bom):]
+            candidates.append(encoding)
+            break
+
+    declared = XML_ENCODING_RE.search(content, 0, 1024)
+    if not declared:
+        declared = HTML_META_RE.search(content, 0, max(2048, int(len(content) * 0.05)))
+    if declared:
+        candidates.append(declared.group(1).decode('ascii', 'replace').lower())
+
+    candidates.extend(['utf-8', 'windows-1252'])
+    for encoding in candidates:
+        try:
+            return content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return content.decode('utf-8', 'replace')
+
+
+def class_list(value):
+    """Split a class attribute like BeautifulSoup's multi-valued attributes"""
+    return value.split() if value else []
+
+
+def has_class(classes, name):
+    """Match like find_all(class_=name): any single class or the whole value"""
+    return name in classes or ' '.join(classes) == name
+
+
+def has_sport_item_class(classes):
+    """Match like the class_=lambda x: x and 'sportItem' in str(x) filter"""
+    return any('sportItem' in value for value in classes)
+
+
+class Cell:
+    __slots__ = ('classes', 'strings')
+
+    def __init__(self, classes):
+        self.classes = classes
+        self.strings = []
+
+    def text(self):
+        """Equivalent of get_text(strip=True)"""
+        return ''.join(self.strings)
+
+
+class Row:
+    __slots__ = ('classes', 'cells')
+
+    def __init__(self, classes):
+        self.classes = classes
+        self.cells = []
+
+
+class Table:
+    __slots__ = ('classes', 'forms', 'rows', 'cells')
+
+    def __init__(self, classes, forms):
+        self.classes = classes
+        self.forms = forms
+        self.rows = []
+        self.cells = []
+
+
+class PageModel:
+    """Collects forms, tables, rows and cells in one pass over the page.
+
+    Receives start/end/data events from either backend. Every element is
+    attached to all of its open ancestors of the relevant kind, which makes
+    the lists equal to what recursive find_all() calls would return.
+    """
+    def __init__(self):
+        self.forms = []      # (form index, name attribute) in document order
+        self.tables = []     # Table records in document order
+        self._stack = []     # (tag name, record or None)
+        self._open_forms = []
+        self._open_tables = []
+        self._open_rows = []
+        self._open_cells = []
+        self._open_containers = 0
+        self._text = []
+
+    def _flush_text(self):
+        if self._text:
+            string = ''.join(self._text).strip()
+            self._text = []
+            if string and not self._open_containers:
+                for cell in self._open_cells:
+                    cell.strings.append(string)
+
+    def start(self, tag, attrs):
+        self._flush_text()
+        if tag in VOID_ELEMENTS:
+            return
+
+        record = None
+        if tag == 'td':
+            record = Cell(class_list(attrs.get('class')))
+            for table in self._open_tables:
+                table.cells.append(record)
+            for row in self._open_rows:
+                row.cells.append(record)
+            self._open_cells.append(record)
+        elif tag == 'tr':
+            record = Row(class_list(attrs.get('class')))
+            for table in self._open_tables:
+                table.rows.append(record)
+            self._open_rows.append(record)
+        elif tag == 'table':
+            record = Table(class_list(attrs.get('class')), tuple(self._open_forms))
+            self.tables.append(record)
+            self._open_tables.append(record)
+        elif tag == 'form':
+            record = len(self.forms)
+            self.forms.append((record, attrs.get('name')))
+            self._open_forms.append(record)
+        elif tag in STRING_CONTAINERS:
+            self._open_containers += 1
+
+        self._stack.append((tag, record))
+
+    def end(self, tag):
+        self._flush_text()
+        # Like BeautifulSoup: close up to the most recent open tag of this
+        # name, ignore end tags without an open counterpart.
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > depth:
+            name, record = self._stack.pop()
+            if name == 'td':
+                self._open_cells.pop()
+            elif name == 'tr':
+                self._open_rows.pop()
+            elif name == 'table':
+                self._open_tables.pop()
+            elif name == 'form':
+                self._open_forms.pop()
+            elif name in STRING_CONTAINERS:
+                self._open_containers -= 1
+
+    def data(self, data):
+        self._text.append(data)
+
+    def comment(self, text):
+        # Comments split strings but are not part of get_text()
+        self._flush_text()
+
+    def close(self):
+        self._flush_text()
+        return self
+
+
+class _StdlibFeeder(HTMLParser):
+    """Forwards html.parser events to a PageModel"""
+    def __init__(self, model):
+        super().__init__(convert_charrefs=True)
+        self.model = model
+
+    def handle_starttag(self, tag, attrs):
+        self.model.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.model.start(tag, dict(attrs))
+        if tag not in VOID_ELEMENTS:
+            self.model.end(tag)
+
+    def handle_endtag(self, tag):
+        self.model.end(tag)
+
+    def handle_data(self, data):
+        self.model.data(data)
+
+    def handle_comment(self, data):
+        self.model.comment(data)
+
+
+class _LxmlTarget:
+    """lxml parser target forwarding events to a PageModel"""
+    def __init__(self, model):
+        self.model = model
+
+    def start(self, tag, attrib):
+        self.model.start(tag, attrib)
+
+    def end(self, tag):
+        self.model.end(tag)
+
+    def data(self, data):
+        self.model.data(data)
+
+    def comment(self, text):
+        self.model.comment(text)
+
+    def close(self):
+        return self.model.close()
+
+
+def build_page_model(content, backend=None):
+    """Tokenize a page once and return its PageModel"""
+    backend = backend or DEFAULT_BACKEND
+    text = decode_page(content)
+    model = PageModel()
+
+    if backend == 'lxml':
+        if etree is None:
+            raise ValueError("lxml backend requested but lxml is not installed")
+        parser = etree.HTMLParser(target=_LxmlTarget(model))
+        parser.feed(text)
+        return parser.close()
+
+    if backend == 'html.parser':
+        feeder = _StdlibFeeder(model)
+        feeder.feed(text)
+        feeder.close()
+        return model.close()
+
+    raise ValueError(f"Unknown parser backend '{backend}', expected one of {BACKENDS}")
+
+
+def safe_int(value):
+    """Safely convert string to integer, return 0 if conversion fails"""
+    try:
+        return int(value) if value and value.strip() else 0
+    except (ValueError, AttributeError):
+        return 0
+
+
+def parse_score_pair(score_text, team):
+    """Parse a score pair like '14 : 14' and return the specified team's score"""
+    try:
+        if not score_text or ':' not in score_text:
+            return None
+
+        parts = score_text.split(':')
+        if len(parts) != 2:
+            return None
+
+        home_score = safe_int(parts[0].strip())
+        away_score = safe_int(parts[1].strip())
+
+        return home_score if team == 'home' else away_score
+
+    except Exception as e:
+        logger.warning(f"Error parsing score pair '{score_text}': {e}")
+        return None
+
+
+def extract_player_stats(model, team_id, team_type, game_id, league_id):
+    """Player rows of one team, same rules as parse_player_stats"""
+    player_stats = []
+
+    form_name = f"spielerstatistik{team_type}"
+    form = next((index for index, name in model.forms if name == form_name), None)
+
+    if form is None:
+        logger.warning(f"Could not find form {form_name} for team type: {team_type}")
+        return player_stats
+
+    # Look for the table that contains player data (has 'Nachname' header)
+    data_table = None
+    for table in model.tables:
+        if form not in table.forms or not has_class(table.classes, 'sportView'):
+            continue
+        rows = table.rows
+        if len(rows) > 1:
+            cells = rows[0].cells
+            if len(cells) >= 8 and cells[0].text() == 'Nachname':
+                data_table = table
+                break
+
+    if not data_table:
+        logger.warning(f"Could not find player data table in form {form_name}")
+        return player_stats
+
+    for row in data_table.rows[1:]:
+        cells = row.cells
+
+        # Skip if not a player row (should have 8 cells for player data)
+        if len(cells) < 8:
+            continue
+
+        last_name_cell = cells[0].text()
+        first_name_cell = cells[1].text()
+
+        if not last_name_cell or not first_name_cell:
+            continue
+
+        # Skip rows that might be totals or empty
+        if last_name_cell in ['Gesamt', '']:
+            continue
+
+        player_stats.append(BoxScoreEntry(
+            game_id, team_id, last_name_cell, first_name_cell,
+            points=safe_int(cells[2].text()),
+            free_throw_attempts=safe_int(cells[3].text()),
+            free_throws_made=safe_int(cells[4].text()),
+            two_pointers=safe_int(cells[5].text()),
+            three_pointers=safe_int(cells[6].text()),
+            fouls=safe_int(cells[7].text()),
+            league_id=league_id
+        ))
+
+    return player_stats
+
+
+def extract_quarter_scores(model, game_id):
+    """Quarter scores, same rules as BasketballBundCrawler.extract_quarter_scores"""
+    for table in model.tables:
+        if not has_class(table.classes, 'sportView'):
+            continue
+
+        header_texts = [cell.text() for cell in table.cells if has_class(cell.classes, 'sportViewHeader')]
+
+        q1_idx = -1
+        ht_idx = -1
+        q3_idx = -1
+        for idx, text in enumerate(header_texts):
+            if '1.' in text and 'Viertel' in text:
+                q1_idx = idx
+            elif 'Halbzeit' in text:
+                ht_idx = idx
+            elif '3.' in text and 'Viertel' in text:
+                q3_idx = idx
+
+        if q1_idx == -1 or ht_idx == -1 or q3_idx == -1:
+            continue
+
+        rows = [row for row in table.rows if has_sport_item_class(row.classes)] or table.rows
+        max_idx = max(q1_idx, ht_idx, q3_idx)
+
+        for row in rows:
+            cells = [cell for cell in row.cells if has_sport_item_class(cell.classes)] or row.cells
+            if len(cells) <= max_idx:
+                continue
+
+            first_quarter = cells[q1_idx].text()
+            halftime = cells[ht_idx].text()
+            third_quarter = cells[q3_idx].text()
+
+            # Only process if we have actual score data (not headers or empty)
+            if ':' in first_quarter or ':' in halftime or ':' in third_quarter:
+                quarter_scores = {
+                    'first_quarter_home': parse_score_pair(first_quarter, 'home'),
+                    'first_quarter_away': parse_score_pair(first_quarter, 'away'),
+                    'halftime_home': parse_score_pair(halftime, 'home'),
+                    'halftime_away': parse_score_pair(halftime, 'away'),
+                    'third_quarter_home': parse_score_pair(third_quarter, 'home'),
+                    'third_quarter_away': parse_score_pair(third_quarter, 'away')
+                }
+
+                logger.info(f"Extracted quarter scores for game {game_id}: {quarter_scores}")
+                return quarter_scores
+
+    return None
+
+
+def parse_box_score(content, game_id, game_data, league_id, backend=None):
+    """Parse a box score page of a records.Game in one pass.
+
+    Returns (box_score_entries, qs_update) exactly like
+    BasketballBundCrawler.parse_box_score_data. Module level and free of
+    crawler state so it can run in worker processes.
+    """
+    model = build_page_model(content, backend)
+
+    quarter_scores = extract_quarter_scores(model, game_id)
+
+    box_score_entries = extract_player_stats(model, game_data.home_team_id, 'heim', game_id, league_id)
+    box_score_entries.extend(extract_player_stats(model, game_data.away_team_id, 'gast', game_id, league_id))
+
+    qs_update = None
+    if quarter_scores:
+        qs_update = (game_id, quarter_scores)
+
+    return box_score_entries, qs_update
+
+
+def parse_box_score_timed(content, game_id, game_data, league_id, backend=None):
+    """parse_box_score() plus the seconds it took, for the crawler's parse metrics"""
+    start = time.perf_counter()
+    result = parse_box_score(content, game_id, game_data, league_id, backend)
+    return result, time.perf_counter() - start
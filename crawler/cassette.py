@@ -0,0 +1,78 @@
+import base64
+import gzip
+import json
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+CASSETTE_VERSION = 1
+
+
+def request_key(method, url, body=None):
+    """Match key of a request: method, path, sorted query and JSON body.
+
+    Only path and query are used, so a cassette recorded against
+    basketball-bund.net replays under any base URL.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if isinstance(body, (bytes, str)) and body:
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+    canonical_body = json.dumps(body, sort_keys=True) if body not in (None, b'', '') else ''
+    return f"{method.upper()} {parts.path}?{query} {canonical_body}"
+
+
+class Cassette:
+    """Recorded HTTP exchanges of a crawler run, keyed by request_key().
+
+    Bodies are kept as UTF-8 text when they decode, base64 otherwise (e.g.
+    windows-1252 box score pages), so replays are byte-identical. Paths
+    ending in .gz are read and written gzip-compressed.
+    """
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, method, url, body, status, content_type, content):
+        """Store one exchange, a later response for the same request wins"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        try:
+            entry = {'body': content.decode('utf-8'), 'encoding': 'utf-8'}
+        except UnicodeDecodeError:
+            entry = {'body': base64.b64encode(content).decode('ascii'), 'encoding': 'base64'}
+        entry.update({'status': status, 'content_type': content_type})
+        with self._lock:
+            self.entries[request_key(method, url, body)] = entry
+
+    def lookup(self, method, url, body=None):
+        """(status, content_type, content bytes) of a recorded request, None if unknown"""
+        entry = self.entries.get(request_key(method, url, body))
+        if entry is None:
+            return None
+        if entry['encoding'] == 'base64':
+            content = base64.b64decode(entry['body'])
+        else:
+            content = entry['body'].encode('utf-8')
+        return entry['status'], entry['content_type'], content
+
+    def save(self, path):
+        with self._lock:
+            payload = json.dumps({'version': CASSETTE_VERSION, 'entries': self.entries}, ensure_ascii=False)
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            f.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {payload.get('version')} in {path}")
+        return cls(payload['entries'])
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_COLUMN = 'row_fingerprint'
+
+# Columns that change on every run without the row changing
+IGNORED_COLUMNS = ('scraped_at', FINGERPRINT_COLUMN)
+
+
+def row_fingerprint(row):
+    """Stable sha256 fingerprint of a row payload, ignoring scraped_at"""
+    payload = {key: value for key, value in row.items() if key not in IGNORED_COLUMNS}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def row_key(row, key_columns):
+    return tuple(str(row.get(column)) for column in key_columns)
+
+
+class ChangeDetector:
+    """Send only inserted or changed rows to Supabase.
+
+    Every payload row gets its fingerprint in the row_fingerprint column.
+    The stored fingerprints of a table are loaded once per run via
+    load_stored(table, key_columns) -> {key tuple: fingerprint}; rows whose
+    fingerprint matches are skipped. Rows are remembered as stored only
+    once their write succeeded, so a retried write sends them again.
+
+    With enabled=False rows are still fingerprinted but never skipped.
+    """
+    def __init__(self, load_stored, enabled=True):
+        self.load_stored = load_stored
+        self.enabled = enabled
+        self.stored = {}
+        self.written = {}
+        self.counts = {}
+
+    def stored_fingerprints(self, table, key_columns):
+        if table not in self.stored:
+            try:
+                self.stored[table] = self.load_stored(table, key_columns)
+            except Exception as e:
+                logger.warning(f"Could not load stored {table} fingerprints, writing all rows: {e}")
+                self.stored[table] = {}
+        return self.stored[table]
+
+    def filter(self, table, rows, key_columns):
+        """Fingerprint rows and return the ones that need writing"""
+        counts = self.counts.setdefault(table, {'written': 0, 'skipped': 0})
+        written = self.written.setdefault(table, {})
+        stored = self.stored_fingerprints(table, key_columns) if self.enabled else {}
+
+        changed = []
+        for row in rows:
+            fingerprint = row_fingerprint(row)
+            row[FINGERPRINT_COLUMN] = fingerprint
+            key = row_key(row, key_columns)
+            if not self.enabled:
+                changed.append(row)
+            elif written.get(key) == fingerprint:
+                # Already written earlier in this run, e.g. by streaming
+                continue
+            elif stored.get(key) == fingerprint:
+                counts['skipped'] += 1
+            else:
+                changed.append(row)
+        return changed
+
+    def fingerprint(self, table, rows, key_columns):
+        """Fingerprint rows for a server-side comparison (ingest_crawl), without loading stored fingerprints.
+
+        Only rows already written earlier in this run are dropped.
+        """
+        written = self.written.get(table, {}) if self.enabled else {}
+        fresh = []
+        for row in rows:
+            row[FINGERPRINT_COLUMN] = row_fingerprint(row)
+            if written.get(row_key(row, key_columns)) != row[FINGERPRINT_COLUMN]:
+                fresh.append(row)
+        return fresh
+
+    def mark_written(self, table, rows, key_columns, skipped=0):
+        """Record rows whose write succeeded; skipped of them were found unchanged by the database"""
+        written = self.written.setdefault(table, {})
+        for row in rows:
+            written[row_key(row, key_columns)] = row[FINGERPRINT_COLUMN]
+        counts = self.counts.setdefault(table, {'written': 0, 'skipped': 0})
+        counts['written'] += len(rows) - skipped
+        counts['skipped'] += skipped
+
+    def reset(self):
+        """Forget loaded fingerprints and written rows, the next filter() reloads them"""
+        self.stored = {}
+        self.written = {}
+
+    def summary(self):
+        """'table: N written, M skipped' for every table seen this run"""
+        return ', '.join(
+            f"{table}: {counts['written']} written, {counts['skipped']} skipped"
+            for table, counts in self.counts.items()
+        )
@@ -1,18 +1,15 @@
-import requests
-import json
+try:
+    from crawler.dump import fetch_spielplan, find_game
+except ImportError:
+    from dump import fetch_spielplan, find_game
 
 LEAGUE_ID = 49400
 GAME_ID = 2786721
-API_BASE_URL = "https://www.basketball-bund.net/rest"
 
 def check_game_status():
     try:
-        url = f"{API_BASE_URL}/competition/spielplan/id/{LEAGUE_ID}"
-        response = requests.get(url)
-        data = response.json().get('data', {}).get('matches', [])
-        
-        target_game = next((g for g in data if str(g.get('matchId')) == str(GAME_ID)), None)
-        
+        target_game = find_game(fetch_spielplan(LEAGUE_ID), GAME_ID)
+
         if target_game:
             home = target_game.get('homeTeam', {})
             print(f"Has teamPermanentId: {'teamPermanentId' in home}")
@@ -20,7 +17,7 @@ def check_game_status():
             print(f"teamPermanentId value: {home.get('teamPermanentId')}")
         else:
             print("GAME NOT FOUND")
-            
+
     except Exception as e:
         print(f"Error: {e}")
 
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Request rejected without being sent because the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Circuit breaker for the requests to one degraded site.
+
+    Closed, every request goes out. failure_threshold failures in a row
+    (connection errors, timeouts, 5xx responses, or responses slower than
+    slow_call seconds) trip it open: requests are rejected at once instead
+    of each waiting for its timeout. After cooldown seconds one probe
+    request goes out (half open); its success closes the breaker, its
+    failure opens it for another cooldown.
+
+    Thread-safe like the rate limiter, so both fetch engines can share one.
+    on_state_change(old, new) is called on every transition, outside of the
+    lock.
+    """
+    def __init__(self, failure_threshold=5, cooldown=60.0, slow_call=10.0, clock=time.monotonic,
+                 on_state_change=None):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self.slow_call = slow_call
+        self.clock = clock
+        self.on_state_change = on_state_change
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+        self.trips = 0
+        self.rejected = 0
+
+    def is_open(self):
+        """True while requests would be rejected, without taking the probe"""
+        with self._lock:
+            if self.state == OPEN:
+                return self.clock() < self.opened_at + self.cooldown
+            return self.state == HALF_OPEN
+
+    def allow(self):
+        """True when a request may go out; after the cooldown the first caller gets the probe"""
+        with self._lock:
+            old = self.state
+            if self.state == OPEN and self.clock() >= self.opened_at + self.cooldown:
+                self.state = HALF_OPEN
+                allowed = True
+            else:
+                allowed = self.state == CLOSED
+                if not allowed:
+                    self.rejected += 1
+            new = self.state
+        self._notify(old, new)
+        return allowed
+
+    def record(self, failed, latency=None):
+        """Report the outcome of a request that went out"""
+        failed = failed or (latency is not None and self.slow_call is not None and latency >= self.slow_call)
+        with self._lock:
+            old = self.state
+            if not failed:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+            else:
+                self.consecutive_failures += 1
+                if self.state == HALF_OPEN or (self.state == CLOSED
+                                               and self.consecutive_failures >= self.failure_threshold):
+                    self.state = OPEN
+                    self.opened_at = self.clock()
+                    self.trips += 1
+            new, failures = self.state, self.consecutive_failures
+        self._notify(old, new, failures)
+
+    def _notify(self, old, new, failures=0):
+        if new == old:
+            return
+        if new == OPEN:
+            logger.warning(f"Circuit breaker open after {failures} failed or slow requests, "
+                           f"rejecting requests for {self.cooldown:.0f}s")
+        else:
+            logger.info(f"Circuit breaker {new.replace('_', ' ')}")
+        if self.on_state_change is not None:
+            self.on_state_change(old, new)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'consecutive_failures': self.consecutive_failures
+            }
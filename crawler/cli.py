@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Command line entry point of the crawler.
+
+    python cli.py COMMAND [OPTIONS]          (in crawler/)
+    python -m crawler COMMAND [OPTIONS]      (in the repository root)
+
+Each command imports the module implementing it only when it runs, and
+with it only the dependencies it needs: a health check loads neither
+requests nor aiohttp, dump-game only the standard library. `import-times`
+measures the import time of every command in a fresh interpreter, so
+slower starts get noticed.
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+
+CRAWLER_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(CRAWLER_DIR)
+
+# Command: (module with a main(argv), help). The modules are only imported
+# when their command runs.
+COMMANDS = {
+    'crawl': ('main', "crawl basketball-bund.net into Supabase (main.py)"),
+    'health': ('health_check', "fail when no successful run was logged in the last 72 hours (health_check.py)"),
+    'dump-game': ('dump', "print one spielplan game as the REST API returns it (dump.py)"),
+    'reparse': ('reparse', "reparse archived box score pages without network traffic (reparse.py)"),
+    'bench': ('benchmarks.benchmark_crawler', "end-to-end benchmark against local stand-ins "
+                                              "(benchmarks/benchmark_crawler.py)"),
+}
+
+# Marks the start of the command's imports in -X importtime output, after
+# the interpreter's own startup imports
+IMPORT_MARKER = 'crawler-cli-imports'
+
+
+def load_command(name):
+    """Import the module implementing a command"""
+    module_name = COMMANDS[name][0]
+    if module_name.startswith('benchmarks.'):
+        # The benchmarks import crawler.* and benchmarks.* from the repository root
+        if REPO_ROOT not in sys.path:
+            sys.path.insert(0, REPO_ROOT)
+        return importlib.import_module(module_name)
+    try:
+        return importlib.import_module(f'crawler.{module_name}')
+    except ImportError:
+        return importlib.import_module(module_name)
+
+
+def parse_import_times(stderr):
+    """[(module, self µs, cumulative µs, depth)] of -X importtime output after IMPORT_MARKER"""
+    lines = stderr.splitlines()
+    if IMPORT_MARKER in lines:
+        lines = lines[lines.index(IMPORT_MARKER) + 1:]
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # the column header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure_imports(command):
+    """Import a command's module in a fresh interpreter, returns parse_import_times() of it"""
+    code = (f"import sys; sys.path.insert(0, {CRAWLER_DIR!r}); import cli; "
+            f"print({IMPORT_MARKER!r}, file=sys.stderr, flush=True); cli.load_command({command!r})")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            cwd=CRAWLER_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {command} failed: {result.stderr.strip().splitlines()[-1]}")
+    return parse_import_times(result.stderr)
+
+
+def import_report(imports, top=5):
+    """(total ms, [(package, ms)] of the packages with the most import time)"""
+    total_us = sum(cumulative_us for _, _, cumulative_us, depth in imports if depth == 0)
+    packages = {}
+    for name, self_us, _, _ in imports:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total_us / 1000, [(package, us / 1000) for package, us in heaviest]
+
+
+def parse_budget(value):
+    """argparse type of --budget COMMAND=MS"""
+    command, separator, ms = value.partition('=')
+    if not separator or command not in COMMANDS:
+        raise argparse.ArgumentTypeError(f"expected COMMAND=MS with COMMAND one of {', '.join(COMMANDS)}")
+    try:
+        return command, float(ms)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid milliseconds: {ms!r}")
+
+
+def run_import_times(args):
+    budgets = dict(args.budget)
+    over_budget = []
+    for command in args.commands or list(COMMANDS):
+        try:
+            # The fastest of several runs, the first one may read from a cold disk cache
+            reports = [import_report(measure_imports(command), top=args.top) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{command:<10} {e}")
+            over_budget.append(command)
+            continue
+        total_ms, heaviest = min(reports)
+        budget = budgets.get(command)
+        status = '' if budget is None else (' (over budget)' if total_ms > budget else f" (budget {budget:.0f} ms)")
+        print(f"{command:<10} {total_ms:8.1f} ms{status}")
+        print(f"{'':<10} {', '.join(f'{package} {ms:.1f}' for package, ms in heaviest)}")
+        if budget is not None and total_ms > budget:
+            over_budget.append(command)
+    return 1 if over_budget else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='crawler', description="BasketballBund crawler",
+        epilog="Options after COMMAND are the command's own, see COMMAND --help."
+    )
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+    for name, (_, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    timing = commands.add_parser('import-times', help="report how long each command takes to import")
+    timing.add_argument('commands', nargs='*', metavar='COMMAND',
+                        help=f"commands to measure (default: all of {', '.join(COMMANDS)})")
+    timing.add_argument('--repeat', type=int, default=3, help="fresh interpreters per command, the fastest counts (default: 3)")
+    timing.add_argument('--top', type=int, default=5, help="packages listed per command (default: 5)")
+    timing.add_argument('--budget', action='append', default=[], type=parse_budget, metavar='COMMAND=MS',
+                        help="fail when COMMAND takes longer than MS milliseconds to import (repeatable)")
+
+    # The commands parse their own options
+    args, command_argv = parser.parse_known_args(argv)
+    if args.command == 'import-times':
+        if command_argv:
+            parser.error(f"unrecognized arguments: {' '.join(command_argv)}")
+        unknown = [command for command in args.commands if command not in COMMANDS]
+        if unknown:
+            parser.error(f"unknown command: {', '.join(unknown)}")
+    return args, command_argv
+
+
+def main(argv=None):
+    args, command_argv = parse_args(argv)
+    if args.command == 'import-times':
+        return run_import_times(args)
+    return load_command(args.command).main(command_argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
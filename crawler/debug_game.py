@@ -17,10 +17,10 @@ class DebugCrawler(BasketballBundCrawler):
     def fetch_competition_spielplan(self):
         print("DEBUG: Fetching spielplan...")
         games = super().fetch_competition_spielplan()
-        target_games = [g for g in games if str(g.get('matchId')) == '2786721']
+        target_games = [g for g in games if g.game_id == '2786721']
         print(f"DEBUG: Filtered to {len(target_games)} games.")
         if target_games:
-            print(f"DEBUG: Game Data: Result='{target_games[0].get('result')}' Confirmed={target_games[0].get('ergebnisbestaetigt')}")
+            print(f"DEBUG: Game Data: Result='{target_games[0].result}' Confirmed={target_games[0].confirmed}")
         return target_games
 
 async def debug_run():
@@ -39,13 +39,12 @@ async def debug_run():
     if len(box_scores) > 0:
         print("DEBUG: Sample entries:")
         for bs in box_scores[:5]:
-             print(f"  - {bs.get('player_first_name')} {bs.get('player_last_name')}: {bs.get('points')} pts")
+             print(f"  - {bs.player_first_name} {bs.player_last_name}: {bs.points} pts")
     else:
         print("DEBUG: No box scores fetched. Checking why...")
         # Check logic
         game = games[0]
-        result = game.get('result')
-        if not (result and ':' in result):
+        if not game.has_result:
             print("DEBUG: Game skipped because result invalid.")
         else:
             print("DEBUG: Game should be processed. Checking single fetch...")
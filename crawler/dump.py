@@ -1,17 +1,69 @@
-import requests
+#!/usr/bin/env python3
+"""
+Dump one game of a league's spielplan as JSON.
+
+Prints the game as the REST API returns it (every field, not only the ones
+of records.Game), e.g. to look into new or missing fields. Uses only the
+standard library, so `cli.py dump-game` starts without the crawler's
+dependencies.
+"""
+import argparse
 import json
+import os
+import sys
+import urllib.request
+
+# Same as main.DEFAULT_BASE_URL and transport.USER_AGENT, whose modules
+# would import requests and aiohttp
+DEFAULT_BASE_URL = "https://www.basketball-bund.net"
+USER_AGENT = 'BasketballBund-Crawler/1.0'
+
+
+def fetch_spielplan(league_id, base_url=None, timeout=30):
+    """Raw competition/spielplan matches of a league"""
+    base_url = (base_url or os.getenv('BASKETBALL_BUND_URL') or DEFAULT_BASE_URL).rstrip('/')
+    request = urllib.request.Request(f"{base_url}/rest/competition/spielplan/id/{league_id}",
+                                     headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = json.load(response)
+    return (data.get('data') or {}).get('matches') or []
+
+
+def find_game(matches, game_id):
+    return next((match for match in matches if str(match.get('matchId')) == str(game_id)), None)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Dump one spielplan game as the REST API returns it")
+    parser.add_argument('game_id', metavar='GAME_ID')
+    parser.add_argument('--league', metavar='ID', default=os.getenv('LEAGUE_ID'),
+                        help="league of the game (default: LEAGUE_ID)")
+    parser.add_argument('--base-url', default=None,
+                        help="basketball-bund.net base URL (default: BASKETBALL_BUND_URL or the live site)")
+    parser.add_argument('--output', '-o', metavar='PATH', default='-',
+                        help="write the JSON to PATH (default: stdout)")
+    args = parser.parse_args(argv)
+    if not args.league:
+        parser.error("--league is required when LEAGUE_ID is not set")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    game = find_game(fetch_spielplan(args.league, args.base_url), args.game_id)
+    if game is None:
+        print(f"Game {args.game_id} is not in the spielplan of league {args.league}", file=sys.stderr)
+        return 1
 
-LEAGUE_ID = 49400
-GAME_ID = 2786721
-API_BASE_URL = "https://www.basketball-bund.net/rest"
+    if args.output == '-':
+        json.dump(game, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(game, f, indent=2, ensure_ascii=False)
+        print(f"Dumped game {args.game_id} to {args.output}")
+    return 0
 
-url = f"{API_BASE_URL}/competition/spielplan/id/{LEAGUE_ID}"
-response = requests.get(url)
-data = response.json().get('data', {}).get('matches', [])
 
-for m in data:
-    if str(m.get('matchId')) == str(GAME_ID):
-        with open('game_dump.json', 'w') as f:
-            json.dump(m, f, indent=2)
-        print("Dumped!")
-        break
+if __name__ == '__main__':
+    sys.exit(main())
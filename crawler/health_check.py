@@ -5,48 +5,141 @@ Health check script for the BasketballBund crawler.
 Schlägt fehl (Exit-Code 1), wenn in den letzten 72 Stunden kein
 erfolgreicher Crawler-Lauf in scrape_log protokolliert wurde. Die Liga-ID
 kommt aus der seasons-Tabelle (is_current); das LEAGUE_ID-Env dient nur
-noch als optionaler Filter-Fallback.
+noch als optionaler Filter-Fallback. Aus scrape_log.metrics werden
+zusätzlich Trends der letzten Läufe ausgegeben (nur Info, kein Fehler).
 """
+import argparse
+import json
 import os
 import sys
+import urllib.parse
+import urllib.request
 from datetime import datetime, timedelta, timezone
 
 try:
-    from supabase import create_client
+    from crawler.metrics import metrics_trends
+except ImportError:
+    from metrics import metrics_trends
 
-    # Test connection first
-    print('Testing Supabase connection...')
-    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
 
-    # Simple ping test
-    result = supabase.table('scrape_log').select('count').limit(1).execute()
-    print('Connection test successful')
+class RestClient:
+    """Read-only PostgREST client for the few selects of this check.
 
-    # Liga-ID der aktuellen Saison ermitteln (Fallback: LEAGUE_ID env)
-    league_id = os.getenv('LEAGUE_ID')
+    Mirrors the supabase-py calls used below (table().select().eq().gte()
+    .order().limit().execute().data) over urllib, so the check does not
+    import supabase, which alone takes longer than the whole check.
+    """
+    def __init__(self, supabase_url, supabase_key, timeout=30):
+        if not supabase_url or not supabase_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
+        self.rest_url = f"{supabase_url.rstrip('/')}/rest/v1"
+        self.headers = {'apikey': supabase_key, 'Authorization': f'Bearer {supabase_key}',
+                        'Accept': 'application/json'}
+        self.timeout = timeout
+
+    def table(self, name):
+        return RestQuery(self, name)
+
+
+class RestQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.params = []
+        self.data = None
+
+    def _filter(self, column, operator, value):
+        if isinstance(value, bool):
+            value = str(value).lower()
+        self.params.append((column, f"{operator}.{value}"))
+        return self
+
+    def select(self, columns):
+        self.params.append(('select', columns.replace(' ', '')))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def order(self, column, desc=False):
+        self.params.append(('order', f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, count):
+        self.params.append(('limit', str(count)))
+        return self
+
+    def execute(self):
+        url = f"{self.client.rest_url}/{self.table}?{urllib.parse.urlencode(self.params)}"
+        request = urllib.request.Request(url, headers=self.client.headers)
+        with urllib.request.urlopen(request, timeout=self.client.timeout) as response:
+            self.data = json.load(response)
+        return self
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when no successful crawler run was logged in the last 72 hours")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    parse_args(argv)
     try:
-        season_result = supabase.table('seasons').select('league_id, name').eq('is_current', True).limit(1).execute()
-        if season_result.data:
-            league_id = str(season_result.data[0]['league_id'])
-            print(f"Current season: {season_result.data[0]['name']} (league {league_id})")
+        # Test connection first
+        print('Testing Supabase connection...')
+        supabase = RestClient(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+
+        # Simple ping test
+        result = supabase.table('scrape_log').select('count').limit(1).execute()
+        print('Connection test successful')
+
+        # Liga-ID der aktuellen Saison ermitteln (Fallback: LEAGUE_ID env)
+        league_id = os.getenv('LEAGUE_ID')
+        try:
+            season_result = supabase.table('seasons').select('league_id, name').eq('is_current', True).limit(1).execute()
+            if season_result.data:
+                league_id = str(season_result.data[0]['league_id'])
+                print(f"Current season: {season_result.data[0]['name']} (league {league_id})")
+        except Exception as e:
+            print(f'Note: could not read seasons table ({e}), using LEAGUE_ID env')
+
+        # Check recent data
+        three_days_ago = datetime.now(timezone.utc) - timedelta(hours=72)
+        query = supabase.table('scrape_log').select('*').eq('status', 'success').gte('scraped_at', three_days_ago.isoformat())
+        if league_id:
+            query = query.eq('league_id', league_id)
+        result = query.execute()
+
+        if len(result.data) == 0:
+            print('ERROR: No successful scrape found in the last 72 hours' + (f' for league {league_id}' if league_id else ''))
+            return 1
+        else:
+            print(f'SUCCESS: Found {len(result.data)} recent scrape(s)')
+            for scrape in result.data:
+                print(f'  - {scrape["scraped_at"]}: {scrape["teams_count"]} teams, {scrape["games_count"]} games, {scrape["standings_count"]} standings')
+
+            # Trends aus den Metriken der letzten erfolgreichen Läufe
+            try:
+                history = supabase.table('scrape_log').select('scraped_at, metrics').eq('status', 'success')
+                if league_id:
+                    history = history.eq('league_id', league_id)
+                history = history.order('scraped_at', desc=True).limit(10).execute()
+                trends = metrics_trends([row.get('metrics') for row in history.data])
+                if trends:
+                    print('Trends (latest run vs. earlier runs):')
+                    for line in trends:
+                        print(f'  - {line}')
+            except Exception as e:
+                print(f'Note: could not read run metrics ({e})')
+
+        return 0
     except Exception as e:
-        print(f'Note: could not read seasons table ({e}), using LEAGUE_ID env')
-
-    # Check recent data
-    three_days_ago = datetime.now(timezone.utc) - timedelta(hours=72)
-    query = supabase.table('scrape_log').select('*').eq('status', 'success').gte('scraped_at', three_days_ago.isoformat())
-    if league_id:
-        query = query.eq('league_id', league_id)
-    result = query.execute()
-
-    if len(result.data) == 0:
-        print('ERROR: No successful scrape found in the last 72 hours' + (f' for league {league_id}' if league_id else ''))
-        sys.exit(1)
-    else:
-        print(f'SUCCESS: Found {len(result.data)} recent scrape(s)')
-        for scrape in result.data:
-            print(f'  - {scrape["scraped_at"]}: {scrape["teams_count"]} teams, {scrape["games_count"]} games, {scrape["standings_count"]} standings')
-
-except Exception as e:
-    print(f'ERROR: Health check failed: {e}')
-    sys.exit(1)
+        print(f'ERROR: Health check failed: {e}')
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
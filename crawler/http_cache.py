@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    from crawler.cassette import request_key
+except ImportError:
+    from cassette import request_key
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response stays fresh, by the first matching URL path fragment.
+# League metadata hardly changes within a season, table and spielplan change
+# with every game day; box score pages are covered by their content hash.
+DEFAULT_TTLS = {
+    '/rest/competition/list': 7 * 24 * 3600,
+    '/rest/competition/table/': 10 * 60,
+    '/rest/competition/spielplan/': 5 * 60
+}
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 24 * 3600}
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)\s*([smhd])')
+
+
+def parse_duration(value):
+    """Seconds of '90', '90s', '10m', '6h', '7d' or a compound duration like '5h45m'"""
+    text = str(value).strip()
+    if re.fullmatch(r'\d+(?:\.\d+)?', text):
+        return float(text)
+    if not re.fullmatch(r'(?:\d+(?:\.\d+)?\s*[smhd]\s*)+', text):
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 30s, 10m, 6h, 7d or 5h45m")
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in DURATION_PART.findall(text))
+
+
+def api_error(content):
+    """True when a REST body is not JSON or reports a basketball-bund API error (status other than '0')"""
+    try:
+        payload = json.loads(content)
+    except (ValueError, UnicodeDecodeError):
+        return True
+    return isinstance(payload, dict) and 'status' in payload and str(payload['status']) != '0'
+
+
+def parse_ttl_option(option):
+    """('/rest/competition/list', seconds) from a '--cache-ttl ENDPOINT=DURATION' option"""
+    endpoint, separator, duration = option.partition('=')
+    if not separator or not endpoint.strip():
+        raise ValueError(f"Invalid cache TTL '{option}', expected ENDPOINT=DURATION, e.g. competition/list=7d")
+    return endpoint.strip(), parse_duration(duration)
+
+
+def merge_ttls(overrides, ttls=DEFAULT_TTLS):
+    """ttls with (endpoint, seconds) overrides; 'spielplan' replaces the default spielplan rule"""
+    merged = dict(ttls)
+    for endpoint, ttl in overrides:
+        matching = [known for known in merged if endpoint.strip('/') in known]
+        merged[matching[0] if matching else endpoint] = ttl
+    return merged
+
+
+class CachedResponse:
+    """The part of requests.Response the crawler uses, for responses served from the cache"""
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        # Only successful responses are cached
+        pass
+
+
+class HttpCache:
+    """Disk-backed HTTP response cache with per-endpoint TTLs and LRU eviction.
+
+    Successful responses of endpoints with a TTL are kept in one SQLite file
+    in directory. A fresh entry is served without a request; a stale one is
+    revalidated with If-None-Match/If-Modified-Since when the server sent an
+    ETag or Last-Modified, and a 304 renews it. When the stored bodies grow
+    beyond max_bytes the least recently used entries are evicted. ttls maps
+    URL path fragments to seconds, the first match wins.
+    """
+    def __init__(self, directory='.http-cache', ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_bytes = max_bytes
+
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, 'responses.sqlite'), check_same_thread=False,
+                                  isolation_level=None)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.evicted = 0
+
+    def ttl_for(self, url):
+        path = urlsplit(url).path
+        for fragment, ttl in self.ttls.items():
+            if fragment in path:
+                return ttl
+        return 0
+
+    def key(self, method, url, body=None):
+        # request_key() ignores the host, the cache must not
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc} {request_key(method, url, body)}"
+
+    def lookup(self, method, url, body=None):
+        """Cached entry of a request, None when the endpoint is not cached or nothing is stored.
+
+        Returns (response, fresh, validators): validators are the
+        conditional request headers for revalidating a stale entry.
+        """
+        if self.ttl_for(url) <= 0:
+            return None
+        key = self.key(method, url, body)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT status, headers, body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        status, headers, content, expires_at = row
+        headers = json.loads(headers)
+        fresh = expires_at > time.time()
+        validators = {}
+        if headers.get('ETag'):
+            validators['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            elif not validators:
+                self.misses += 1
+        if not fresh and not validators:
+            return None
+        return CachedResponse(url, status, headers, bytes(content)), fresh, validators
+
+    def store(self, method, url, body, status, headers, content):
+        """Keep a successful response of a cached endpoint"""
+        ttl = self.ttl_for(url)
+        if ttl <= 0 or status != 200:
+            return
+        # An API error arrives as HTTP 200 too; cached, it would be served for the whole TTL
+        if api_error(content):
+            logger.debug(f"Not caching API error response of {url}")
+            return
+        cache_control = (headers.get('Cache-Control') or '').lower()
+        if 'no-store' in cache_control:
+            return
+        kept = {name: headers.get(name) for name in CACHED_HEADERS if headers.get(name)}
+        now = time.time()
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(method, url, body), url, status, json.dumps(kept), content, len(content), now + ttl, now)
+            )
+            self.stored += 1
+            self._evict()
+
+    def renew(self, method, url, body=None):
+        """Mark a revalidated (304) entry fresh for another TTL"""
+        with self._lock:
+            self.db.execute("UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?",
+                            (time.time() + self.ttl_for(url), time.time(), self.key(method, url, body)))
+            self.revalidated += 1
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evicted += 1
+
+    def clear(self):
+        with self._lock:
+            self.db.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {
+                'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                'stored': self.stored, 'evicted': self.evicted, 'entries': entries, 'bytes': size
+            }
+
+    def close(self):
+        self.db.close()
@@ -5,18 +5,58 @@ Fetches data from basketball-bund.net REST API and stores it in Supabase
 """
 
 import os
+import sys
+import argparse
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
 import requests
 
-from supabase import create_client, Client
 from dotenv import load_dotenv
 import logging
 from datetime import datetime, timezone
 import time
-from bs4 import BeautifulSoup
 try:
+    import aiohttp
+except ImportError:  # async engine is optional, sync engine works without it
+    aiohttp = None
+try:
+    from crawler import box_score_parser
     from crawler.rate_limiter import RateLimiter
+    from crawler.circuit_breaker import CircuitBreaker, CircuitOpenError
+    from crawler.transport import HttpTransport, HTML_ACCEPT
+    from crawler.streaming import BoxScoreStream
+    from crawler.write_planner import WritePlanner
+    from crawler.change_detection import ChangeDetector, FINGERPRINT_COLUMN
+    from crawler.spool import save_spool, load_spool, discard_spool
+    from crawler.multi_league import MultiLeagueCrawler, resolve_targets
+    from crawler.cassette import Cassette
+    from crawler.metrics import Metrics
+    from crawler.profiler import Profiler
+    from crawler.http_cache import HttpCache, merge_ttls, parse_duration, parse_ttl_option
+    from crawler.page_archive import PageArchive
+    from crawler.records import BoxScoreEntry, Game, as_entry, as_game
+    from crawler.watch import GameDayWatcher, kickoff_time
 except ImportError:
+    import box_score_parser
     from rate_limiter import RateLimiter
+    from circuit_breaker import CircuitBreaker, CircuitOpenError
+    from transport import HttpTransport, HTML_ACCEPT
+    from streaming import BoxScoreStream
+    from write_planner import WritePlanner
+    from change_detection import ChangeDetector, FINGERPRINT_COLUMN
+    from spool import save_spool, load_spool, discard_spool
+    from multi_league import MultiLeagueCrawler, resolve_targets
+    from cassette import Cassette
+    from metrics import Metrics
+    from profiler import Profiler
+    from http_cache import HttpCache, merge_ttls, parse_duration, parse_ttl_option
+    from page_archive import PageArchive
+    from records import BoxScoreEntry, Game, as_entry, as_game
+    from watch import GameDayWatcher, kickoff_time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,50 +65,249 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+DEFAULT_BASE_URL = "https://www.basketball-bund.net"
+
+FETCH_MODES = ('async', 'sync')
+PARSER_ENGINES = ('fast', 'soup')
+INGEST_MODES = ('tables', 'rpc')
+
+# How PostgREST reports an RPC function that does not exist
+MISSING_FUNCTION_MARKERS = ('PGRST202', 'Could not find the function')
+
+# assign_tsv_game_numbers numbers new games across all leagues, so crawlers
+# running in parallel in one process call it one at a time
+TSV_NUMBERING_LOCK = threading.Lock()
+
+# Columns added by migrations, per table. Rows are written (and stored rows
+# read) without them where the database does not have them yet.
+OPTIONAL_COLUMNS = {
+    'teams': (FINGERPRINT_COLUMN,),
+    'games': ('box_score_hash', FINGERPRINT_COLUMN),
+    'standings': (FINGERPRINT_COLUMN,),
+    'box_scores': (FINGERPRINT_COLUMN,),
+    'scrape_log': ('metrics', 'deferred_games')
+}
+
+# Natural key of each written table, used to match payload rows with stored rows
+ROW_KEYS = {
+    'teams': ('team_id',),
+    'games': ('game_id',),
+    'standings': ('team_id',),
+    'box_scores': ('game_id', 'team_id', 'player_first_name', 'player_last_name')
+}
+
+def create_client(supabase_url, supabase_key):
+    """supabase.create_client, imported on first use.
+
+    The supabase package takes longer to import than the rest of the crawler
+    together, and reparse.py or a dry run through cli.py may never need it.
+    """
+    from supabase import create_client as create_supabase_client
+    return create_supabase_client(supabase_url, supabase_key)
+
+def available_cores():
+    """Number of CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
 class BasketballBundCrawler:
-    def __init__(self):
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_KEY')
+    def __init__(self, fetch_mode='async', max_concurrency=4, request_interval=0.5, full_crawl=False,
+                 parser_engine='fast', parse_workers=None, stream_chunk_size=0,
+                 write_workers=4, diff_writes=True, spool_path=None, adaptive_rate=True,
+                 request_interval_floor=None, season=None, shared_from=None, base_url=None, time_budget=None,
+                 breaker_failures=5, breaker_cooldown=60.0, slow_request=10.0, hedge_after=None, ingest_mode='tables',
+                 parser_backend=None):
+        # Settings for crawlers of further seasons, see for_season()
+        self.options = {
+            'fetch_mode': fetch_mode, 'max_concurrency': max_concurrency, 'request_interval': request_interval,
+            'full_crawl': full_crawl, 'parser_engine': parser_engine, 'parser_backend': parser_backend,
+            'parse_workers': parse_workers,
+            'stream_chunk_size': stream_chunk_size, 'write_workers': write_workers, 'diff_writes': diff_writes,
+            'spool_path': spool_path, 'adaptive_rate': adaptive_rate, 'request_interval_floor': request_interval_floor,
+            'base_url': base_url, 'time_budget': time_budget, 'breaker_failures': breaker_failures,
+            'breaker_cooldown': breaker_cooldown, 'slow_request': slow_request, 'hedge_after': hedge_after,
+            'ingest_mode': ingest_mode
+        }
+
+        if shared_from is not None:
+            # Crawlers of several leagues in one process share one client
+            self.supabase_url = shared_from.supabase_url
+            self.supabase_key = shared_from.supabase_key
+            self.supabase = shared_from.supabase
+            self.missing_columns = shared_from.missing_columns
+        else:
+            self.supabase_url = os.getenv('SUPABASE_URL')
+            self.supabase_key = os.getenv('SUPABASE_KEY')
 
-        if not all([self.supabase_url, self.supabase_key]):
-            raise ValueError("Missing required environment variables")
+            if not all([self.supabase_url, self.supabase_key]):
+                raise ValueError("Missing required environment variables")
 
-        # Clean and validate the Supabase URL
-        self.supabase_url = self.clean_url(self.supabase_url)
+            # Clean and validate the Supabase URL
+            self.supabase_url = self.clean_url(self.supabase_url)
 
-        # Initialize Supabase client
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+            # Initialize Supabase client
+            self.supabase = create_client(self.supabase_url, self.supabase_key)
+
+            # OPTIONAL_COLUMNS the database turned out not to have, per table
+            self.missing_columns = {}
 
         # League/season configuration comes from the seasons table so a new
         # season only needs a DB row instead of a GitHub Secret change.
         # LEAGUE_ID env stays as fallback for databases without seasons table.
+        # An explicit season row (or {'league_id': ...} for a league without
+        # one) crawls that season instead of the current one.
         self.season_id = None
         self.our_team_id = None
         self.league_id = os.getenv('LEAGUE_ID')
-        season = self.fetch_current_season()
+        if season is None:
+            season = self.fetch_current_season()
+            if not season:
+                logger.warning("No current season found in seasons table, falling back to LEAGUE_ID env variable")
         if season:
             self.season_id = season.get('id')
             self.our_team_id = season.get('our_team_id')
             self.league_id = str(season.get('league_id'))
             logger.info(f"Using season '{season.get('name')}' (id={self.season_id}, league_id={self.league_id})")
-        else:
-            logger.warning("No current season found in seasons table, falling back to LEAGUE_ID env variable")
 
         if not self.league_id:
             raise ValueError("No league id available: insert an is_current row into seasons or set LEAGUE_ID")
         
+        # basketball-bund.net or a local stand-in such as replay_server.py
+        self.base_url = (base_url or os.getenv('BASKETBALL_BUND_URL') or DEFAULT_BASE_URL).rstrip('/')
+
         # BasketballBund API base URL
-        self.api_base_url = "https://www.basketball-bund.net/rest"
+        self.api_base_url = f"{self.base_url}/rest"
         
         # Box score URL base
-        self.box_score_base_url = "https://www.basketball-bund.net/public/ergebnisDetails.jsp"
+        self.box_score_base_url = f"{self.base_url}/public/ergebnisDetails.jsp"
+
+        # Box score fetch engine: 'async' fetches up to max_concurrency pages
+        # at once, 'sync' is the sequential fallback. Both share the same
+        # politeness budget, starting at one request per request_interval.
+        # The adaptive limiter widens it on 429/503, Retry-After and rising
+        # latency and narrows it down to request_interval_floor (default:
+        # half of request_interval) while the server answers quickly.
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}', expected one of {FETCH_MODES}")
+        if fetch_mode == 'async' and aiohttp is None:
+            logger.warning("aiohttp is not installed, falling back to sync box score fetching")
+            fetch_mode = 'sync'
+        self.fetch_mode = fetch_mode
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.request_interval = request_interval
+        if shared_from is not None:
+            self.rate_limiter = shared_from.rate_limiter
+        else:
+            self.rate_limiter = RateLimiter(
+                min_interval=request_interval,
+                adaptive=adaptive_rate,
+                floor_interval=request_interval / 2 if request_interval_floor is None else request_interval_floor
+            )
+
+        # Phase spans, latency histograms and counters of the run, shared
+        # like the rate budget; the transport reports its requests into it
+        self.metrics = shared_from.metrics if shared_from is not None else Metrics()
+
+        # Box score page parser: 'fast' is the single-pass box_score_parser,
+        # 'soup' the original BeautifulSoup implementation
+        if parser_engine not in PARSER_ENGINES:
+            raise ValueError(f"Unknown parser engine '{parser_engine}', expected one of {PARSER_ENGINES}")
+        self.parser_engine = parser_engine
+        # Tokenizer of the fast parser: html.parser matches the soup engine
+        # on every page, lxml is faster but repairs malformed markup
+        self.parser_backend = parser_backend or box_score_parser.DEFAULT_BACKEND
+        if self.parser_backend not in box_score_parser.BACKENDS:
+            raise ValueError(f"Unknown parser backend '{self.parser_backend}', "
+                             f"expected one of {box_score_parser.BACKENDS}")
+        if self.parser_backend == 'lxml' and box_score_parser.etree is None:
+            raise ValueError("The lxml parser backend needs lxml (pip install lxml)")
+
+        # Parsing is CPU-bound: fetched pages go to a process pool (one
+        # worker per core by default) while the next pages download.
+        # parse_workers=0 parses inline, e.g. for debugging.
+        self.parse_workers = available_cores() if parse_workers is None else max(0, int(parse_workers))
+        self.parse_pool = None
+
+        # Streaming mode upserts box scores in chunks of stream_chunk_size
+        # entries while the crawl continues; 0 writes everything in store_data
+        self.stream_chunk_size = max(0, int(stream_chunk_size))
+        self.box_score_stream = None
+        self.streamed_box_scores = 0
+
+        # store_data writes independent tables and the chunks of large
+        # tables concurrently on up to write_workers threads
+        self.write_workers = max(1, int(write_workers))
+        self.write_stats = {}
+
+        # Only rows whose fingerprint differs from the stored one are sent;
+        # diff_writes=False rewrites every row (fingerprints are still stored)
+        self.change_detector = ChangeDetector(self.load_stored_fingerprints, enabled=diff_writes)
+
+        # 'rpc' stores a run with one call of the ingest_crawl() DB function
+        # (one round trip, one transaction, fingerprints compared by the
+        # database); 'tables' writes table by table as described above
+        if ingest_mode not in INGEST_MODES:
+            raise ValueError(f"Unknown ingest mode '{ingest_mode}', expected one of {INGEST_MODES}")
+        self.ingest_mode = ingest_mode
+
+        # The fetched payload is spooled to spool_path until it is stored,
+        # so a retried run resumes with the writes instead of refetching
+        self.spool_path = spool_path
+
+        # Incremental mode skips games that are already stored as final with
+        # their box scores and pages whose content hash is unchanged;
+        # full_crawl refetches and reparses every game with a result.
+        self.full_crawl = full_crawl
+        self.stored_games = {}
+        self.page_hash_hits = 0
+        self.page_hash_misses = 0
+
+        # Box scores are fetched most urgent first (see fetch_priority). No
+        # fetch starts after the time budget, counted from the start of the
+        # process and shared with the crawlers of further seasons; the games
+        # left are recorded in scrape_log.deferred_games and lead the queue
+        # of the next run.
+        if shared_from is not None:
+            self.fetch_deadline = shared_from.fetch_deadline
+        else:
+            self.fetch_deadline = None if time_budget is None else time.monotonic() + time_budget
+        self.deferred_games = []
+        self.previously_deferred = set()
+
+        # 'watch' for the writes of watch.GameDayWatcher; tagged in the
+        # scrape_log metrics so health_check.py trends compare full runs only
+        self.run_mode = 'crawl'
+
+        # Every fetched box score page is kept in the page archive when one
+        # is attached, so reparse_archive() can rebuild rows offline
+        self.page_archive = shared_from.page_archive if shared_from is not None else None
         
-        # Session for requests
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'User-Agent': 'BasketballBund-Crawler/1.0'
-        })
+        # One pooled keep-alive transport for the REST calls and the box
+        # score pages of both fetch engines. Its circuit breaker opens after
+        # breaker_failures failed or slow (slow_request seconds) requests in
+        # a row; while it is open the box scores left are deferred instead of
+        # each waiting for its timeout. breaker_failures=0 turns it off.
+        # hedge_after enables hedged box score requests, see HttpTransport.
+        if shared_from is not None:
+            self.transport = shared_from.transport
+        else:
+            breaker = None
+            if breaker_failures:
+                breaker = CircuitBreaker(failure_threshold=breaker_failures, cooldown=breaker_cooldown,
+                                         slow_call=slow_request)
+            self.transport = HttpTransport(pool_maxsize=max(10, self.max_concurrency), rate_limiter=self.rate_limiter,
+                                           metrics=self.metrics, breaker=breaker, hedge_after=hedge_after)
+
+    def for_season(self, season, **overrides):
+        """Crawler for another season/league with the same settings.
+
+        It shares this crawler's Supabase client, HTTP transport and rate
+        budget; fetch state, writes and the scrape_log entry stay its own.
+        """
+        options = dict(self.options, **overrides)
+        return BasketballBundCrawler(season=season, shared_from=self, **options)
     
     def fetch_current_season(self):
         """Fetch the current season row from the seasons table"""
@@ -103,29 +342,40 @@ class BasketballBundCrawler:
         try:
             logger.info(f"Fetching data for league {self.league_id}")
             
-            # Fetch league details
-            league_details = self.fetch_competition_list()
-            
-            # Fetch league table/standings
-            standings = self.fetch_competition_table()
-            
-            # Fetch game schedule
-            games = self.fetch_competition_spielplan()
+            with self.metrics.span('rest_fetch', league=self.league_id):
+                # Fetch league details
+                league_details = self.fetch_competition_list()
+
+                # Fetch league table/standings
+                standings = self.fetch_competition_table()
+
+                # Fetch game schedule
+                games = self.fetch_competition_spielplan()
+
+            # Load stored game state once per run for incremental mode
+            with self.metrics.span('load_stored_games', league=self.league_id):
+                self.stored_games = {} if self.full_crawl else self.load_stored_games()
+                self.previously_deferred = self.load_deferred_games()
+
+            teams = self.extract_teams_from_data(standings, games)
             
             # Fetch box scores for finished games
-            box_scores = self.fetch_box_scores(games)
+            with self.metrics.span('box_scores', league=self.league_id):
+                box_scores = self.fetch_box_scores(games, teams)
             
             data = {
                 'league_id': self.league_id,
                 'scraped_at': datetime.now(timezone.utc).isoformat(),
                 'league_details': league_details,
-                'teams': self.extract_teams_from_data(standings, games),
+                'teams': teams,
                 'games': games,
                 'standings': standings,
-                'box_scores': box_scores
+                'box_scores': box_scores,
+                'streamed_box_scores': self.streamed_box_scores,
+                'deferred_games': self.deferred_games
             }
             
-            logger.info(f"Successfully fetched data: {len(data['teams'])} teams, {len(data['games'])} games, {len(data['standings'])} standings, {len(data['box_scores'])} box score entries")
+            logger.info(f"Successfully fetched data: {len(data['teams'])} teams, {len(data['games'])} games, {len(data['standings'])} standings, {len(data['box_scores']) + self.streamed_box_scores} box score entries")
             return data
             
         except Exception as e:
@@ -137,7 +387,7 @@ class BasketballBundCrawler:
         try:
             url = f"{self.api_base_url}/competition/list"
             payload = [int(self.league_id)]
-            response = self.session.post(url, json=payload, timeout=30)
+            response = self.transport.post(url, json=payload, timeout=30)
             response.raise_for_status()
             
             api_response = response.json()
@@ -154,7 +404,7 @@ class BasketballBundCrawler:
         """Fetch league standings/table"""
         try:
             url = f"{self.api_base_url}/competition/table/id/{self.league_id}"
-            response = self.session.get(url, timeout=30)
+            response = self.transport.get(url, timeout=30)
             response.raise_for_status()
             
             api_response = response.json()
@@ -169,10 +419,10 @@ class BasketballBundCrawler:
             return []
     
     def fetch_competition_spielplan(self):
-        """Fetch game schedule"""
+        """Fetch game schedule as records.Game"""
         try:
             url = f"{self.api_base_url}/competition/spielplan/id/{self.league_id}"
-            response = self.session.get(url, timeout=30)
+            response = self.transport.get(url, timeout=30)
             response.raise_for_status()
             
             api_response = response.json()
@@ -180,122 +430,631 @@ class BasketballBundCrawler:
                 raise Exception(f"API Error: {api_response.get('message')}")
             
             data = api_response.get('data', {})
-            return data.get('matches', [])
+            return [Game.from_api(match) for match in data.get('matches', [])]
             
         except requests.RequestException as e:
             logger.error(f"Error fetching competition spielplan: {e}")
             return []
     
-    def fetch_box_scores(self, games):
-        """Fetch box scores for finished games"""
+    def box_score_url(self, game_id):
+        """Build the ergebnisDetails.jsp URL for a game"""
+        return f"{self.box_score_base_url}?type=1&spielplan_id={game_id}&liga_id={self.league_id}&defaultview=1"
+
+    def select_all(self, table, columns, page_size=1000, **filters):
+        """Select all matching rows, paging past the PostgREST row limit.
+
+        Pages are ordered by the table's key columns; without an order
+        Postgres may return the rows in a different order per request, so
+        pages would skip or repeat rows.
+        """
+        rows = []
+        start = 0
+        while True:
+            query = self.supabase.table(table).select(columns)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            for column in ROW_KEYS.get(table, ('id',)):
+                query = query.order(column)
+            result = query.range(start, start + page_size - 1).execute()
+            page = result.data if isinstance(result.data, list) else []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    def note_missing_columns(self, table, error, columns):
+        """Remember the OPTIONAL_COLUMNS among columns that error names; False when it names none"""
+        found = [column for column in OPTIONAL_COLUMNS.get(table, ()) if column in columns and column in str(error)]
+        if not found:
+            return False
+        logger.warning(f"Using {table} without {', '.join(found)} (column missing? apply the migrations): {error}")
+        self.missing_columns.setdefault(table, set()).update(found)
+        return True
+
+    def select_optional(self, table, columns, **filters):
+        """select_all() of columns, leaving out optional columns the database does not have"""
+        while True:
+            selected = [column for column in columns if column not in self.missing_columns.get(table, ())]
+            try:
+                return self.select_all(table, ', '.join(selected), **filters)
+            except Exception as e:
+                if not self.note_missing_columns(table, e, selected):
+                    raise
+
+    def write_optional(self, table, rows, write):
+        """write(rows), leaving out optional columns the database does not have.
+
+        A column is dropped for the rest of the run once an error names it,
+        so an unmigrated database gets the rows without it instead of
+        failing the run.
+        """
+        while True:
+            missing = self.missing_columns.get(table, ())
+            payload = [{key: value for key, value in row.items() if key not in missing} for row in rows] \
+                if missing else rows
+            try:
+                return write(payload)
+            except Exception as e:
+                if not self.note_missing_columns(table, e, {column for row in payload for column in row}):
+                    raise
+
+    def load_stored_games(self):
+        """Load the stored state of this league's games.
+
+        Returns a dict game_id -> stored games row, with has_box_scores set
+        when box_scores rows exist for the game. On any error the dict is
+        empty, so the run falls back to fetching and parsing every game.
+        """
         try:
-            logger.info("Fetching box scores for games synchronously...")
-            box_scores = []
-            
-            # Filter games
-            games_to_fetch = []
-            for game in games:
-                if game.get('result') and ':' in game.get('result', ''):
-                    game_id = str(game.get('matchId', ''))
-                    if game_id:
-                        games_to_fetch.append((game_id, game))
-            
-            logger.info(f"Found {len(games_to_fetch)} games to fetch box scores for")
-            
-            # Use rate limiter to be nice to the server while allowing faster processing
-            rate_limiter = RateLimiter(min_interval=0.5)
+            filters = {'league_id': self.league_id}
+            if self.season_id is not None:
+                filters['season_id'] = self.season_id
 
-            for index, (game_id, game) in enumerate(games_to_fetch):
-                try:
-                    # Respect rate limit
-                    rate_limiter.wait()
+            games = self.select_optional(
+                'games', ('game_id', 'status', 'home_score', 'away_score', 'quarter_scores', 'box_score_hash'),
+                **filters
+            )
+            with_box_scores = {row.get('game_id') for row in self.select_all('box_scores', 'game_id', **filters)}
 
-                    logger.info(f"Fetching box score for game {game_id} ({index+1}/{len(games_to_fetch)})")
-                    entries, qs_update = self.fetch_game_box_score(game_id, game)
-                    if entries:
-                        box_scores.extend(entries)
-                    if qs_update:
-                        # Attach to the game object; persisted together with the
-                        # full game row in store_data. (The previous standalone
-                        # upsert here could insert partial game rows without
-                        # team names before the games were stored.)
-                        game['quarter_scores'] = qs_update[1]
+            stored_games = {}
+            for row in games:
+                row['has_box_scores'] = row.get('game_id') in with_box_scores
+                stored_games[row['game_id']] = row
 
-                except Exception as e:
-                    logger.error(f"Error processing game {game_id}: {e}")
-                    continue
+            final_count = sum(1 for game_id in stored_games if self.is_stored_final(game_id))
+            logger.info(f"Loaded {len(stored_games)} stored games, {final_count} already final with box scores")
+            return stored_games
+        except Exception as e:
+            logger.warning(f"Could not load stored games, fetching all box scores: {e}")
+            return {}
+
+    def load_deferred_games(self):
+        """Ids of the games the last successful run of this league deferred"""
+        try:
+            result = self.supabase.table('scrape_log').select('deferred_games').eq('league_id', self.league_id) \
+                .eq('status', 'success').order('scraped_at', desc=True).limit(1).execute()
+            rows = result.data if isinstance(result.data, list) else []
+        except Exception as e:
+            logger.warning(f"Could not load the games deferred by the last run (column missing?): {e}")
+            return set()
+        deferred = set(rows[0].get('deferred_games') or []) if rows else set()
+        if deferred:
+            logger.info(f"Fetching {len(deferred)} games deferred by the last run first")
+        return deferred
+
+    def load_stored_fingerprints(self, table, key_columns):
+        """Load {key tuple: row_fingerprint} of this league's stored rows of a table.
+
+        Empty for a table without the row_fingerprint column: every row is
+        written, without the column.
+        """
+        filters = {'league_id': self.league_id}
+        if self.season_id is not None and table != 'teams':
+            filters['season_id'] = self.season_id
+
+        rows = self.select_optional(table, key_columns + (FINGERPRINT_COLUMN,), **filters)
+        if FINGERPRINT_COLUMN in self.missing_columns.get(table, ()):
+            return {}
+        return {
+            tuple(str(row.get(column)) for column in key_columns): row.get(FINGERPRINT_COLUMN)
+            for row in rows
+        }
+
+    def changed_rows(self, table, rows):
+        """Fingerprint rows and drop the ones stored unchanged"""
+        return self.change_detector.filter(table, rows, ROW_KEYS[table])
+
+    def tracked_writer(self, table, upsert):
+        """Wrap an upsert so successfully written rows are not sent again this run"""
+        def write(rows):
+            start = time.perf_counter()
+            try:
+                result = upsert(rows)
+            except Exception:
+                self.metrics.inc('write_errors_total', table=table, league=self.league_id)
+                raise
+            finally:
+                self.metrics.observe('write_seconds', time.perf_counter() - start, table=table, league=self.league_id)
+            self.metrics.inc('rows_written_total', len(rows), table=table, league=self.league_id)
+            self.change_detector.mark_written(table, rows, ROW_KEYS[table])
+            return result
+        return write
+
+    def write_changed(self, table, rows, upsert):
+        """Upsert only the changed rows of a table, returns the number written"""
+        rows = self.changed_rows(table, rows)
+        if rows:
+            self.tracked_writer(table, upsert)(rows)
+        return len(rows)
+
+    def is_stored_final(self, game_id):
+        """True if the game is stored as finished and has box scores"""
+        stored = self.stored_games.get(game_id)
+        return bool(stored) and stored.get('status') == 'finished' and stored.get('has_box_scores', False)
+
+    def parse_result(self, result):
+        """Parse an API result like '88:77' into (home, away), None if not a result"""
+        if not result or ':' not in result:
+            return None
+        try:
+            home_score, away_score = result.split(':')
+            return int(home_score.strip()), int(away_score.strip())
+        except ValueError:
+            return None
+
+    def is_unchanged_final(self, game_id, game):
+        """True if the game is confirmed and stored with the same final score"""
+        if not self.is_stored_final(game_id) or not game.confirmed:
+            return False
+        stored = self.stored_games[game_id]
+        return self.parse_result(game.result) == (stored.get('home_score'), stored.get('away_score'))
+
+    def carry_stored_state(self, game_id, game):
+        """Copy stored quarter scores and page hash onto a game that is not reparsed"""
+        stored = self.stored_games[game_id]
+        game.quarter_scores = stored.get('quarter_scores')
+        game.box_score_hash = stored.get('box_score_hash')
+
+    def fetch_priority(self, game):
+        """Sort key of a game in the box score queue, most urgent first.
+
+        Games deferred by the last run come first, then unconfirmed results
+        (they may still change and are the newest), games of our team and
+        finally the most recent kickoff.
+        """
+        ours = self.our_team_id is not None and str(self.our_team_id) in (game.home_team_id, game.away_team_id)
+        return (game.game_id not in self.previously_deferred, game.confirmed, not ours, -(kickoff_time(game) or 0))
+
+    def select_games_to_fetch(self, games):
+        """Return (game_id, game) pairs for all games whose box score is needed, most urgent first.
+
+        In incremental mode games that are unchanged since they were stored
+        as final are skipped; their stored quarter scores and page hash are
+        carried over so the games upsert does not clear them.
+        """
+        games_to_fetch = []
+        skipped = 0
+        for game in games:
+            if game.has_result:
+                game_id = game.game_id
+                if game_id:
+                    if self.is_unchanged_final(game_id, game):
+                        self.carry_stored_state(game_id, game)
+                        skipped += 1
+                        continue
+                    games_to_fetch.append((game_id, game))
+        if skipped:
+            logger.info(f"Incremental mode: skipping {skipped} already-final games")
+        games_to_fetch.sort(key=lambda pair: self.fetch_priority(pair[1]))
+        return games_to_fetch
+
+    def out_of_budget(self):
+        """True once the time budget for fetching is used up"""
+        return self.fetch_deadline is not None and time.monotonic() >= self.fetch_deadline
+
+    def defer_game(self, game_id, game, reason='time_budget'):
+        """Leave a game for the next run, keeping its stored state in the games upsert"""
+        self.deferred_games.append(game_id)
+        self.metrics.inc('box_scores_deferred_total', reason=reason, league=self.league_id)
+        if game_id in self.stored_games:
+            self.carry_stored_state(game_id, game)
+
+    def merge_box_score_results(self, games_to_fetch, results):
+        """Merge per-game fetch results in the order of games_to_fetch.
 
-            logger.info(f"Fetched box scores for {len(box_scores)} player entries")
+        Quarter scores are attached to the game object and persisted together
+        with the full game row in store_data. (A standalone upsert here could
+        insert partial game rows without team names before the games were
+        stored.)
+        """
+        box_scores = []
+        qs_updates = []
+        for (game_id, game), (entries, qs_update) in zip(games_to_fetch, results):
+            if entries:
+                box_scores.extend(entries)
+            if qs_update:
+                game.quarter_scores = qs_update[1]
+                qs_updates.append(qs_update)
+        return box_scores, qs_updates
+
+    def fetch_box_scores(self, games, teams=None):
+        """Fetch box scores for finished games with the configured engine.
+
+        In streaming mode the entries are written while fetching and only
+        the entries that could not be streamed are returned.
+        """
+        try:
+            self.page_hash_hits = 0
+            self.page_hash_misses = 0
+            self.streamed_box_scores = 0
+            self.deferred_games = []
+            self.box_score_stream = self.open_box_score_stream(teams)
+            with self.parse_stage():
+                if self.fetch_mode == 'async':
+                    box_scores, _ = asyncio.run(self.fetch_box_scores_async(games))
+                else:
+                    box_scores, _ = self.fetch_box_scores_sync(games)
+
+            if self.box_score_stream is not None:
+                box_scores.extend(self.box_score_stream.close())
+                self.streamed_box_scores = self.box_score_stream.entries_written
+
+            logger.info(f"Fetched box scores for {len(box_scores) + self.streamed_box_scores} player entries")
+            logger.info(f"Box score pages: {self.page_hash_hits} unchanged (hash hit), {self.page_hash_misses} parsed (hash miss)")
+            if self.deferred_games:
+                logger.warning(f"Deferred {len(self.deferred_games)} games to the next run "
+                               f"(time budget used up or circuit breaker open)")
             return box_scores
         except Exception as e:
             logger.error(f"Error in fetch_box_scores: {e}")
             return []
+        finally:
+            self.box_score_stream = None
 
-    # Async methods removed as we switched to synchronous for better stability
-    # fetch_box_scores_async and fetch_single_game_box_score_async deleted
+    def open_box_score_stream(self, teams):
+        """Start streaming box score writes, None when streaming is off or unavailable"""
+        if not self.stream_chunk_size:
+            return None
+        stream = BoxScoreStream(self, chunk_size=self.stream_chunk_size)
+        try:
+            self.test_supabase_connection()
+            stream.open(teams or [])
+        except Exception as e:
+            logger.error(f"Cannot stream box scores, writing them in store_data instead: {e}")
+            return None
+        logger.info(f"Streaming box scores in chunks of {self.stream_chunk_size} entries")
+        return stream
 
+    def finish_box_score_page(self, game_id, game, result):
+        """Hand one game's result to the box score stream when streaming"""
+        if self.box_score_stream is None:
+            return result
+        self.box_score_stream.add(game_id, game, *result)
+        return [], None
 
+    @contextmanager
+    def parse_stage(self):
+        """Run the enclosed fetches with a process pool parsing stage.
 
+        Only the single-pass parser runs in worker processes; the soup
+        engine needs the crawler instance and always parses inline. A pool
+        assigned from outside (shared by several crawlers) is used as is.
+        """
+        if self.parse_pool is not None:
+            yield
+            return
+        if self.parse_workers < 1 or self.parser_engine != 'fast':
+            logger.info("Parsing box score pages inline")
+            yield
+            return
 
-    def parse_box_score_data(self, content, game_id, game_data):
-        """Parse box score HTML content"""
+        logger.info(f"Parsing box score pages in {self.parse_workers} worker processes")
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            self.parse_pool = pool
+            try:
+                yield
+            finally:
+                self.parse_pool = None
+
+    def fetch_box_scores_sync(self, games):
+        """Fetch box scores one game at a time (fallback engine)"""
+        logger.info("Fetching box scores for games synchronously...")
+        games_to_fetch = self.select_games_to_fetch(games)
+        logger.info(f"Found {len(games_to_fetch)} games to fetch box scores for")
+
+        # Use rate limiter to be nice to the server while allowing faster processing
+        rate_limiter = self.rate_limiter
+
+        # Pages are handed to the parse stage right after download, so with
+        # a process pool the next page downloads while earlier ones parse.
+        # Finished parses are collected in game order as soon as they are
+        # ready, which lets streaming mode write them during the crawl.
+        pending = deque()
+        results = []
+        for index, (game_id, game) in enumerate(games_to_fetch):
+            try:
+                # While the circuit breaker is open games are deferred at
+                # once, without waiting for a rate limiter slot
+                if self.transport.circuit_open():
+                    raise CircuitOpenError()
+
+                # Respect rate limit; once the budget is used up the rest
+                # is deferred without taking a slot of the shared limiter
+                if not self.out_of_budget():
+                    rate_limiter.wait()
+
+                if self.out_of_budget():
+                    for deferred_id, deferred_game in games_to_fetch[index:]:
+                        self.defer_game(deferred_id, deferred_game)
+                    games_to_fetch = games_to_fetch[:index]
+                    break
+
+                logger.info(f"Fetching box score for game {game_id} ({index+1}/{len(games_to_fetch)})")
+                content = self.download_box_score(game_id)
+                job = None if content is None else self.submit_box_score_page(content, game_id, game)
+
+            except CircuitOpenError:
+                self.defer_game(game_id, game, reason='circuit_open')
+                job = None
+
+            except Exception as e:
+                logger.error(f"Error processing game {game_id}: {e}")
+                job = None
+
+            pending.append((game_id, game, job))
+            while pending and (pending[0][2] is None or pending[0][2][0].done()):
+                results.append(self.collect_finished_page(*pending.popleft()))
+
+        while pending:
+            results.append(self.collect_finished_page(*pending.popleft()))
+        return self.merge_box_score_results(games_to_fetch, results)
+
+    def collect_finished_page(self, game_id, game, job):
+        """Collect a submitted page and pass the result on"""
+        return self.finish_box_score_page(game_id, game, self.collect_box_score_page(game_id, game, job))
+
+    async def fetch_box_scores_async(self, games):
+        """Fetch box scores concurrently, at most max_concurrency pages in flight"""
+        logger.info(f"Fetching box scores for games asynchronously (concurrency {self.max_concurrency})...")
+        games_to_fetch = self.select_games_to_fetch(games)
+        logger.info(f"Found {len(games_to_fetch)} games to fetch box scores for")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        stream_lock = asyncio.Lock()
+        rate_limiter = self.rate_limiter
+        total = len(games_to_fetch)
+
+        async def fetch_one(index, game_id, game):
+            async with semaphore:
+                try:
+                    if self.transport.circuit_open():
+                        raise CircuitOpenError()
+
+                    # Request starts share one budget across all workers.
+                    # Past the deadline every queued game is deferred at
+                    # once, without taking (and waiting for) a slot.
+                    if not self.out_of_budget():
+                        await rate_limiter.wait_async()
+
+                    if self.out_of_budget():
+                        self.defer_game(game_id, game)
+                        return [], None
+
+                    logger.info(f"Fetching box score for game {game_id} ({index+1}/{total})")
+                    result = await self.fetch_single_game_box_score_async(session, game_id, game)
+                except CircuitOpenError:
+                    self.defer_game(game_id, game, reason='circuit_open')
+                    return [], None
+                except Exception as e:
+                    logger.error(f"Error processing game {game_id}: {e}")
+                    return [], None
+
+            # Outside the semaphore, so downloads go on during a flush
+            return await finish_one(game_id, game, result)
+
+        async def finish_one(game_id, game, result):
+            if self.box_score_stream is None:
+                return result
+            # Stream flushes are synchronous Supabase upserts: run them in a
+            # worker thread instead of on the event loop, one at a time
+            try:
+                async with stream_lock:
+                    return await asyncio.to_thread(self.finish_box_score_page, game_id, game, result)
+            except Exception as e:
+                logger.error(f"Error processing game {game_id}: {e}")
+                return [], None
+
+        async with self.transport.async_session(limit_per_host=self.max_concurrency) as session:
+            # gather keeps the input order, so results line up with
+            # games_to_fetch (most urgent first)
+            results = await asyncio.gather(*(
+                fetch_one(index, game_id, game)
+                for index, (game_id, game) in enumerate(games_to_fetch)
+            ))
+
+        return self.merge_box_score_results(games_to_fetch, results)
+
+    async def fetch_single_game_box_score_async(self, session, game_id, game_data):
+        """Fetch box score for a specific game (asynchronous)"""
         try:
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Extract quarter scores first
-            quarter_scores = self.extract_quarter_scores(soup, game_id)
-            
-            # Extract player statistics from both teams
-            home_team_id = str(game_data.get('homeTeam', {}).get('teamPermanentId', ''))
-            away_team_id = str(game_data.get('guestTeam', {}).get('teamPermanentId', ''))
-            
-            box_score_entries = []
-            
-            # Parse home team statistics
-            home_stats = self.parse_player_stats(soup, home_team_id, 'heim', game_id)
-            box_score_entries.extend(home_stats)
-            
-            # Parse away team statistics  
-            away_stats = self.parse_player_stats(soup, away_team_id, 'gast', game_id)
-            box_score_entries.extend(away_stats)
-            
-            qs_update = None
-            if quarter_scores:
-                qs_update = (game_id, quarter_scores)
+            content = await self.transport.get_async(session, self.box_score_url(game_id))
+            job = self.submit_box_score_page(content, game_id, game_data)
+            if job:
+                # Wait without blocking the event loop, other downloads go on
+                await asyncio.wait([asyncio.wrap_future(job[0])])
+            return self.collect_box_score_page(game_id, game_data, job)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching box score HTML for game {game_id}: {e}")
+            return [], None
+
+    def process_box_score_page(self, content, game_id, game_data):
+        """Process a fetched box score page and wait for the result"""
+        job = self.submit_box_score_page(content, game_id, game_data)
+        return self.collect_box_score_page(game_id, game_data, job)
 
-            return box_score_entries, qs_update
+    def submit_box_score_page(self, content, game_id, game_data):
+        """Hand a fetched page to the parse stage unless its content is unchanged.
+
+        The sha256 of the raw page is stored as games.box_score_hash. When it
+        matches the stored hash and the box scores are stored, the page is
+        neither parsed nor written again and None is returned. Otherwise
+        returns (future, page_hash); the future resolves to the parse result
+        and the seconds the parse took.
+        """
+        page_hash = hashlib.sha256(content).hexdigest()
+        self.archive_box_score_page(content, game_id, game_data, page_hash)
+        stored = self.stored_games.get(game_id)
+        if stored and stored.get('has_box_scores') and stored.get('box_score_hash') == page_hash:
+            self.page_hash_hits += 1
+            self.metrics.inc('box_score_pages_unchanged_total', league=self.league_id)
+            self.carry_stored_state(game_id, game_data)
+            return None
+
+        self.page_hash_misses += 1
+        return self.submit_parse(content, game_id, game_data), page_hash
+
+    def submit_parse(self, content, game_id, game_data):
+        """Future of (parse result, seconds) of a page, parsed in the pool when there is one"""
+        if self.parse_pool is not None:
+            return self.parse_pool.submit(
+                box_score_parser.parse_box_score_timed, content, game_id, game_data, self.league_id,
+                self.parser_backend
+            )
+        future = Future()
+        start = time.perf_counter()
+        result = self.parse_box_score_data(content, game_id, game_data)
+        future.set_result((result, time.perf_counter() - start))
+        return future
+
+    def archive_box_score_page(self, content, game_id, game_data, page_hash):
+        """Keep the raw page in the page archive, if one is attached"""
+        if self.page_archive is None:
+            return
+        try:
+            self.page_archive.add(game_id, self.league_id, self.season_id, game_data, content, page_hash)
+        except Exception as e:
+            logger.warning(f"Could not archive the box score page of game {game_id}: {e}")
+
+    def collect_box_score_page(self, game_id, game_data, job):
+        """Return the (entries, qs_update) result of a submitted page"""
+        if job is None:
+            return [], None
+
+        future, page_hash = job
+        try:
+            (box_score_entries, qs_update), seconds = future.result()
         except Exception as e:
             logger.error(f"Error parsing box score for game {game_id}: {e}")
             return [], None
 
-    # Kept for backward compatibility if needed, though mostly replaced by async version above
-    def fetch_game_box_score(self, game_id, game_data):
-        """Fetch box score for a specific game (synchronous)"""
+        self.metrics.observe('parse_seconds', seconds, league=self.league_id)
+
+        if box_score_entries:
+            # Only remember the hash once the page actually yielded rows
+            game_data.box_score_hash = page_hash
+        return box_score_entries, qs_update
+
+    def parse_box_score_data(self, content, game_id, game_data):
+        """Parse box score HTML content with the configured parser engine"""
         try:
-            # Construct URL for box score page
-            url = f"{self.box_score_base_url}?type=1&spielplan_id={game_id}&liga_id={self.league_id}&defaultview=1"
+            if self.parser_engine == 'fast':
+                return box_score_parser.parse_box_score(content, game_id, game_data, self.league_id,
+                                                        self.parser_backend)
+            return self.parse_box_score_soup(content, game_id, game_data)
+        except Exception as e:
+            logger.error(f"Error parsing box score for game {game_id}: {e}")
+            return [], None
+
+    def parse_box_score_soup(self, content, game_id, game_data):
+        """Parse box score HTML content with BeautifulSoup"""
+        # Only the soup engine needs bs4, the default fast parser does not
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Extract quarter scores first
+        quarter_scores = self.extract_quarter_scores(soup, game_id)
+
+        # Extract player statistics from both teams
+        box_score_entries = []
+
+        # Parse home team statistics
+        home_stats = self.parse_player_stats(soup, game_data.home_team_id, 'heim', game_id)
+        box_score_entries.extend(home_stats)
+
+        # Parse away team statistics
+        away_stats = self.parse_player_stats(soup, game_data.away_team_id, 'gast', game_id)
+        box_score_entries.extend(away_stats)
 
-            # Use a separate session for HTML requests with different headers
-            html_session = requests.Session()
-            html_session.headers.update({
-                'User-Agent': 'BasketballBund-Crawler/1.0',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-            })
+        qs_update = None
+        if quarter_scores:
+            qs_update = (game_id, quarter_scores)
 
-            response = html_session.get(url, timeout=30)
+        return box_score_entries, qs_update
+
+    def download_box_score(self, game_id):
+        """Download the raw box score page of a game, None on HTTP errors"""
+        try:
+            response = self.transport.get(self.box_score_url(game_id), headers={'Accept': HTML_ACCEPT}, timeout=30)
             response.raise_for_status()
+            return response.content
 
-            box_score_entries, quarter_scores = self.parse_box_score_data(response.content, game_id, game_data)
-            
-            return box_score_entries, quarter_scores
-            
         except requests.RequestException as e:
             logger.error(f"Error fetching box score HTML for game {game_id}: {e}")
+            return None
+
+    def fetch_game_box_score(self, game_id, game_data):
+        """Fetch box score for a specific game (synchronous)"""
+        content = self.download_box_score(game_id)
+        if content is None:
             return [], None
-        except Exception as e:
-            logger.error(f"Error parsing box score for game {game_id}: {e}")
-            return [], None
+        return self.process_box_score_page(content, game_id, game_data)
     
+    def reparse_archive(self, archive, game_ids=None, dry_run=False):
+        """Rebuild this league's games and box scores from archived pages.
+
+        Parses the newest archived page of every game (or of game_ids) in
+        the parse stage, without any request to basketball-bund.net, and
+        upserts only the rows whose fingerprint differs from the stored
+        one. Rows an earlier parser produced under another key (e.g. a
+        misparsed player name) are not deleted. Returns
+        {table: rows that differ from the stored ones}.
+        """
+        pages = archive.latest(self.league_id, self.season_id, game_ids)
+        logger.info(f"Reparsing {len(pages)} archived box score pages of league {self.league_id}")
+
+        games = []
+        box_scores = []
+        with self.metrics.span('reparse', league=self.league_id):
+            with self.parse_stage():
+                jobs = []
+                for page in pages:
+                    content = archive.read(page['page_hash'])
+                    game = Game.from_dict(page['game'])
+                    jobs.append((page, game, self.submit_parse(content, page['game_id'], game)))
+                for page, game, future in jobs:
+                    entries, qs_update = self.collect_box_score_page(page['game_id'], game, (future, page['page_hash']))
+                    if qs_update:
+                        game.quarter_scores = qs_update[1]
+                    games.append(game)
+                    box_scores.extend(entries)
+
+        games_data = self.changed_rows('games', self.transform_games_data(games))
+        box_scores_data = self.changed_rows('box_scores', self.transform_box_scores_data(box_scores, games))
+        changed = {'games': len(games_data), 'box_scores': len(box_scores_data)}
+        if not dry_run:
+            planner = WritePlanner(max_workers=self.write_workers)
+            if games_data:
+                planner.add('games', games_data, self.tracked_writer('games', self.upsert_games))
+            if box_scores_data:
+                planner.add('box_scores', box_scores_data, self.tracked_writer('box_scores', self.upsert_box_scores),
+                            depends_on=['games'])
+            self.write_stats.update(planner.run())
+        logger.info(f"Reparsed {len(pages)} pages into {len(box_scores)} box score entries, "
+                    f"{'would write' if dry_run else 'wrote'} {changed['games']} games and "
+                    f"{changed['box_scores']} box score rows that changed")
+        return changed
+
     def parse_player_stats(self, soup, team_id, team_type, game_id):
         """Parse player statistics from the HTML table"""
         player_stats = []
@@ -351,19 +1110,16 @@ class BasketballBundCrawler:
             
             try:
                 # Extract player statistics
-                player_stat = {
-                    'game_id': game_id,  # Set the correct game_id immediately
-                    'team_id': team_id,
-                    'player_last_name': last_name_cell,
-                    'player_first_name': first_name_cell,
-                    'points': self.safe_int(cells[2].get_text(strip=True)),
-                    'free_throw_attempts': self.safe_int(cells[3].get_text(strip=True)),
-                    'free_throws_made': self.safe_int(cells[4].get_text(strip=True)),
-                    'two_pointers': self.safe_int(cells[5].get_text(strip=True)),
-                    'three_pointers': self.safe_int(cells[6].get_text(strip=True)),
-                    'fouls': self.safe_int(cells[7].get_text(strip=True)),
-                    'league_id': self.league_id
-                }
+                player_stat = BoxScoreEntry(
+                    game_id, team_id, last_name_cell, first_name_cell,
+                    points=self.safe_int(cells[2].get_text(strip=True)),
+                    free_throw_attempts=self.safe_int(cells[3].get_text(strip=True)),
+                    free_throws_made=self.safe_int(cells[4].get_text(strip=True)),
+                    two_pointers=self.safe_int(cells[5].get_text(strip=True)),
+                    three_pointers=self.safe_int(cells[6].get_text(strip=True)),
+                    fouls=self.safe_int(cells[7].get_text(strip=True)),
+                    league_id=self.league_id
+                )
                 
                 player_stats.append(player_stat)
                 
@@ -375,10 +1131,7 @@ class BasketballBundCrawler:
     
     def safe_int(self, value):
         """Safely convert string to integer, return 0 if conversion fails"""
-        try:
-            return int(value) if value and value.strip() else 0
-        except (ValueError, AttributeError):
-            return 0
+        return box_score_parser.safe_int(value)
     
     def extract_quarter_scores(self, soup, game_id):
         """Extract quarter scores from the HTML page"""
@@ -449,22 +1202,7 @@ class BasketballBundCrawler:
     
     def parse_score_pair(self, score_text, team):
         """Parse a score pair like '14 : 14' and return the specified team's score"""
-        try:
-            if not score_text or ':' not in score_text:
-                return None
-            
-            parts = score_text.split(':')
-            if len(parts) != 2:
-                return None
-            
-            home_score = self.safe_int(parts[0].strip())
-            away_score = self.safe_int(parts[1].strip())
-            
-            return home_score if team == 'home' else away_score
-            
-        except Exception as e:
-            logger.warning(f"Error parsing score pair '{score_text}': {e}")
-            return None
+        return box_score_parser.parse_score_pair(score_text, team)
     
     def extract_teams_from_data(self, standings, games):
         """Extract unique teams from standings and games"""
@@ -482,19 +1220,14 @@ class BasketballBundCrawler:
                 }
         
         # Extract teams from games (for any missing teams)
-        for game in games:
-            home_team = game.get('homeTeam', {})
-            guest_team = game.get('guestTeam', {})
-            
-            for team in [home_team, guest_team]:
-                if team:
-                    team_id = str(team.get('teamPermanentId', ''))
-                    if team_id not in teams:
-                        teams[team_id] = {
-                            'team_id': team_id,
-                            'name': team.get('teamname', ''),
-                            'league_id': self.league_id
-                        }
+        for game in map(as_game, games):
+            for team_id, name in ((game.home_team_id, game.home_team_name), (game.away_team_id, game.away_team_name)):
+                if (team_id or name) and team_id not in teams:
+                    teams[team_id] = {
+                        'team_id': team_id,
+                        'name': name,
+                        'league_id': self.league_id
+                    }
         
         return list(teams.values())
     
@@ -513,67 +1246,82 @@ class BasketballBundCrawler:
             raise
     
     def store_data(self, data):
-        """Store fetched data in Supabase with retry logic"""
+        """Store fetched data in Supabase with per-table checkpointed retries.
+
+        Every completely written table is checkpointed; a retry only
+        resumes the tables that failed or had not started yet.
+        """
         max_retries = 3
-        retry_delay = 10  # seconds
+        retry_delay = 5  # seconds
+        completed = set()
         
         for attempt in range(max_retries):
             try:
                 logger.info(f"Storing data in Supabase (attempt {attempt + 1}/{max_retries})")
-                
+                if attempt > 0:
+                    self.metrics.inc('store_retries_total', league=self.league_id)
+
+                # All or nothing in one round trip; None when the database
+                # has no ingest_crawl() yet, the tables are written below then
+                if self.ingest_mode == 'rpc' and self.ingest(data) is not None:
+                    logger.info("Successfully stored all data in Supabase")
+                    return True
+
                 # Test connectivity first
-                self.test_supabase_connection()
-                
-                # Store teams
-                if data['teams']:
-                    teams_result = self.supabase.table('teams').upsert(data['teams'], on_conflict='team_id').execute()
-                    logger.info(f"Stored {len(data['teams'])} teams")
+                if attempt == 0:
+                    self.test_supabase_connection()
+                elif completed:
+                    logger.info(f"Resuming after stored tables: {', '.join(sorted(completed))}")
                 
-                # Store games (transform API data to database format)
-                if data['games']:
-                    games_data = self.transform_games_data(data['games'])
-                    games_result = self.supabase.table('games').upsert(games_data, on_conflict='game_id').execute()
-                    logger.info(f"Stored {len(games_data)} games")
+                # Teams -> games -> box scores are written in dependency
+                # order, standings only wait for the teams
+                planner = WritePlanner(max_workers=self.write_workers)
 
-                    # Assign sequential tsv_game_number to any new Pitbulls games
-                    self.assign_tsv_game_numbers()
+                # Only inserted or changed rows are planned
+                if 'teams' not in completed:
+                    teams_data = self.changed_rows('teams', data['teams'])
+                    if teams_data:
+                        planner.add('teams', teams_data, self.tracked_writer('teams', self.upsert_teams))
 
-                # Store standings (transform API data to database format)
-                if data['standings']:
-                    standings_data = self.transform_standings_data(data['standings'])
-                    if self.season_id is not None:
-                        standings_result = self.supabase.table('standings').upsert(
-                            standings_data, on_conflict='season_id,team_id'
-                        ).execute()
-                    else:
-                        standings_result = self.supabase.table('standings').upsert(standings_data).execute()
-                    logger.info(f"Stored {len(standings_data)} standings entries")
+                # Store games (transform API data to database format)
+                if 'games' not in completed:
+                    games_data = self.changed_rows('games', self.transform_games_data(data['games']))
+                    if games_data:
+                        planner.add('games', games_data, self.tracked_writer('games', self.upsert_games),
+                                    depends_on=['teams'])
+
+                if 'standings' not in completed:
+                    standings_data = self.changed_rows('standings', self.transform_standings_data(data['standings']))
+                    if standings_data:
+                        planner.add('standings', standings_data,
+                                    self.tracked_writer('standings', self.upsert_standings), depends_on=['teams'])
 
                 # Store box scores (transform and store player statistics)
-                if data.get('box_scores'):
-                    box_scores_data = self.transform_box_scores_data(data['box_scores'], data['games'])
+                if 'box_scores' not in completed:
+                    box_scores_data = self.changed_rows(
+                        'box_scores', self.transform_box_scores_data(data.get('box_scores', []), data['games'])
+                    )
                     if box_scores_data:
-                        # Upsert on the per-player-per-game unique constraint.
-                        # minutes_played/seconds_played/player_slug are not part
-                        # of the payload, so manually maintained values survive
-                        # automatically — no delete+insert data-loss window.
-                        box_scores_result = self.supabase.table('box_scores').upsert(
-                            box_scores_data,
-                            on_conflict='game_id,team_id,player_first_name,player_last_name'
-                        ).execute()
-                        logger.info(f"Stored {len(box_scores_data)} box score entries")
+                        planner.add('box_scores', box_scores_data,
+                                    self.tracked_writer('box_scores', self.upsert_box_scores), depends_on=['games'])
+
+                try:
+                    with self.metrics.span('write_tables', league=self.league_id):
+                        self.write_stats.update(planner.run())
+                finally:
+                    completed |= planner.completed
+                # Tables without changed rows count as stored as well
+                completed |= {'teams', 'games', 'standings', 'box_scores'}
+                logger.info(f"Rows {self.change_detector.summary()}")
+
+                # Assign sequential tsv_game_number to any new Pitbulls games.
+                # Runs on every run, not only when games changed, so games a
+                # failed call left unnumbered get their number next time
+                if data['games']:
+                    self.assign_tsv_game_numbers()
                 
                 # Store scrape metadata
-                metadata = {
-                    'league_id': data['league_id'],
-                    'scraped_at': data['scraped_at'],
-                    'teams_count': len(data['teams']),
-                    'games_count': len(data['games']),
-                    'standings_count': len(data['standings']),
-                    'box_scores_count': len(data.get('box_scores', [])),
-                    'status': 'success'
-                }
-                metadata_result = self.supabase.table('scrape_log').insert(metadata).execute()
+                metadata_result = self.insert_scrape_log(self.scrape_log_metadata(data))
                 
                 logger.info("Successfully stored all data in Supabase")
                 return True
@@ -597,63 +1345,180 @@ class BasketballBundCrawler:
                             'status': 'failed',
                             'error_message': str(e)
                         }
-                        self.supabase.table('scrape_log').insert(failure_metadata).execute()
+                        self.insert_scrape_log(failure_metadata)
                     except:
                         pass  # If we can't even log the failure, just give up
                     raise
     
+    def scrape_log_metadata(self, data):
+        """scrape_log row of a successfully stored run"""
+        metadata = {
+            'league_id': data['league_id'],
+            'scraped_at': data['scraped_at'],
+            'teams_count': len(data['teams']),
+            'games_count': len(data['games']),
+            'standings_count': len(data['standings']),
+            'box_scores_count': len(data.get('box_scores', [])) + data.get('streamed_box_scores', 0),
+            'status': 'success'
+        }
+        if data.get('deferred_games'):
+            metadata['deferred_games'] = data['deferred_games']
+        return metadata
+
+    def with_metrics_summary(self, metadata):
+        """scrape_log row with the run's metrics summary"""
+        return dict(metadata, metrics=dict(self.metrics.summary(league=self.league_id), mode=self.run_mode))
+
+    def ingest(self, data):
+        """Store the run with one call of the ingest_crawl() DB function.
+
+        Teams, games, standings and box scores are upserted, new games get
+        their tsv_game_number and the scrape_log row is inserted in one
+        transaction. The database skips rows whose stored fingerprint is
+        unchanged, so no fingerprints are loaded beforehand. Returns the rows
+        written per table, None when the function does not exist (migration
+        20261017130000_ingest_crawl.sql); later calls then write table by
+        table.
+        """
+        tables = {
+            'teams': data['teams'],
+            'games': self.transform_games_data(data['games']),
+            'standings': self.transform_standings_data(data['standings']),
+            'box_scores': self.transform_box_scores_data(data.get('box_scores', []), data['games'])
+        }
+        tables = {table: self.change_detector.fingerprint(table, rows, ROW_KEYS[table]) for table, rows in tables.items()}
+        metadata = self.scrape_log_metadata(data)
+        payload = dict(
+            tables,
+            standings_conflict='season_id,team_id' if self.season_id is not None else None,
+            rewrite=not self.change_detector.enabled,
+            scrape_log=self.with_metrics_summary(metadata)
+        )
+
+        start = time.perf_counter()
+        try:
+            with self.metrics.span('ingest', league=self.league_id):
+                result = self.supabase.rpc('ingest_crawl', {'payload': payload}).execute()
+        except Exception as e:
+            if not any(marker in str(e) for marker in MISSING_FUNCTION_MARKERS):
+                self.metrics.inc('write_errors_total', table='ingest', league=self.league_id)
+                raise
+            logger.warning(f"ingest_crawl() not found, writing table by table (migration missing?): {e}")
+            self.ingest_mode = 'tables'
+            return None
+        finally:
+            self.metrics.observe('write_seconds', time.perf_counter() - start, table='ingest', league=self.league_id)
+
+        written = result.data if isinstance(result.data, dict) else {}
+        for table, rows in tables.items():
+            count = written.get(table, len(rows))
+            self.change_detector.mark_written(table, rows, ROW_KEYS[table], skipped=len(rows) - count)
+            self.metrics.inc('rows_written_total', count, table=table, league=self.league_id)
+        if written.get('tsv_game_numbers'):
+            logger.info(f"Assigned tsv_game_number to {written['tsv_game_numbers']} new games")
+        logger.info(f"Stored the run with ingest_crawl() in {time.perf_counter() - start:.2f}s: "
+                    f"rows {self.change_detector.summary()}")
+        self.update_scrape_log_metrics(metadata)
+        return written
+
+    def update_scrape_log_metrics(self, metadata):
+        """Replace the metrics of a stored scrape_log row with the current summary.
+
+        ingest_crawl() inserts the row built before the call; only afterwards
+        does the summary contain the rows written and the ingest phase. A
+        failure only loses these figures, the run itself is stored.
+        """
+        if 'metrics' in self.missing_columns.get('scrape_log', ()):
+            return
+        try:
+            self.supabase.table('scrape_log').update({'metrics': self.with_metrics_summary(metadata)['metrics']}) \
+                .eq('league_id', metadata['league_id']).eq('scraped_at', metadata['scraped_at']).execute()
+        except Exception as e:
+            logger.warning(f"Could not update the scrape_log metrics of the run: {e}")
+
+    def insert_scrape_log(self, metadata):
+        """Insert a scrape_log row with the run's metrics summary.
+
+        Databases without the scrape_log.metrics or deferred_games column
+        get the row without it instead of failing the run.
+        """
+        return self.write_optional('scrape_log', [self.with_metrics_summary(metadata)],
+                                   lambda rows: self.supabase.table('scrape_log').insert(rows[0]).execute())
+
+    def upsert_teams(self, teams):
+        """Upsert team rows"""
+        return self.write_optional('teams', teams,
+                                   lambda rows: self.supabase.table('teams').upsert(rows, on_conflict='team_id').execute())
+
+    def upsert_games(self, games_data):
+        """Upsert transformed game rows"""
+        return self.write_optional('games', games_data,
+                                   lambda rows: self.supabase.table('games').upsert(rows, on_conflict='game_id').execute())
+
+    def upsert_standings(self, standings_data):
+        """Upsert transformed standings rows"""
+        if self.season_id is not None:
+            return self.write_optional('standings', standings_data, lambda rows: self.supabase.table('standings')
+                                       .upsert(rows, on_conflict='season_id,team_id').execute())
+        return self.write_optional('standings', standings_data,
+                                   lambda rows: self.supabase.table('standings').upsert(rows).execute())
+
+    def upsert_box_scores(self, box_scores_data):
+        """Upsert transformed box score rows.
+
+        Upserts on the per-player-per-game unique constraint.
+        minutes_played/seconds_played/player_slug are not part of the
+        payload, so manually maintained values survive automatically — no
+        delete+insert data-loss window.
+        """
+        def upsert(rows):
+            return self.supabase.table('box_scores').upsert(
+                rows,
+                on_conflict='game_id,team_id,player_first_name,player_last_name'
+            ).execute()
+        return self.write_optional('box_scores', box_scores_data, upsert)
+
     def transform_games_data(self, games):
-        """Transform API games data to database format"""
+        """Transform games (records.Game, or API/spooled dicts) to database format"""
         transformed_games = []
         
-        for game in games:
+        for game in map(as_game, games):
             # Parse result if available
             home_score = None
             away_score = None
             status = 'scheduled'
             
-            result = game.get('result')
-            if result and ':' in result:
-                try:
-                    home_score, away_score = result.split(':')
-                    home_score = int(home_score.strip())
-                    away_score = int(away_score.strip())
-                    status = 'finished' if game.get('ergebnisbestaetigt', False) else 'provisional'
-                except ValueError:
-                    pass
+            scores = self.parse_result(game.result)
+            if scores:
+                home_score, away_score = scores
+                status = 'finished' if game.confirmed else 'provisional'
             
             # Cancellation wins over any result state. (The previous extra
             # branch here overrode 'provisional' with 'live', leaving games
             # stuck on 'live' until the league confirmed the result.)
-            if game.get('abgesagt', False):
+            if game.cancelled:
                 status = 'cancelled'
             
-            # Combine date and time
-            game_datetime = None
-            if game.get('kickoffDate') and game.get('kickoffTime'):
-                game_datetime = f"{game['kickoffDate']} {game['kickoffTime']}"
-            
             # Generate box score URL for finished games
             box_score_url = None
-            if result and ':' in result:
-                game_id = str(game.get('matchId', ''))
-                if game_id:
-                    box_score_url = f"{self.box_score_base_url}?type=1&spielplan_id={game_id}&liga_id={self.league_id}&defaultview=1"
+            if game.has_result and game.game_id:
+                box_score_url = self.box_score_url(game.game_id)
             
             transformed_game = {
-                'game_id': str(game.get('matchId', '')),
-                'home_team_id': str(game.get('homeTeam', {}).get('teamPermanentId', '')),
-                'away_team_id': str(game.get('guestTeam', {}).get('teamPermanentId', '')),
-                'home_team_name': game.get('homeTeam', {}).get('teamname', ''),
-                'away_team_name': game.get('guestTeam', {}).get('teamname', ''),
-                'game_date': game.get('kickoffDate'),
-                'game_time': game.get('kickoffTime'),
+                'game_id': game.game_id,
+                'home_team_id': game.home_team_id,
+                'away_team_id': game.away_team_id,
+                'home_team_name': game.home_team_name,
+                'away_team_name': game.away_team_name,
+                'game_date': game.kickoff_date,
+                'game_time': game.kickoff_time,
                 'home_score': home_score,
                 'away_score': away_score,
                 'status': status,
                 'league_id': self.league_id,
                 'box_score_url': box_score_url,
-                'quarter_scores': game.get('quarter_scores')
+                'box_score_hash': game.box_score_hash,
+                'quarter_scores': game.quarter_scores
             }
             if self.season_id is not None:
                 transformed_game['season_id'] = self.season_id
@@ -665,6 +1530,7 @@ class BasketballBundCrawler:
     def transform_standings_data(self, standings):
         """Transform API standings data to database format"""
         transformed_standings = []
+        scraped_at = datetime.now(timezone.utc).isoformat()
         
         for entry in standings:
             team = entry.get('team', {})
@@ -681,7 +1547,7 @@ class BasketballBundCrawler:
                 'points_for': entry.get('koerbe', 0),
                 'points_against': entry.get('gegenKoerbe', 0),
                 'scoring_difference': entry.get('korbdiff', 0),
-                'scraped_at': datetime.now(timezone.utc).isoformat()
+                'scraped_at': scraped_at
             }
             if self.season_id is not None:
                 transformed_standing['season_id'] = self.season_id
@@ -691,12 +1557,17 @@ class BasketballBundCrawler:
         return transformed_standings
     
     def transform_box_scores_data(self, box_scores, games):
-        """Transform box scores data to database format"""
+        """Transform box score entries (records.BoxScoreEntry, or spooled dicts) to database format.
+
+        This is where the entries become dicts; all rows share one
+        scraped_at string.
+        """
         dedup = {}
+        scraped_at = datetime.now(timezone.utc).isoformat()
 
-        for box_score in box_scores:
+        for box_score in map(as_entry, box_scores):
             # game_id is already correctly set during parsing
-            game_id = box_score.get('game_id', '')
+            game_id = box_score.game_id
             
             if not game_id:
                 logger.warning(f"Box score entry missing game_id")
@@ -704,17 +1575,17 @@ class BasketballBundCrawler:
             
             transformed_box_score = {
                 'game_id': game_id,
-                'team_id': box_score.get('team_id', ''),
-                'player_last_name': box_score.get('player_last_name', ''),
-                'player_first_name': box_score.get('player_first_name', ''),
-                'points': box_score.get('points', 0),
-                'free_throw_attempts': box_score.get('free_throw_attempts', 0),
-                'free_throws_made': box_score.get('free_throws_made', 0),
-                'two_pointers': box_score.get('two_pointers', 0),
-                'three_pointers': box_score.get('three_pointers', 0),
-                'fouls': box_score.get('fouls', 0),
+                'team_id': box_score.team_id,
+                'player_last_name': box_score.player_last_name,
+                'player_first_name': box_score.player_first_name,
+                'points': box_score.points,
+                'free_throw_attempts': box_score.free_throw_attempts,
+                'free_throws_made': box_score.free_throws_made,
+                'two_pointers': box_score.two_pointers,
+                'three_pointers': box_score.three_pointers,
+                'fouls': box_score.fouls,
                 'league_id': self.league_id,
-                'scraped_at': datetime.now(timezone.utc).isoformat()
+                'scraped_at': scraped_at
             }
             if self.season_id is not None:
                 transformed_box_score['season_id'] = self.season_id
@@ -732,30 +1603,243 @@ class BasketballBundCrawler:
     def assign_tsv_game_numbers(self):
         """Assign tsv_game_number to new Pitbulls games via DB function"""
         try:
-            result = self.supabase.rpc('assign_tsv_game_numbers').execute()
+            with TSV_NUMBERING_LOCK:
+                result = self.supabase.rpc('assign_tsv_game_numbers').execute()
             assigned = result.data if isinstance(result.data, int) else 0
             if assigned:
                 logger.info(f"Assigned tsv_game_number to {assigned} new games")
         except Exception as e:
             logger.warning(f"Could not assign tsv game numbers (DB function missing?): {e}")
 
+    def log_transport_stats(self):
+        """Log connection reuse and transfer size of this run"""
+        stats = self.transport.stats()
+        logger.info(
+            f"HTTP transport: {stats['requests']} requests over {stats['connections_opened']} connections, "
+            f"{stats['bytes_received'] / 1024:.1f} KiB received ({stats['bytes_decoded'] / 1024:.1f} KiB decoded)"
+        )
+        limits = self.rate_limiter.stats()
+        logger.info(
+            f"Rate limiter: {limits['rate']:.2f} requests/s at the end, {limits['throttled']} throttled responses, "
+            f"waited {limits['total_wait']:.1f}s in total (avg {limits['avg_wait']:.2f}s, max {limits['max_wait']:.2f}s)"
+        )
+        if self.transport.breaker is not None:
+            breaker = self.transport.breaker.stats()
+            hedged = self.metrics.counter('http_hedged_total', result='sent')
+            logger.info(
+                f"Circuit breaker: {breaker['state']} at the end, tripped {breaker['trips']} times, "
+                f"{breaker['rejected']} requests rejected; {hedged} requests hedged "
+                f"({self.metrics.counter('http_hedged_total', result='won')} won by the hedge)"
+            )
+        if self.transport.cache is not None:
+            cache = self.transport.cache.stats()
+            logger.info(
+                f"HTTP cache: {cache['hits']} hits, {cache['revalidated']} revalidated, {cache['misses']} misses, "
+                f"{cache['entries']} entries ({cache['bytes'] / 1024:.1f} KiB, {cache['evicted']} evicted)"
+            )
+
     def run(self):
         """Main execution method"""
         logger.info("Starting BasketballBund crawler")
         
         try:
-            # Fetch data from website
-            data = self.fetch_league_data()
+            # Resume from the spool of a failed attempt, fetch otherwise
+            data = None
+            if self.spool_path:
+                data = load_spool(self.spool_path, self.league_id, self.season_id)
+
+            if data is None:
+                # Fetch data from website
+                with self.metrics.span('fetch', league=self.league_id):
+                    data = self.fetch_league_data()
+                if self.spool_path:
+                    save_spool(self.spool_path, data, self.season_id)
             
             # Store data in Supabase
-            self.store_data(data)
+            with self.metrics.span('store', league=self.league_id):
+                self.store_data(data)
+            if self.spool_path:
+                discard_spool(self.spool_path)
             
             logger.info("Crawler execution completed successfully")
+            self.log_transport_stats()
             
         except Exception as e:
             logger.error(f"Crawler execution failed: {e}")
             raise
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BasketballBund crawler")
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default='async',
+                        help="box score fetch engine (default: async, sync is the sequential fallback)")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="maximum box score pages in flight for the async engine (default: 4)")
+    parser.add_argument('--request-interval', type=float, default=0.5,
+                        help="seconds between box score request starts (default: 0.5); the adaptive rate "
+                             "limiter may narrow it down to --request-interval-floor")
+    parser.add_argument('--request-interval-floor', type=float, default=None,
+                        help="shortest interval the adaptive rate limiter may reach (default: half of --request-interval)")
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help="keep --request-interval fixed instead of adapting it to the server's responses")
+    parser.add_argument('--breaker-failures', metavar='N', type=int, default=5,
+                        help="open the circuit breaker after N failed or slow requests in a row, deferring the "
+                             "box scores left while it is open; 0 turns it off (default: 5)")
+    parser.add_argument('--breaker-cooldown', metavar='DURATION', type=parse_duration, default=60.0,
+                        help="time the open breaker rejects requests before it lets a probe through (default: 60s)")
+    parser.add_argument('--slow-request', metavar='DURATION', type=parse_duration, default=10.0,
+                        help="requests slower than DURATION count as failures for the breaker (default: 10s)")
+    parser.add_argument('--hedge-after', metavar='DURATION', type=parse_duration, default=None,
+                        help="send a box score request a second time when it is not answered after the 95th "
+                             "latency percentile, at least DURATION (default: no hedged requests)")
+    parser.add_argument('--parser', choices=PARSER_ENGINES, default='fast',
+                        help="box score page parser (default: fast single-pass parser, soup is the BeautifulSoup original)")
+    parser.add_argument('--parser-backend', choices=box_score_parser.BACKENDS, default=None,
+                        help="tokenizer of the fast parser (default: html.parser, identical to soup on every page; "
+                             "lxml is faster but repairs malformed markup)")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="box score parser processes (default: one per available core)")
+    parser.add_argument('--inline-parse', action='store_true',
+                        help="parse box score pages in the fetching process (debugging)")
+    parser.add_argument('--stream', type=int, default=0, metavar='CHUNK_SIZE', dest='stream_chunk_size',
+                        help="upsert box scores in chunks of CHUNK_SIZE entries while crawling (default: 0, write at the end)")
+    parser.add_argument('--write-workers', type=int, default=4,
+                        help="concurrent Supabase write requests in store_data (default: 4)")
+    parser.add_argument('--write-all', action='store_true',
+                        help="upsert every row instead of only inserted or changed rows")
+    parser.add_argument('--ingest', choices=INGEST_MODES, default='tables', dest='ingest_mode',
+                        help="'rpc' stores a run in one transaction with the ingest_crawl() DB function "
+                             "(default: tables, written one by one)")
+    parser.add_argument('--spool', metavar='PATH', dest='spool_path',
+                        help="keep the fetched data in PATH until it is stored; a rerun resumes from it without refetching")
+    parser.add_argument('--season', action='append', default=[], dest='seasons', metavar='NAME',
+                        help="crawl this season from the seasons table (repeatable) instead of the current one")
+    parser.add_argument('--league', action='append', default=[], dest='leagues', metavar='ID',
+                        help="crawl this league id (repeatable), e.g. youth or cup competitions")
+    parser.add_argument('--parallel-leagues', type=int, default=2,
+                        help="leagues crawled at the same time with --season/--league (default: 2)")
+    parser.add_argument('--base-url', default=None,
+                        help="basketball-bund.net base URL, e.g. a local replay_server.py (default: BASKETBALL_BUND_URL or the live site)")
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help="record all basketball-bund.net responses to CASSETTE (.json or .json.gz) for replay_server.py")
+    parser.add_argument('--http-cache', metavar='DIR', default='.http-cache',
+                        help="cache REST responses in DIR between runs (default: .http-cache)")
+    parser.add_argument('--no-http-cache', action='store_true',
+                        help="always download the REST responses")
+    parser.add_argument('--cache-ttl', action='append', default=[], metavar='ENDPOINT=DURATION', type=parse_ttl_option,
+                        help="freshness of an endpoint's cached responses, e.g. competition/list=14d or spielplan=0 "
+                             "(repeatable; default: competition/list=7d, table=10m, spielplan=5m)")
+    parser.add_argument('--cache-max-mb', type=float, default=50,
+                        help="size bound of the HTTP cache, least recently used responses are evicted (default: 50)")
+    parser.add_argument('--archive', metavar='DIR', default='page-archive',
+                        help="keep every fetched box score page compressed in DIR for reparse.py (default: page-archive)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="do not archive box score pages")
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="write the run's spans, histograms and counters as JSON to PATH")
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help="write the run's metrics as a Prometheus textfile to PATH (node_exporter textfile collector)")
+    parser.add_argument('--profile', action='store_true',
+                        help="sample a CPU profile (collapsed stacks) and per-phase tracemalloc allocations")
+    parser.add_argument('--profile-dir', metavar='DIR', default=None,
+                        help="directory for the profile files (default: next to --metrics-json/--metrics-prom, else .)")
+    parser.add_argument('--profile-interval', type=float, default=0.005,
+                        help="seconds between stack samples (default: 0.005)")
+    parser.add_argument('--profile-alloc-frames', type=int, default=1,
+                        help="traceback depth of allocation tracking, 0 turns it off (default: 1)")
+    parser.add_argument('--full', action='store_true',
+                        help="refetch every box score instead of skipping already-final games")
+    parser.add_argument('--time-budget', metavar='DURATION', type=parse_duration, default=None,
+                        help="start no box score fetch after DURATION (e.g. 30m); the games left are fetched "
+                             "first by the next run (default: no limit)")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and store each game's result and box score as soon as it appears")
+    parser.add_argument('--watch-for', metavar='DURATION', type=parse_duration, default=None,
+                        help="end the watch after DURATION, or as soon as no game window opens before then "
+                             "(default: run until stopped)")
+    parser.add_argument('--poll-interval', metavar='DURATION', type=parse_duration, default='2m',
+                        help="spielplan poll interval while a game is in its window (default: 2m)")
+    parser.add_argument('--window-start', metavar='DURATION', type=parse_duration, default='90m',
+                        help="start watching a game this long after its kickoff (default: 90m)")
+    parser.add_argument('--window-end', metavar='DURATION', type=parse_duration, default='5h',
+                        help="stop watching a game without result this long after its kickoff (default: 5h)")
+    parser.add_argument('--schedule-refresh', metavar='DURATION', type=parse_duration, default='6h',
+                        help="reread the spielplan at least this often between windows (default: 6h)")
+    args = parser.parse_args(argv)
+    if args.watch and (args.seasons or args.leagues):
+        parser.error("--watch watches the current season, it cannot be combined with --season/--league")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    crawler = BasketballBundCrawler(
+        fetch_mode=args.fetch_mode,
+        max_concurrency=args.concurrency,
+        request_interval=args.request_interval,
+        full_crawl=args.full,
+        parser_engine=args.parser,
+        parser_backend=args.parser_backend,
+        parse_workers=0 if args.inline_parse else args.parse_workers,
+        stream_chunk_size=args.stream_chunk_size,
+        write_workers=args.write_workers,
+        diff_writes=not args.write_all,
+        spool_path=args.spool_path,
+        adaptive_rate=not args.fixed_rate,
+        request_interval_floor=args.request_interval_floor,
+        base_url=args.base_url,
+        time_budget=args.time_budget,
+        breaker_failures=args.breaker_failures,
+        breaker_cooldown=args.breaker_cooldown,
+        slow_request=args.slow_request,
+        hedge_after=args.hedge_after,
+        ingest_mode=args.ingest_mode
+    )
+    if args.record:
+        crawler.transport.recorder = Cassette()
+    if not args.no_http_cache:
+        # The watch polls for new results and standings, explicit --cache-ttl options still win
+        ttl_overrides = ([('spielplan', 0), ('table', 0)] if args.watch else []) + args.cache_ttl
+        crawler.transport.cache = HttpCache(args.http_cache, ttls=merge_ttls(ttl_overrides),
+                                            max_bytes=int(args.cache_max_mb * 1024 * 1024))
+    if not args.no_archive:
+        crawler.page_archive = PageArchive(args.archive)
+    profiler = None
+    if args.profile:
+        profiler = Profiler(interval=args.profile_interval, alloc_frames=args.profile_alloc_frames)
+        crawler.metrics.observers.append(profiler)
+        if crawler.parse_workers and args.parser == 'fast':
+            logger.info("Box score pages parsed in worker processes are not profiled, add --inline-parse to include them")
+        profiler.start()
+    try:
+        if args.watch:
+            GameDayWatcher(crawler, poll_interval=args.poll_interval, window_start=args.window_start,
+                           window_end=args.window_end, refresh_interval=args.schedule_refresh).run(args.watch_for)
+            crawler.log_transport_stats()
+        elif args.seasons or args.leagues:
+            targets = resolve_targets(crawler.supabase, args.seasons, args.leagues)
+            MultiLeagueCrawler(crawler, targets, max_parallel=args.parallel_leagues).run()
+        else:
+            crawler.run()
+    finally:
+        if crawler.transport.cache is not None:
+            crawler.transport.cache.close()
+        if crawler.page_archive is not None:
+            archived = crawler.page_archive.stats()
+            logger.info(f"Page archive {args.archive}: {archived['pages_added']} new pages "
+                        f"({archived['bytes_added'] / 1024:.1f} KiB compressed), {archived['pages']} pages in total")
+            crawler.page_archive.close()
+        if args.record:
+            crawler.transport.recorder.save(args.record)
+            logger.info(f"Recorded {len(crawler.transport.recorder)} responses to {args.record}")
+        if args.metrics_json:
+            crawler.metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            crawler.metrics.write_prometheus(args.metrics_prom)
+        if profiler is not None:
+            profiler.stop()
+            metrics_path = args.metrics_json or args.metrics_prom
+            profile_dir = args.profile_dir or (os.path.dirname(os.path.abspath(metrics_path)) if metrics_path else '.')
+            profiler.write(profile_dir, prefix=f"profile-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}")
+    return 0
+
 if __name__ == "__main__":
-    crawler = BasketballBundCrawler()
-    crawler.run()
+    sys.exit(main())
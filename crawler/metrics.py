@@ -0,0 +1,303 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Upper bounds in seconds, covering fast local parses up to slow page loads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+METRIC_PREFIX = 'crawler_'
+
+
+def label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+class Histogram:
+    """Fixed-bucket histogram, Prometheus style"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q):
+        """Estimated q-quantile, interpolated inside the bucket it falls in"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound if bound != float('inf') else lower
+        return lower
+
+
+class Metrics:
+    """Counters, histograms and timing spans of a crawler run.
+
+    Thread-safe and shared like the rate limiter: crawlers derived with
+    for_season() and the HTTP transport report into the same registry,
+    crawler metrics carry a league label. Exported as JSON (snapshot) or
+    as a Prometheus textfile; summary() is the compact per-league form
+    stored in scrape_log.metrics. Observers (e.g. the profiler) are told
+    when a span starts and finishes, outside of its measured time.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.counters = {}
+        self.histograms = {}
+        self.spans = []
+        self.observers = []
+
+    def inc(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time a phase; failed phases are recorded with error=True"""
+        labels = dict(label_key(labels))
+        for observer in self.observers:
+            observer.span_started(name, labels)
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    'name': name,
+                    'labels': labels,
+                    'start': round(start - self.started, 6),
+                    'seconds': round(end - start, 6),
+                    'error': error
+                })
+            for observer in self.observers:
+                observer.span_finished(name, labels)
+
+    def counter(self, name, **labels):
+        """Sum of a counter over all label sets matching labels"""
+        wanted = set(label_key(labels))
+        with self._lock:
+            return sum(value for (counter, key), value in self.counters.items()
+                       if counter == name and wanted <= set(key))
+
+    def histogram(self, name, **labels):
+        """Merged histogram over all label sets matching labels"""
+        wanted = set(label_key(labels))
+        merged = Histogram()
+        with self._lock:
+            for (histogram, key), values in self.histograms.items():
+                if histogram == name and wanted <= set(key):
+                    if merged.buckets != values.buckets:
+                        merged = Histogram(values.buckets)
+                    merged.merge(values)
+        return merged
+
+    def phase_seconds(self, **labels):
+        """{span name: total seconds} of the spans matching labels"""
+        wanted = set(label_key(labels))
+        phases = {}
+        with self._lock:
+            for span in self.spans:
+                if wanted <= set(span['labels'].items()):
+                    phases[span['name']] = phases.get(span['name'], 0.0) + span['seconds']
+        return phases
+
+    def summary(self, league=None):
+        """Compact summary of one league's run for scrape_log.metrics.
+
+        HTTP figures come from the shared transport and cover every league
+        crawled by this process.
+        """
+        requests = self.histogram('http_request_seconds')
+        parses = self.histogram('parse_seconds', league=league)
+        p50, p95 = requests.quantile(0.5), requests.quantile(0.95)
+        rows = {}
+        with self._lock:
+            for (name, key), value in self.counters.items():
+                labels = dict(key)
+                if name == 'rows_written_total' and (league is None or labels.get('league') == str(league)):
+                    rows[labels['table']] = rows.get(labels['table'], 0) + value
+        return {
+            'phases': {name: round(seconds, 3) for name, seconds in self.phase_seconds(league=league).items()},
+            'http': {
+                'requests': requests.count,
+                'bytes': self.counter('http_bytes_received_total'),
+                'p50_ms': None if p50 is None else round(p50 * 1000, 1),
+                'p95_ms': None if p95 is None else round(p95 * 1000, 1),
+                'throttled': self.counter('http_throttled_total'),
+                'errors': self.counter('http_errors_total'),
+                'hedged': self.counter('http_hedged_total', result='sent'),
+                'hedges_won': self.counter('http_hedged_total', result='won')
+            },
+            'breaker': {
+                'trips': self.counter('circuit_breaker_transitions_total', state='open'),
+                'rejected': self.counter('circuit_breaker_rejected_total')
+            },
+            'deferred': self.counter('box_scores_deferred_total', league=league),
+            'parse': {
+                'pages': parses.count,
+                'avg_ms': round(parses.sum / parses.count * 1000, 2) if parses.count else None
+            },
+            'rows': rows,
+            'retries': self.counter('store_retries_total', league=league)
+        }
+
+    def snapshot(self):
+        """All metrics as a JSON-serialisable dict"""
+        with self._lock:
+            return {
+                'started_at': self.started_at,
+                'seconds': round(time.perf_counter() - self.started, 6),
+                'counters': [
+                    {'name': name, 'labels': dict(key), 'value': value}
+                    for (name, key), value in sorted(self.counters.items())
+                ],
+                'histograms': [
+                    {
+                        'name': name, 'labels': dict(key), 'count': histogram.count, 'sum': histogram.sum,
+                        'buckets': {format_bound(bound): count for bound, count in zip(histogram.buckets, histogram.counts)}
+                    }
+                    for (name, key), histogram in sorted(self.histograms.items())
+                ],
+                'spans': list(self.spans)
+            }
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+            spans = list(self.spans)
+
+        typed = set()
+        for (name, key), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{format_labels(key)} {value}")
+
+        for (name, key), histogram in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{format_labels(key + (('le', format_bound(bound)),))} {cumulative}")
+            lines.append(f"{metric}_sum{format_labels(key)} {histogram.sum}")
+            lines.append(f"{metric}_count{format_labels(key)} {histogram.count}")
+
+        phases = {}
+        for span in spans:
+            key = label_key(dict(span['labels'], phase=span['name']))
+            phases[key] = phases.get(key, 0.0) + span['seconds']
+        if phases:
+            lines.append(f"# TYPE {METRIC_PREFIX}phase_seconds gauge")
+            for key, seconds in sorted(phases.items()):
+                lines.append(f"{METRIC_PREFIX}phase_seconds{format_labels(key)} {seconds:.6f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.snapshot(), indent=2))
+
+    def write_prometheus(self, path):
+        # node_exporter's textfile collector must never see a partial file
+        write_atomic(path, self.prometheus())
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else f"{bound:g}"
+
+
+def format_labels(key):
+    if not key:
+        return ''
+    escaped = (
+        f'{name}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in key
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def write_atomic(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def metrics_trends(summaries):
+    """Trend lines for health_check.py from scrape_log.metrics, newest first.
+
+    Compares the newest run with the median of the earlier ones, per phase
+    and for the request latency. Rows of watch mode writes are left out.
+    """
+    summaries = [summary for summary in summaries if summary and summary.get('mode', 'crawl') == 'crawl']
+    if len(summaries) < 2:
+        return []
+
+    def median(values):
+        values = sorted(values)
+        middle = len(values) // 2
+        return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+    latest, earlier = summaries[0], summaries[1:]
+    series = {f"{phase} s": lambda s, phase=phase: (s.get('phases') or {}).get(phase)
+              for phase in (latest.get('phases') or {})}
+    series['http p95 ms'] = lambda s: (s.get('http') or {}).get('p95_ms')
+    series['parse avg ms'] = lambda s: (s.get('parse') or {}).get('avg_ms')
+
+    lines = []
+    for name, value_of in series.items():
+        current = value_of(latest)
+        history = [value for value in map(value_of, earlier) if value is not None]
+        if current is None or not history:
+            continue
+        typical = median(history)
+        change = f"{(current - typical) / typical:+.0%}" if typical else "n/a"
+        lines.append(f"{name}: {current:g} (median of {len(history)} earlier runs {typical:g}, {change})")
+    return lines
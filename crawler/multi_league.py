@@ -0,0 +1,99 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_targets(supabase, season_names=(), league_ids=()):
+    """Season rows to crawl for the given season names and league ids.
+
+    A league id is matched with its most recent season row; leagues without
+    one (e.g. cup competitions) are crawled as {'league_id': ...} without a
+    season_id.
+    """
+    targets = []
+    if season_names:
+        result = supabase.table('seasons').select('*').in_('name', list(season_names)).execute()
+        by_name = {row['name']: row for row in result.data or []}
+        missing = [name for name in season_names if name not in by_name]
+        if missing:
+            raise ValueError(f"Unknown seasons: {', '.join(missing)}")
+        targets.extend(by_name[name] for name in season_names)
+
+    if league_ids:
+        result = supabase.table('seasons').select('*').in_('league_id', [str(i) for i in league_ids]).execute()
+        latest = {}
+        for row in result.data or []:
+            known = latest.get(row['league_id'])
+            if known is None or str(row.get('start_date')) > str(known.get('start_date')):
+                latest[row['league_id']] = row
+        targets.extend(latest.get(str(league_id), {'league_id': str(league_id)}) for league_id in league_ids)
+
+    # The same league twice would race on its own rows
+    unique = {}
+    for target in targets:
+        unique.setdefault((str(target['league_id']), target.get('id')), target)
+    return list(unique.values())
+
+
+def target_label(target):
+    """'league_id' or 'league_id/season_id' of a target"""
+    if target.get('id') is None:
+        return str(target['league_id'])
+    return f"{target['league_id']}/{target['id']}"
+
+
+def spool_path_for(spool_path, target):
+    """Per-target spool file next to the given one"""
+    if not spool_path:
+        return None
+    root, ext = os.path.splitext(spool_path)
+    return f"{root}.{target_label(target).replace('/', '-')}{ext or '.json'}"
+
+
+class MultiLeagueCrawler:
+    """Crawl several leagues/seasons concurrently in one process.
+
+    One crawler per target is derived from the base crawler with
+    for_season(), so all of them share the Supabase client, the pooled HTTP
+    transport, the rate budget and one parse process pool, while each
+    league keeps its own fetch state, writes and scrape_log entry. A league
+    that fails does not stop the others; run() raises once all are done.
+    """
+    def __init__(self, base, targets, max_parallel=2):
+        self.base = base
+        self.max_parallel = max(1, int(max_parallel))
+        self.crawlers = [
+            (target_label(target), base.for_season(target, spool_path=spool_path_for(base.spool_path, target)))
+            for target in targets
+        ]
+
+    def run(self):
+        """Run all crawlers, raises RuntimeError naming the failed leagues"""
+        logger.info(f"Crawling {len(self.crawlers)} leagues, {self.max_parallel} at a time")
+        parse_pool = None
+        if self.base.parse_workers > 0 and self.base.parser_engine == 'fast':
+            parse_pool = ProcessPoolExecutor(max_workers=self.base.parse_workers)
+            for _, crawler in self.crawlers:
+                crawler.parse_pool = parse_pool
+
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel) as pool:
+                futures = [(label, pool.submit(crawler.run)) for label, crawler in self.crawlers]
+                for label, future in futures:
+                    error = future.exception()
+                    results[label] = error
+                    if error is None:
+                        logger.info(f"League {label}: stored")
+                    else:
+                        logger.error(f"League {label}: failed: {error}")
+        finally:
+            if parse_pool is not None:
+                parse_pool.shutdown()
+
+        failed = [label for label, error in results.items() if error is not None]
+        if failed:
+            raise RuntimeError(f"Crawl failed for leagues: {', '.join(failed)}")
+        return results
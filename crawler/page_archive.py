@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fields the crawler derives from the page or the stored row; the archive
+# keeps the game as the spielplan reported it
+DERIVED_GAME_KEYS = ('quarter_scores', 'box_score_hash')
+
+
+class PageArchive:
+    """Compressed, content-addressed archive of fetched box score pages.
+
+    Every page is stored once, gzip-compressed under its sha256 (the same
+    hash as games.box_score_hash) in objects/<2 hex>/<sha256>.html.gz, so
+    unchanged refetches cost an index row and no space. index.sqlite
+    records each fetch with game id, league, season, fetch time and the
+    spielplan game the page belongs to, which is all the parser needs to
+    rebuild the rows offline (see reparse.py).
+    """
+    def __init__(self, directory='page-archive'):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False,
+                                  isolation_level=None)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS fetches (
+                game_id TEXT NOT NULL,
+                league_id TEXT NOT NULL,
+                season_id TEXT,
+                page_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                game TEXT NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS fetches_game ON fetches (league_id, game_id, fetched_at)")
+        self._lock = threading.Lock()
+        self.pages_added = 0
+        self.bytes_added = 0
+
+    def object_path(self, page_hash):
+        return os.path.join(self.directory, 'objects', page_hash[:2], f"{page_hash}.html.gz")
+
+    def add(self, game_id, league_id, season_id, game, content, page_hash=None):
+        """Archive one fetched page of a records.Game, returns its hash"""
+        page_hash = page_hash or hashlib.sha256(content).hexdigest()
+        path = self.object_path(page_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Unique temporary name: two leagues may fetch the same page at once
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.GzipFile(tmp_path, 'wb', mtime=0) as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.pages_added += 1
+                self.bytes_added += os.path.getsize(path)
+
+        game = {key: value for key, value in game.to_dict().items() if key not in DERIVED_GAME_KEYS}
+        with self._lock:
+            self.db.execute(
+                "INSERT INTO fetches (game_id, league_id, season_id, page_hash, fetched_at, game) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(game_id), str(league_id), None if season_id is None else str(season_id), page_hash,
+                 time.time(), json.dumps(game, ensure_ascii=False))
+            )
+        return page_hash
+
+    def read(self, page_hash):
+        """Raw bytes of an archived page"""
+        with gzip.open(self.object_path(page_hash), 'rb') as f:
+            return f.read()
+
+    def latest(self, league_id, season_id=None, game_ids=None):
+        """[{game_id, page_hash, fetched_at, game}] of the newest fetch per game of a league/season.
+
+        game is the Game.to_dict() of the fetch.
+        """
+        query = ("SELECT game_id, page_hash, MAX(fetched_at), game FROM fetches "
+                 "WHERE league_id = ? AND season_id IS ?")
+        params = [str(league_id), None if season_id is None else str(season_id)]
+        if game_ids:
+            query += f" AND game_id IN ({', '.join('?' * len(game_ids))})"
+            params.extend(str(game_id) for game_id in game_ids)
+        query += " GROUP BY game_id ORDER BY game_id"
+        with self._lock:
+            rows = self.db.execute(query, params).fetchall()
+        # SQLite returns the other columns of the row holding the MAX()
+        return [
+            {'game_id': game_id, 'page_hash': page_hash, 'fetched_at': fetched_at, 'game': json.loads(game)}
+            for game_id, page_hash, fetched_at, game in rows
+        ]
+
+    def history(self, game_id):
+        """[(fetched_at, page_hash)] of every fetch of a game, oldest first"""
+        with self._lock:
+            return self.db.execute(
+                "SELECT fetched_at, page_hash FROM fetches WHERE game_id = ? ORDER BY fetched_at", (str(game_id),)
+            ).fetchall()
+
+    def stats(self):
+        with self._lock:
+            fetches, games, pages = self.db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT game_id), COUNT(DISTINCT page_hash) FROM fetches"
+            ).fetchone()
+            return {'fetches': fetches, 'games': games, 'pages': pages,
+                    'pages_added': self.pages_added, 'bytes_added': self.bytes_added}
+
+    def close(self):
+        self.db.close()
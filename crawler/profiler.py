@@ -0,0 +1,188 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Phase of samples taken outside any metrics span
+NO_PHASE = 'other'
+
+# Innermost frames of threads waiting on locks, queues, sockets or the event
+# loop; they are sampled but not reported as hot functions
+IDLE_FRAMES = ('threading.py:', 'queue.py:', 'selectors.py:', 'socket.py:', 'ssl.py:',
+               'thread.py:_worker', 'sync.py:SyncStream.read')
+
+
+def frame_label(frame):
+    """'file.py:Class.function' of a frame, safe for collapsed stacks"""
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}".replace(';', ':').replace(' ', '_')
+
+
+class Profiler:
+    """Sampling CPU profiler and per-phase allocation tracker for a run.
+
+    A background thread samples the stacks of all threads every interval
+    seconds (wall clock, so waits on the network show up as well) and
+    attributes each to the innermost metrics span open in its own thread,
+    so the cost stays bounded however hot the code is and leagues crawled
+    in parallel threads keep their samples apart. Threads without spans of
+    their own (worker pools) get the innermost span only while a single
+    thread has spans open, NO_PHASE otherwise. Samples inside the profiler's own
+    snapshot work are counted as overhead instead. Attached as an observer of
+    the run's Metrics, it also takes a tracemalloc snapshot around every
+    span and reports the phase's peak traced memory and top allocation
+    sites (alloc_frames=0 turns allocation tracking off).
+
+    Box score pages parsed in the process pool are not sampled; profile
+    with parse_workers=0 (--inline-parse) to see the parser.
+    """
+    def __init__(self, interval=0.005, alloc_frames=1, top=15):
+        self.interval = interval
+        self.alloc_frames = max(0, int(alloc_frames))
+        self.top = top
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.thread = None
+        self.samples = Counter()
+        self.sample_count = 0
+        self.overhead_samples = 0
+        # Open spans per thread ident, innermost last
+        self.open_spans = {}
+        self.allocations = []
+        self.started_tracemalloc = False
+
+    def start(self):
+        if self.alloc_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(self.alloc_frames)
+            self.started_tracemalloc = True
+        self.thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                phases = {ident: spans[-1]['phase'] for ident, spans in self.open_spans.items() if spans}
+                shared_phase = next(iter(phases.values())) if len(phases) == 1 else NO_PHASE
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    phase = phases.get(ident, shared_phase)
+                    stack = []
+                    while frame is not None:
+                        stack.append(frame_label(frame))
+                        frame = frame.f_back
+                    if any(label.startswith('profiler.py:') for label in stack):
+                        self.overhead_samples += 1
+                        continue
+                    thread = names.get(ident, str(ident)).replace(';', ':').replace(' ', '_')
+                    self.samples[';'.join([phase, thread] + stack[::-1])] += 1
+                self.sample_count += 1
+
+    # Metrics observer interface
+
+    def span_started(self, name, labels):
+        phase = name if not labels.get('league') else f"{name}[{labels['league']}]"
+        span = {'phase': phase, 'started': time.perf_counter(), 'snapshot': None, 'peak': 0}
+        if tracemalloc.is_tracing():
+            self._update_peaks()
+            span['snapshot'] = tracemalloc.take_snapshot()
+            span['peak'] = tracemalloc.get_traced_memory()[0]
+        with self._lock:
+            self.open_spans.setdefault(threading.get_ident(), []).append(span)
+
+    def span_finished(self, name, labels):
+        phase = name if not labels.get('league') else f"{name}[{labels['league']}]"
+        with self._lock:
+            spans = self.open_spans.get(threading.get_ident(), [])
+            matching = [span for span in spans if span['phase'] == phase]
+            if not matching:
+                return
+            span = matching[-1]
+            spans.remove(span)
+            if not spans:
+                del self.open_spans[threading.get_ident()]
+        if span['snapshot'] is None or not tracemalloc.is_tracing():
+            return
+
+        self._update_peaks(span)
+        statistics = tracemalloc.take_snapshot().compare_to(span['snapshot'], 'lineno')
+        # Filtering the few results is much cheaper than filtering the snapshots
+        growing = [
+            stat for stat in statistics
+            if stat.size_diff > 0 and stat.traceback[0].filename not in (tracemalloc.__file__, __file__)
+        ][:self.top]
+        self.allocations.append({
+            'phase': phase,
+            'seconds': time.perf_counter() - span['started'],
+            'peak_bytes': span['peak'],
+            'top': [(str(stat.traceback[0]), stat.size_diff, stat.count_diff) for stat in growing]
+        })
+
+    def _update_peaks(self, *extra_spans):
+        """Fold the traced peak since the last reset into every open span"""
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        with self._lock:
+            for span in [span for spans in self.open_spans.values() for span in spans] + list(extra_spans):
+                span['peak'] = max(span['peak'], peak)
+
+    # Reports
+
+    def hot_functions(self, limit=10):
+        """[(phase, function, self samples)] of the functions most often on top of a stack"""
+        counts = Counter()
+        with self._lock:
+            for stack, count in self.samples.items():
+                frames = stack.split(';')
+                if len(frames) > 2 and not frames[-1].startswith(IDLE_FRAMES):
+                    counts[(frames[0], frames[-1])] += count
+        return [(phase, function, count) for (phase, function), count in counts.most_common(limit)]
+
+    def collapsed(self):
+        """Samples in the collapsed stack format of flamegraph.pl and speedscope"""
+        with self._lock:
+            return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def memory_report(self):
+        lines = [f"tracemalloc top allocations per phase ({self.alloc_frames} frame(s) per traceback)", ""]
+        for phase in self.allocations:
+            lines.append(f"== {phase['phase']}: {phase['seconds']:.2f}s, "
+                         f"peak traced {phase['peak_bytes'] / 1024 / 1024:.1f} MiB")
+            for site, size, count in phase['top']:
+                lines.append(f"  {size / 1024:>10.1f} KiB {count:>+8} blocks  {site}")
+            lines.append("")
+        return '\n'.join(lines)
+
+    def write(self, directory, prefix='profile'):
+        """Write the collapsed stacks and the allocation report, returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, f"{prefix}.collapsed")]
+        with open(paths[0], 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        if self.alloc_frames:
+            paths.append(os.path.join(directory, f"{prefix}-memory.txt"))
+            with open(paths[1], 'w', encoding='utf-8') as f:
+                f.write(self.memory_report())
+
+        logger.info(f"Profile: {self.sample_count} samples every {self.interval * 1000:.0f}ms "
+                    f"({self.overhead_samples} in the profiler itself) written to {', '.join(paths)}")
+        for phase, function, count in self.hot_functions():
+            logger.info(f"  hot: {count / max(self.sample_count, 1):6.1%} {function} ({phase})")
+        return paths
@@ -1,20 +1,129 @@
+import asyncio
+import threading
 import time
+from email.utils import parsedate_to_datetime
+
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), None if absent"""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 class RateLimiter:
-    """Simple rate limiter to ensure minimum interval between actions"""
-    def __init__(self, min_interval=0.5):
+    """Token-bucket rate limiter shared by threads and asyncio tasks.
+
+    Every caller reserves the next free slot of the bucket under a lock and
+    sleeps outside of it, so all callers together start at most burst
+    actions at once and one action per interval after that. wait() sleeps
+    the calling thread, wait_async() the calling task.
+
+    With adaptive=True the interval follows the server's responses fed in
+    through record_response(): 429/503 double it (up to max_interval) and
+    a Retry-After header pauses the whole bucket, latency rising well above
+    the observed baseline widens it by a quarter, and healthy responses
+    shrink it again step by step down to floor_interval.
+    """
+    def __init__(self, min_interval=0.5, burst=1, adaptive=False, floor_interval=None, max_interval=30.0,
+                 latency_factor=2.0):
         self.min_interval = min_interval
-        self.last_action_time = 0
+        self.interval = min_interval
+        self.burst = max(1, int(burst))
+        self.adaptive = adaptive
+        self.floor_interval = min_interval if floor_interval is None else min(floor_interval, min_interval)
+        self.max_interval = max(max_interval, min_interval)
+        self.latency_factor = latency_factor
+
+        self._lock = threading.Lock()
+        # Theoretical arrival time of the next action (GCRA form of the bucket)
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.latency_ewma = None
+        self.latency_baseline = None
+
+    def reserve(self):
+        """Reserve the next slot, returns the seconds the caller has to wait"""
+        with self._lock:
+            now = time.monotonic()
+            burst_tolerance = (self.burst - 1) * self.interval
+            slot = max(now, self.next_slot - burst_tolerance, self.paused_until)
+            self.next_slot = max(self.next_slot, slot) + self.interval
+
+            wait_time = slot - now
+            self.waits += 1
+            self.total_wait += wait_time
+            self.max_wait = max(self.max_wait, wait_time)
+            return wait_time
 
     def wait(self):
-        """Wait if necessary to respect the minimum interval"""
-        current_time = time.time()
-        elapsed = current_time - self.last_action_time
+        """Wait until this caller's slot is due (threads)"""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def wait_async(self):
+        """Wait until this caller's slot is due (asyncio tasks)"""
+        wait_time = self.reserve()
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def record_response(self, status, latency=None, retry_after=None):
+        """Adapt the interval to a server response"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.interval = min(self.max_interval, self.interval * 2)
+                pause = parse_retry_after(retry_after)
+                if pause:
+                    self.paused_until = max(self.paused_until, time.monotonic() + pause)
+                return
+
+            if latency is None:
+                return
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            # The baseline follows improvements at once and degradations slowly
+            if self.latency_baseline is None or latency < self.latency_baseline:
+                self.latency_baseline = latency
+            else:
+                self.latency_baseline = 0.99 * self.latency_baseline + 0.01 * latency
+
+            if self.latency_ewma > self.latency_factor * self.latency_baseline:
+                self.interval = min(self.max_interval, self.interval * 1.25)
+            else:
+                self.interval = max(self.floor_interval, self.interval * 0.95)
 
-        # If this isn't the first action, check if we need to wait
-        if self.last_action_time > 0 and elapsed < self.min_interval:
-            wait_time = self.min_interval - elapsed
-            if wait_time > 0:
-                time.sleep(wait_time)
+    @property
+    def rate(self):
+        """Current actions per second"""
+        return 1 / self.interval if self.interval > 0 else float('inf')
 
-        self.last_action_time = time.time()
+    def stats(self):
+        """Current rate and wait-time statistics"""
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'interval': self.interval,
+                'waits': self.waits,
+                'total_wait': self.total_wait,
+                'avg_wait': self.total_wait / self.waits if self.waits else 0.0,
+                'max_wait': self.max_wait,
+                'throttled': self.throttled,
+                'latency_ewma': self.latency_ewma
+            }
@@ -0,0 +1,133 @@
+import sys
+
+
+class Record:
+    """Base of the slotted in-flight records.
+
+    Records hold one value per field in __slots__ instead of a per-instance
+    dict, pickle as (class, values) to and from the parse worker processes,
+    and only become dicts at the write boundary (transform_*_data, spool,
+    page archive) through to_dict().
+    """
+    __slots__ = ()
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __reduce__(self):
+        return self.__class__, self.values()
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class BoxScoreEntry(Record):
+    """One player's line of a box score page"""
+    __slots__ = ('game_id', 'team_id', 'player_last_name', 'player_first_name', 'points', 'free_throw_attempts',
+                 'free_throws_made', 'two_pointers', 'three_pointers', 'fouls', 'league_id')
+
+    def __init__(self, game_id='', team_id='', player_last_name='', player_first_name='', points=0,
+                 free_throw_attempts=0, free_throws_made=0, two_pointers=0, three_pointers=0, fouls=0,
+                 league_id=None):
+        self.game_id = game_id
+        self.team_id = team_id
+        self.player_last_name = player_last_name
+        self.player_first_name = player_first_name
+        self.points = points
+        self.free_throw_attempts = free_throw_attempts
+        self.free_throws_made = free_throws_made
+        self.two_pointers = two_pointers
+        self.three_pointers = three_pointers
+        self.fouls = fouls
+        self.league_id = league_id
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(**{name: entry[name] for name in cls.__slots__ if name in entry})
+
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Game(Record):
+    """A spielplan game with the state the crawler derives for it.
+
+    Built from the API dict by from_api(), which keeps only the fields the
+    crawler uses; team ids and names repeat in every game of a team and are
+    interned. quarter_scores and box_score_hash are filled in from the box
+    score page or the stored row.
+    """
+    __slots__ = ('game_id', 'home_team_id', 'home_team_name', 'away_team_id', 'away_team_name', 'kickoff_date',
+                 'kickoff_time', 'result', 'confirmed', 'cancelled', 'quarter_scores', 'box_score_hash')
+
+    def __init__(self, game_id='', home_team_id='', home_team_name='', away_team_id='', away_team_name='',
+                 kickoff_date=None, kickoff_time=None, result=None, confirmed=False, cancelled=False,
+                 quarter_scores=None, box_score_hash=None):
+        self.game_id = game_id
+        self.home_team_id = home_team_id
+        self.home_team_name = home_team_name
+        self.away_team_id = away_team_id
+        self.away_team_name = away_team_name
+        self.kickoff_date = kickoff_date
+        self.kickoff_time = kickoff_time
+        self.result = result
+        self.confirmed = confirmed
+        self.cancelled = cancelled
+        self.quarter_scores = quarter_scores
+        self.box_score_hash = box_score_hash
+
+    @classmethod
+    def from_api(cls, game):
+        """Game of a competition/spielplan entry"""
+        home = game.get('homeTeam') or {}
+        guest = game.get('guestTeam') or {}
+        return cls(
+            game_id=str(game.get('matchId', '')),
+            home_team_id=intern_text(str(home.get('teamPermanentId', '')) if home else ''),
+            home_team_name=intern_text(home.get('teamname', '')),
+            away_team_id=intern_text(str(guest.get('teamPermanentId', '')) if guest else ''),
+            away_team_name=intern_text(guest.get('teamname', '')),
+            kickoff_date=game.get('kickoffDate'),
+            kickoff_time=game.get('kickoffTime'),
+            result=game.get('result'),
+            confirmed=bool(game.get('ergebnisbestaetigt', False)),
+            cancelled=bool(game.get('abgesagt', False)),
+            quarter_scores=game.get('quarter_scores'),
+            box_score_hash=game.get('box_score_hash')
+        )
+
+    @classmethod
+    def from_dict(cls, game):
+        """Game of to_dict() output, or of an API dict (spools written before records)"""
+        if 'matchId' in game:
+            return cls.from_api(game)
+        return cls(**{name: game[name] for name in cls.__slots__ if name in game})
+
+    @property
+    def has_result(self):
+        return bool(self.result) and ':' in self.result
+
+
+def as_game(game):
+    return game if isinstance(game, Game) else Game.from_dict(game)
+
+
+def as_entry(entry):
+    return entry if isinstance(entry, BoxScoreEntry) else BoxScoreEntry.from_dict(entry)
+
+
+def record_to_dict(value):
+    """json.dump default= for payloads holding records"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Reparse archived box score pages and store the corrected rows.
+
+After a parser fix, the box scores of a season are recomputed from the
+page archive (the crawler's --archive, page_archive.py) without fetching
+basketball-bund.net again. Only rows whose fingerprint differs from the
+stored one are written.
+"""
+import argparse
+import logging
+import sys
+
+try:
+    from crawler.box_score_parser import BACKENDS
+    from crawler.main import BasketballBundCrawler, PARSER_ENGINES
+    from crawler.multi_league import resolve_targets, target_label
+    from crawler.page_archive import PageArchive
+except ImportError:
+    from box_score_parser import BACKENDS
+    from main import BasketballBundCrawler, PARSER_ENGINES
+    from multi_league import resolve_targets, target_label
+    from page_archive import PageArchive
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reparse archived box score pages without network traffic")
+    parser.add_argument('--archive', metavar='DIR', default='page-archive',
+                        help="page archive written by main.py --archive (default: page-archive)")
+    parser.add_argument('--season', action='append', default=[], dest='seasons', metavar='NAME',
+                        help="reparse this season (repeatable, default: the current one)")
+    parser.add_argument('--league', action='append', default=[], dest='leagues', metavar='ID',
+                        help="reparse this league id (repeatable)")
+    parser.add_argument('--game', action='append', default=[], dest='games', metavar='ID',
+                        help="only reparse this game (repeatable)")
+    parser.add_argument('--parser', choices=PARSER_ENGINES, default='fast',
+                        help="box score page parser (default: fast)")
+    parser.add_argument('--parser-backend', choices=BACKENDS, default=None,
+                        help="tokenizer of the fast parser (default: html.parser, lxml is faster "
+                             "but repairs malformed markup)")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="parser processes (default: one per available core)")
+    parser.add_argument('--base-url', default=None,
+                        help="base URL the pages were fetched from, for the stored box_score_url (default: as main.py)")
+    parser.add_argument('--write-all', action='store_true',
+                        help="upsert every reparsed row instead of only the changed ones")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="only report how many rows would change")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    archive = PageArchive(args.archive)
+    crawler = BasketballBundCrawler(parser_engine=args.parser, parser_backend=args.parser_backend,
+                                    parse_workers=args.parse_workers,
+                                    diff_writes=not args.write_all, base_url=args.base_url)
+    crawlers = [crawler]
+    if args.seasons or args.leagues:
+        crawlers = [crawler.for_season(target) for target in resolve_targets(crawler.supabase, args.seasons, args.leagues)]
+
+    try:
+        for league_crawler in crawlers:
+            changed = league_crawler.reparse_archive(archive, game_ids=args.games, dry_run=args.dry_run)
+            label = target_label({'league_id': league_crawler.league_id, 'id': league_crawler.season_id})
+            print(f"{label}: {changed['games']} games, {changed['box_scores']} box score rows changed")
+    finally:
+        archive.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
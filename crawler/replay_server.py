@@ -0,0 +1,178 @@
+"""
+Local stand-in for basketball-bund.net that replays a recorded cassette.
+
+Serves the REST JSON and box score pages of a cassette (see cassette.py and
+`main.py --record`) with configurable latency and error injection, so the
+fetch phase can be benchmarked offline and reproducibly:
+
+    python replay_server.py cassette.json.gz --port 8765 --latency 0.05 --error-rate 0.02
+    python main.py --base-url http://127.0.0.1:8765
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from crawler.cassette import Cassette
+except ImportError:
+    from cassette import Cassette
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayServer:
+    """Threaded HTTP server answering requests from a cassette.
+
+    Every response is delayed by latency seconds plus up to jitter seconds.
+    With probability error_rate a request is answered with error_status
+    instead (and a Retry-After header when retry_after is set). Unknown
+    requests get a 404. The seed makes latency and errors reproducible.
+    """
+    def __init__(self, cassette, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=503, retry_after=None, seed=None):
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors_injected = 0
+        self.not_found = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            # Keep-alive like the real site, so connection reuse is measurable
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.handle(self, 'GET', None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                server.handle(self, 'POST', self.rfile.read(length))
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return ReplayHandler
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+            if fail:
+                self.errors_injected += 1
+            return delay, fail
+
+    def handle(self, handler, method, body):
+        delay, fail = self._draw()
+        try:
+            if delay > 0:
+                time.sleep(delay)
+
+            headers = {}
+            if fail:
+                status, content_type, content = self.error_status, 'text/plain', b'injected error'
+                if self.retry_after is not None:
+                    headers['Retry-After'] = str(self.retry_after)
+            else:
+                recorded = self.cassette.lookup(method, handler.path, body)
+                if recorded is None:
+                    with self._lock:
+                        self.not_found += 1
+                    status, content_type, content = 404, 'text/plain', b'not in cassette'
+                else:
+                    status, content_type, content = recorded
+
+            handler.send_response(status)
+            handler.send_header('Content-Type', content_type or 'application/octet-stream')
+            handler.send_header('Content-Length', str(len(content)))
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            handler.wfile.write(content)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors_injected': self.errors_injected,
+                'not_found': self.not_found,
+                'max_in_flight': self.max_in_flight
+            }
+
+    def start(self):
+        """Serve in a background thread, returns the base URL"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded basketball-bund.net cassette")
+    parser.add_argument('cassette', help="cassette recorded with main.py --record")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra seconds, up to this value")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=503, help="status of injected errors (default: 503)")
+    parser.add_argument('--retry-after', type=int, default=None, help="Retry-After seconds sent with injected errors")
+    parser.add_argument('--seed', type=int, default=None, help="seed for latency jitter and error injection")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cassette = Cassette.load(args.cassette)
+    server = ReplayServer(
+        cassette, host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after, seed=args.seed
+    )
+    logger.info(f"Replaying {len(cassette)} recorded responses on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info(f"Replay stats: {server.stats()}")
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
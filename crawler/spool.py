@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import time
+
+try:
+    from crawler.records import record_to_dict
+except ImportError:
+    from records import record_to_dict
+
+logger = logging.getLogger(__name__)
+
+SPOOL_VERSION = 1
+
+# A spool older than this is from an earlier scheduled run, not a retry
+SPOOL_MAX_AGE = 6 * 3600
+
+
+def save_spool(path, data, season_id=None):
+    """Persist the fetched payload so a retried run can skip refetching.
+
+    The file is written to a temporary name and renamed, so a crash while
+    writing never leaves a truncated spool behind.
+    """
+    spool = {
+        'version': SPOOL_VERSION,
+        'saved_at': time.time(),
+        'league_id': data.get('league_id'),
+        'season_id': season_id,
+        'data': data
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(spool, f, ensure_ascii=False, default=record_to_dict)
+    os.replace(tmp_path, path)
+    logger.info(f"Spooled fetched data to {path}")
+
+
+def load_spool(path, league_id, season_id=None, max_age=SPOOL_MAX_AGE):
+    """Return the spooled payload for this league/season, None if there is no usable spool"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            spool = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable spool {path}: {e}")
+        return None
+
+    age = time.time() - spool.get('saved_at', 0)
+    if spool.get('version') != SPOOL_VERSION:
+        logger.warning(f"Ignoring spool {path} with version {spool.get('version')}")
+        return None
+    if str(spool.get('league_id')) != str(league_id) or spool.get('season_id') != season_id:
+        logger.warning(f"Ignoring spool {path} of league {spool.get('league_id')} / season {spool.get('season_id')}")
+        return None
+    if age > max_age:
+        logger.info(f"Ignoring spool {path}, it is {age / 3600:.1f}h old")
+        return None
+
+    logger.info(f"Resuming from spool {path} written {age:.0f}s ago, skipping the fetch")
+    return spool['data']
+
+
+def discard_spool(path):
+    """Remove the spool once its data is stored"""
+    try:
+        os.remove(path)
+        logger.info(f"Removed spool {path}")
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,74 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BoxScoreStream:
+    """Write box scores to Supabase in fixed-size chunks while the crawl continues.
+
+    Parsed entries are buffered per game and flushed once chunk_size entries
+    are pending, so only one chunk of box score rows is held in memory and
+    the first rows land while later pages are still being fetched. Each flush
+    upserts the games of the chunk (with quarter scores and page hash) before
+    their box score rows, since box_scores.game_id refers to games.
+
+    A chunk that fails to write is kept and handed back by close(), so
+    store_data writes it with its retry logic at the end of the run instead
+    of the fetch work being lost.
+    """
+    def __init__(self, crawler, chunk_size=500):
+        self.crawler = crawler
+        self.chunk_size = max(1, int(chunk_size))
+        self.games = {}
+        self.entries = []
+        self.failed_entries = []
+        self.entries_written = 0
+        self.chunks_written = 0
+        self.started_at = time.monotonic()
+        self.first_write_after = None
+
+    def open(self, teams):
+        """Store the teams up front, games of every chunk refer to them"""
+        if teams:
+            self.crawler.write_changed('teams', teams, self.crawler.upsert_teams)
+            logger.info(f"Stored {len(teams)} teams before streaming box scores")
+
+    def add(self, game_id, game, entries, qs_update):
+        """Buffer one game's parse result and flush when a chunk is full"""
+        if qs_update:
+            game.quarter_scores = qs_update[1]
+        if not entries:
+            return
+        self.games[game_id] = game
+        self.entries.extend(entries)
+        if len(self.entries) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Upsert the buffered games and box score entries"""
+        if not self.entries:
+            return
+        games, entries = list(self.games.values()), self.entries
+        self.games, self.entries = {}, []
+        try:
+            self.crawler.write_changed('games', self.crawler.transform_games_data(games), self.crawler.upsert_games)
+            self.crawler.write_changed('box_scores', self.crawler.transform_box_scores_data(entries, games),
+                                       self.crawler.upsert_box_scores)
+        except Exception as e:
+            logger.error(f"Error streaming {len(entries)} box score entries, deferring them to store_data: {e}")
+            self.failed_entries.extend(entries)
+            return
+
+        self.entries_written += len(entries)
+        self.chunks_written += 1
+        if self.first_write_after is None:
+            self.first_write_after = time.monotonic() - self.started_at
+            logger.info(f"First box score chunk stored after {self.first_write_after:.1f}s")
+
+    def close(self):
+        """Flush the last chunk and return the entries that could not be written"""
+        self.flush()
+        logger.info(f"Streamed {self.entries_written} box score entries in {self.chunks_written} chunks"
+                    f" ({len(self.failed_entries)} deferred)")
+        return self.failed_entries
@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import box_score_parser
+from crawler.records import Game
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'box_scores')
+GAME = Game.from_api({'homeTeam': {'teamPermanentId': 153170}, 'guestTeam': {'teamPermanentId': 168416}})
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def parse(content, backend='html.parser'):
+    return box_score_parser.parse_box_score(content, '2786721', GAME, '49400', backend=backend)
+
+
+def player_page(rows, extra=''):
+    header = '<tr>' + ''.join(f'<td>{c}</td>' for c in [
+        'Nachname', 'Vorname', 'Punkte', 'FW-V', 'FW-T', '2P', '3P', 'Fouls'
+    ]) + '</tr>'
+    return (f'<html><body>{extra}<form name="spielerstatistikheim"><table class="sportView">'
+            f'{header}{rows}</table></form></body></html>').encode('utf-8')
+
+
+class TestBoxScoreParser(unittest.TestCase):
+    def test_regular_page(self):
+        """Test players of both teams and quarter scores from a full page"""
+        entries, qs_update = parse(load_fixture('game_regular.html'))
+
+        self.assertEqual(len(entries), 23)
+        self.assertEqual([e.team_id for e in entries].count('153170'), 12)
+        self.assertEqual(entries[0].to_dict(), {
+            'game_id': '2786721',
+            'team_id': '153170',
+            'player_last_name': 'Müller',
+            'player_first_name': 'Marius',
+            'points': 9,
+            'free_throw_attempts': 1,
+            'free_throws_made': 1,
+            'two_pointers': 1,
+            'three_pointers': 2,
+            'fouls': 0,
+            'league_id': '49400'
+        })
+        self.assertEqual(qs_update, ('2786721', {
+            'first_quarter_home': 13, 'first_quarter_away': 17,
+            'halftime_home': 36, 'halftime_away': 42,
+            'third_quarter_home': 60, 'third_quarter_away': 59
+        }))
+        # Totals and coach rows are not players
+        self.assertNotIn('Gesamt', [e.player_last_name for e in entries])
+
+    def test_missing_sections(self):
+        """Test pages without guest statistics or quarter table"""
+        entries, qs_update = parse(load_fixture('game_no_guest_stats.html'))
+        self.assertEqual({e.team_id for e in entries}, {'153170'})
+        self.assertIsNotNone(qs_update)
+
+        entries, qs_update = parse(load_fixture('game_no_quarters.html'))
+        self.assertEqual(len(entries), 23)
+        self.assertIsNone(qs_update)
+
+    def test_declared_encodings(self):
+        """Test that ISO-8859-1, windows-1252 and UTF-8 pages decode alike"""
+        for name in ('game_regular.html', 'game_small.html', 'game_utf8.html'):
+            names = [e.player_last_name for e in parse(load_fixture(name))[0]]
+            self.assertTrue(any(ch in ''.join(names) for ch in 'äöüÖß'), name)
+
+    def test_text_like_get_text_strip(self):
+        """Test cell text: strings stripped and joined, comments and scripts ignored"""
+        rows = ('<tr><td> <a>M&uuml;ller</a> <!-- x --> Jr </td><td>Jan<br>&nbsp;</td>'
+                '<td><script>var p = 3;</script> 12 </td><td>2</td><td>1</td><td>5</td><td>0</td><td>&nbsp;</td></tr>')
+        entries, _ = parse(player_page(rows))
+
+        self.assertEqual(entries[0].player_last_name, 'MüllerJr')
+        self.assertEqual(entries[0].player_first_name, 'Jan')
+        self.assertEqual(entries[0].points, 12)
+        self.assertEqual(entries[0].fouls, 0)
+
+    def test_unclosed_cells_nest_like_beautifulsoup(self):
+        """Test that the html.parser backend keeps BeautifulSoup's nesting of unclosed tags"""
+        rows = '<tr><td>Ari<td>Abdullah<td>10<td>0<td>0<td>5<td>0<td>1</tr>'
+        entries, _ = parse(player_page(rows))
+
+        # Without </td> every cell nests inside the previous one, so each
+        # cell's text includes all following cells (verified against bs4)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].player_last_name, 'AriAbdullah1000501')
+        self.assertEqual(entries[0].player_first_name, 'Abdullah1000501')
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected"""
+        with self.assertRaises(ValueError):
+            box_score_parser.build_page_model(b'<html></html>', backend='regex')
+
+    def test_default_backend_keeps_malformed_markup(self):
+        """Test that the default backend parses malformed sample pages like BeautifulSoup"""
+        self.assertEqual(box_score_parser.DEFAULT_BACKEND, 'html.parser')
+        entries, _ = box_score_parser.parse_box_score(
+            load_fixture('malformed/game_unclosed_cells.html'), '2786721', GAME, '49400'
+        )
+
+        # The row without </td> nests its cells (verified against bs4)
+        self.assertEqual(len(entries), 16)
+        row = next(e for e in entries if e.player_last_name.startswith('Schäfer'))
+        self.assertEqual(row.player_last_name, 'SchäferFelix1452601')
+        self.assertEqual(row.player_first_name, 'Felix1452601')
+
+    @unittest.skipIf(box_score_parser.etree is None, "lxml not installed")
+    def test_lxml_matches_html_parser(self):
+        """Test that both backends agree on every well-formed sample page"""
+        for name in sorted(n for n in os.listdir(FIXTURES) if n.endswith('.html')):
+            content = load_fixture(name)
+            self.assertEqual(parse(content, 'lxml'), parse(content, 'html.parser'), name)
+
+if __name__ == '__main__':
+    unittest.main()
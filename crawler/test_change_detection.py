@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.change_detection import ChangeDetector, row_fingerprint
+
+KEYS = ('game_id', 'player_last_name')
+
+
+def entry(name, points, scraped_at='2026-10-16T12:00:00+00:00'):
+    return {'game_id': '1', 'player_last_name': name, 'points': points, 'scraped_at': scraped_at}
+
+
+class TestRowFingerprint(unittest.TestCase):
+    def test_ignores_scraped_at_and_key_order(self):
+        """Test that the fingerprint only depends on the row content"""
+        row = entry('Müller', 9)
+        other = dict(reversed(list(entry('Müller', 9, scraped_at='2026-10-17T08:00:00+00:00').items())))
+        self.assertEqual(row_fingerprint(row), row_fingerprint(other))
+        self.assertNotEqual(row_fingerprint(row), row_fingerprint(entry('Müller', 10)))
+
+
+class TestChangeDetector(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        stored_row = entry('Müller', 9)
+
+        def load_stored(table, key_columns):
+            self.loads.append(table)
+            return {('1', 'Müller'): row_fingerprint(stored_row)}
+
+        self.detector = ChangeDetector(load_stored)
+
+    def test_only_changed_rows_are_sent(self):
+        """Test that unchanged rows are skipped and new or changed rows kept"""
+        rows = [entry('Müller', 9, scraped_at='later'), entry('Schmidt', 4)]
+        changed = self.detector.filter('box_scores', rows, KEYS)
+
+        self.assertEqual([row['player_last_name'] for row in changed], ['Schmidt'])
+        self.assertEqual(changed[0]['row_fingerprint'], row_fingerprint(entry('Schmidt', 4)))
+        self.assertEqual(self.detector.counts['box_scores'], {'written': 0, 'skipped': 1})
+
+        changed = self.detector.filter('box_scores', [entry('Müller', 11)], KEYS)
+        self.assertEqual(len(changed), 1)
+        # Stored fingerprints are loaded once per table
+        self.assertEqual(self.loads, ['box_scores'])
+
+    def test_written_rows_are_not_resent(self):
+        """Test that rows written earlier in the run are skipped, failed ones are not"""
+        rows = self.detector.filter('box_scores', [entry('Schmidt', 4), entry('Weber', 2)], KEYS)
+        self.detector.mark_written('box_scores', rows[:1], KEYS)
+
+        changed = self.detector.filter('box_scores', [entry('Schmidt', 4), entry('Weber', 2)], KEYS)
+        self.assertEqual([row['player_last_name'] for row in changed], ['Weber'])
+        self.assertEqual(self.detector.summary(), 'box_scores: 1 written, 0 skipped')
+
+    def test_disabled_sends_everything(self):
+        """Test that a disabled detector fingerprints but never skips"""
+        detector = ChangeDetector(lambda table, keys: self.fail("must not load"), enabled=False)
+        changed = detector.filter('box_scores', [entry('Müller', 9)], KEYS)
+        self.assertEqual(len(changed), 1)
+        self.assertIn('row_fingerprint', changed[0])
+
+    def test_load_error_writes_all_rows(self):
+        """Test that failing to load fingerprints falls back to writing all rows"""
+        def load_stored(table, key_columns):
+            raise Exception("column row_fingerprint does not exist")
+
+        detector = ChangeDetector(load_stored)
+        self.assertEqual(len(detector.filter('games', [entry('Müller', 9)], KEYS)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
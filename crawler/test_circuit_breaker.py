@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.transitions = []
+        self.breaker = CircuitBreaker(failure_threshold=3, cooldown=60, slow_call=10, clock=self.clock,
+                                      on_state_change=lambda old, new: self.transitions.append(new))
+
+    def test_trips_after_consecutive_failures(self):
+        """Test that only failures in a row open the breaker"""
+        self.breaker.record(failed=True)
+        self.breaker.record(failed=True)
+        self.breaker.record(failed=False, latency=0.2)
+        self.breaker.record(failed=True)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record(failed=True)
+        self.breaker.record(failed=True)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+        self.assertEqual(self.transitions, [OPEN])
+
+    def test_slow_responses_count_as_failures(self):
+        for _ in range(3):
+            self.breaker.record(failed=False, latency=12.0)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_probe_after_cooldown(self):
+        """Test that one probe goes out after the cooldown and decides the state"""
+        for _ in range(3):
+            self.breaker.record(failed=True)
+        self.clock.now += 61
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Only the first caller gets the probe
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record(failed=True)
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.stats()['trips'], 2)
+
+        self.clock.now += 61
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(failed=False, latency=0.3)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.transitions, [OPEN, HALF_OPEN, OPEN, HALF_OPEN, CLOSED])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import cli, health_check
+from crawler.cassette import Cassette
+from crawler.replay_server import ReplayServer
+from crawler.supabase_standin import SupabaseStandin, StandinStore, STANDIN_KEY
+
+HEAVY_MODULES = ('requests', 'aiohttp', 'supabase', 'bs4')
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       900 |        900 | site
+crawler-cli-imports
+import time:       120 |        120 |     _json
+import time:       400 |        520 |   json
+import time:      1000 |       1000 |   urllib.request
+import time:       300 |       1820 | dump
+"""
+
+
+def imported_modules(command):
+    """HEAVY_MODULES imported by loading a command, in a fresh interpreter"""
+    code = (f"import sys; sys.path.insert(0, {cli.CRAWLER_DIR!r}); import cli; cli.load_command({command!r}); "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+class TestCli(unittest.TestCase):
+    def test_commands_import_only_what_they_need(self):
+        """Test that light commands skip the crawler's heavy dependencies"""
+        self.assertEqual(imported_modules('health'), [])
+        self.assertEqual(imported_modules('dump-game'), [])
+        # The crawl imports supabase when it connects and bs4 only for --parser soup
+        self.assertNotIn('supabase', imported_modules('crawl'))
+        self.assertNotIn('bs4', imported_modules('crawl'))
+
+    def test_command_options_are_passed_through(self):
+        with patch.object(cli, 'load_command') as load_command:
+            cli.main(['reparse', '--dry-run', '--season', '2025/26'])
+        load_command.assert_called_once_with('reparse')
+        load_command.return_value.main.assert_called_once_with(['--dry-run', '--season', '2025/26'])
+
+    def test_import_report(self):
+        imports = cli.parse_import_times(IMPORTTIME)
+        self.assertEqual([name for name, *_ in imports], ['_json', 'json', 'urllib.request', 'dump'])
+        self.assertEqual(imports[-1][3], 0)
+
+        total_ms, heaviest = cli.import_report(imports, top=2)
+        self.assertAlmostEqual(total_ms, 1.82)
+        self.assertEqual(heaviest, [('urllib', 1.0), ('json', 0.4)])
+
+
+class TestLightCommands(unittest.TestCase):
+    def test_dump_game(self):
+        cassette = Cassette()
+        matches = [{'matchId': 1, 'result': '80:70'}, {'matchId': 2, 'result': None, 'homeTeam': {'teamname': 'Pitbulls'}}]
+        cassette.record('GET', '/rest/competition/spielplan/id/49400', None, 200, 'application/json',
+                        json.dumps({'status': '0', 'data': {'matches': matches}}).encode())
+        with ReplayServer(cassette) as server, tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'game.json')
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(cli.main(['dump-game', '2', '--league', '49400', '--base-url', server.base_url,
+                                           '--output', path]), 0)
+            with open(path) as f:
+                self.assertEqual(json.load(f), matches[1])
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(cli.main(['dump-game', '3', '--league', '49400', '--base-url', server.base_url]), 1)
+
+    def test_health_check_against_standin(self):
+        """Test the urllib client of the health check against the PostgREST stand-in"""
+        recent = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+        old = (datetime.now(timezone.utc) - timedelta(days=5)).isoformat()
+        server = SupabaseStandin(StandinStore())
+        server.store.write('seasons', [{'name': '2026/27', 'league_id': '49400', 'is_current': True}])
+        server.store.write('scrape_log', [
+            {'league_id': '49400', 'status': 'success', 'scraped_at': old, 'teams_count': 8, 'games_count': 56,
+             'standings_count': 8},
+            {'league_id': '51234', 'status': 'success', 'scraped_at': recent, 'teams_count': 8, 'games_count': 56,
+             'standings_count': 8}
+        ])
+        server.start()
+        try:
+            env = {'SUPABASE_URL': server.base_url, 'SUPABASE_KEY': STANDIN_KEY}
+            with patch.dict(os.environ, env), contextlib.redirect_stdout(io.StringIO()) as output:
+                # Only the other league ran recently
+                self.assertEqual(health_check.main([]), 1)
+                server.store.write('scrape_log', [
+                    {'league_id': '49400', 'status': 'success', 'scraped_at': recent, 'teams_count': 8,
+                     'games_count': 56, 'standings_count': 8}
+                ])
+                self.assertEqual(health_check.main([]), 0)
+        finally:
+            server.stop()
+        self.assertIn('Current season: 2026/27 (league 49400)', output.getvalue())
+        self.assertIn('SUCCESS: Found 1 recent scrape(s)', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,265 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import itertools
+import os
+import sys
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.records import Game
+
+
+def make_game(match_id, result='80:70'):
+    return Game.from_api({
+        'matchId': match_id,
+        'result': result,
+        'homeTeam': {'teamPermanentId': 1},
+        'guestTeam': {'teamPermanentId': 2},
+    })
+
+
+def queue_game(match_id, confirmed=True, home=1, kickoff_date='2026-10-10'):
+    return Game.from_api({
+        'matchId': match_id, 'result': '80:70', 'ergebnisbestaetigt': confirmed,
+        'kickoffDate': kickoff_date, 'kickoffTime': '19:30',
+        'homeTeam': {'teamPermanentId': home}, 'guestTeam': {'teamPermanentId': 2},
+    })
+
+
+def fake_parse(content, game_id, game_data):
+    """Deterministic stand-in for parse_box_score_data"""
+    entries = [{'game_id': game_id, 'player_last_name': content.decode(), 'points': int(game_id)}]
+    return entries, (game_id, {'first_quarter_home': int(game_id)})
+
+
+class FakeResponse:
+    def __init__(self, content, delay):
+        self.content = content
+        self.delay = delay
+        self.content_length = len(content)
+        self.status = 200
+        self.headers = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self):
+        return self.content
+
+
+class FakeClientSession:
+    """aiohttp.ClientSession stand-in; later games answer first"""
+    def __init__(self, *args, **kwargs):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, url):
+        game_id = url.split('spielplan_id=')[1].split('&')[0]
+        return FakeResponse(f"page-{game_id}".encode(), delay=0.05 / int(game_id))
+
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '123'
+}
+
+
+class TestFetchEngines(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.sync_crawler = BasketballBundCrawler(fetch_mode='sync', request_interval=0)
+        self.async_crawler = BasketballBundCrawler(fetch_mode='async', max_concurrency=3, request_interval=0)
+
+        for crawler in (self.sync_crawler, self.async_crawler):
+            crawler.parse_box_score_data = MagicMock(side_effect=fake_parse)
+
+    def games(self):
+        return [make_game(1), make_game(2, result=None), make_game(3), make_game(4)]
+
+    def run_sync(self, games):
+        def get(url, **kwargs):
+            game_id = url.split('spielplan_id=')[1].split('&')[0]
+            return MagicMock(content=f"page-{game_id}".encode())
+
+        self.sync_crawler.transport.get = get
+        return self.sync_crawler.fetch_box_scores_sync(games)
+
+    def run_async(self, games):
+        with patch('crawler.main.aiohttp.ClientSession', FakeClientSession):
+            return asyncio.run(self.async_crawler.fetch_box_scores_async(games))
+
+    @patch.dict(os.environ, ENV)
+    def test_invalid_fetch_mode(self):
+        """Test that an unknown engine name is rejected"""
+        with patch('crawler.main.create_client'):
+            with self.assertRaises(ValueError):
+                BasketballBundCrawler(fetch_mode='threads')
+
+    def test_async_matches_sync(self):
+        """Test that both engines return identical results in game order"""
+        sync_games = self.games()
+        async_games = self.games()
+
+        sync_result = self.run_sync(sync_games)
+        async_result = self.run_async(async_games)
+
+        self.assertEqual(sync_result, async_result)
+        self.assertEqual([e['game_id'] for e in async_result[0]], ['1', '3', '4'])
+        self.assertEqual(sync_games, async_games)
+        self.assertEqual(async_games[0].quarter_scores, {'first_quarter_home': 1})
+        self.assertIsNone(async_games[1].quarter_scores)
+
+    def test_async_failed_game_is_skipped(self):
+        """Test that one failing game does not abort the async run"""
+        def parse(content, game_id, game_data):
+            if game_id == '3':
+                raise RuntimeError("broken page")
+            return fake_parse(content, game_id, game_data)
+
+        self.async_crawler.parse_box_score_data = MagicMock(side_effect=parse)
+        box_scores, qs_updates = self.run_async(self.games())
+
+        self.assertEqual([e['game_id'] for e in box_scores], ['1', '4'])
+        self.assertEqual([game_id for game_id, _ in qs_updates], ['1', '4'])
+
+    def test_async_engine_reports_into_transport(self):
+        """Test that async page downloads are counted by the shared transport"""
+        self.run_async(self.games())
+        stats = self.async_crawler.transport.stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['bytes_received'], len(b"page-1") * 3)
+
+    def test_fetch_box_scores_dispatches_to_engine(self):
+        """Test that fetch_box_scores uses the configured engine"""
+        self.sync_crawler.fetch_box_scores_sync = MagicMock(return_value=(['entry'], []))
+        self.assertEqual(self.sync_crawler.fetch_box_scores([]), ['entry'])
+        self.sync_crawler.fetch_box_scores_sync.assert_called_once()
+
+    def test_most_urgent_games_first(self):
+        """Test the queue order: deferred, unconfirmed, our team, newest kickoff"""
+        crawler = self.sync_crawler
+        crawler.our_team_id = 7
+        crawler.previously_deferred = {'1'}
+        games = [
+            queue_game(1, kickoff_date='2026-09-01'),
+            queue_game(2, kickoff_date='2026-10-01'),
+            queue_game(3, kickoff_date='2026-10-08'),
+            queue_game(4, home=7, kickoff_date='2026-09-15'),
+            queue_game(5, confirmed=False, kickoff_date='2026-09-20'),
+        ]
+        order = [game_id for game_id, _ in crawler.select_games_to_fetch(games)]
+        self.assertEqual(order, ['1', '5', '4', '3', '2'])
+
+    def test_budget_defers_the_remaining_games(self):
+        """Test that no fetch starts once the time budget is used up, in both engines"""
+        for crawler, run in ((self.sync_crawler, self.run_sync), (self.async_crawler, self.run_async)):
+            crawler.max_concurrency = 1
+            crawler.stored_games = {'4': {'game_id': '4', 'box_score_hash': 'abc', 'quarter_scores': {'q': 1}}}
+            # Checked before and after the rate limiter slot of a game
+            crawler.out_of_budget = MagicMock(side_effect=itertools.chain([False, False], itertools.repeat(True)))
+            games = [make_game(1), make_game(3), make_game(4)]
+
+            box_scores, _ = run(games)
+
+            self.assertEqual([e['game_id'] for e in box_scores], ['1'])
+            self.assertEqual(crawler.deferred_games, ['3', '4'])
+            # The upsert of a deferred game keeps its stored box score state
+            self.assertEqual(games[2].box_score_hash, 'abc')
+            self.assertEqual(games[2].quarter_scores, {'q': 1})
+
+    def test_spent_budget_takes_no_rate_limiter_slots(self):
+        """Test that deferring past the deadline does not wait for the limiter shared with other leagues"""
+        for crawler, run in ((self.sync_crawler, self.run_sync), (self.async_crawler, self.run_async)):
+            crawler.fetch_deadline = 0.0
+            crawler.rate_limiter.min_interval = crawler.rate_limiter.interval = 0.05
+
+            box_scores, _ = run([make_game(game_id) for game_id in range(1, 21)])
+
+            self.assertEqual(box_scores, [])
+            self.assertEqual(len(crawler.deferred_games), 20)
+            self.assertEqual(crawler.rate_limiter.stats()['waits'], 0)
+
+    def test_open_breaker_defers_the_remaining_games(self):
+        """Test that games are deferred without a request while the circuit breaker is open"""
+        for crawler, run in ((self.sync_crawler, self.run_sync), (self.async_crawler, self.run_async)):
+            crawler.max_concurrency = 1
+            crawler.transport.circuit_open = MagicMock(side_effect=[False, True, True])
+
+            box_scores, _ = run([make_game(1), make_game(3), make_game(4)])
+
+            self.assertEqual([e['game_id'] for e in box_scores], ['1'])
+            self.assertEqual(crawler.deferred_games, ['3', '4'])
+            self.assertEqual(crawler.metrics.counter('box_scores_deferred_total', reason='circuit_open'), 2)
+
+    def test_deferred_games_are_logged(self):
+        """Test that the deferred games reach scrape_log and lead the next run"""
+        crawler = self.sync_crawler
+        def fetch(games):
+            crawler.defer_game('3', games[0])
+            return [], []
+
+        crawler.fetch_box_scores_sync = MagicMock(side_effect=fetch)
+        crawler.fetch_box_scores([make_game(3)])
+        self.assertEqual(crawler.metrics.counter('box_scores_deferred_total', league='123'), 1)
+
+        crawler.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value \
+            .order.return_value.limit.return_value.execute.return_value.data = [{'deferred_games': ['3', '4']}]
+        self.assertEqual(crawler.load_deferred_games(), {'3', '4'})
+
+        crawler.supabase.table.side_effect = Exception("column scrape_log.deferred_games does not exist")
+        self.assertEqual(crawler.load_deferred_games(), set())
+
+    def test_scrape_log_without_deferred_games_column(self):
+        """Test that the scrape_log row is stored without columns the database lacks"""
+        crawler = self.sync_crawler
+        insert = crawler.supabase.table.return_value.insert
+        insert.return_value.execute.side_effect = [Exception("Could not find the 'deferred_games' column"), 'ok']
+
+        self.assertEqual(crawler.insert_scrape_log({'league_id': '123', 'deferred_games': ['3']}), 'ok')
+        self.assertIn('deferred_games', insert.call_args_list[0][0][0])
+        self.assertNotIn('deferred_games', insert.call_args_list[1][0][0])
+        self.assertIn('metrics', insert.call_args_list[1][0][0])
+
+    def test_rows_without_fingerprint_column(self):
+        """Test that tables without row_fingerprint get every row, without the column"""
+        crawler = self.sync_crawler
+        crawler.select_all = MagicMock(
+            side_effect=Exception("column box_scores.row_fingerprint does not exist"))
+        upsert = crawler.supabase.table.return_value.upsert
+        rows = [{'game_id': '1', 'team_id': '1', 'player_first_name': 'Marius', 'player_last_name': 'Müller',
+                 'points': 12}]
+
+        self.assertEqual(crawler.write_changed('box_scores', rows, crawler.upsert_box_scores), 1)
+        upsert.assert_called_once()
+        self.assertNotIn('row_fingerprint', upsert.call_args[0][0][0])
+        # Rows written earlier in the run are still not sent twice
+        self.assertEqual(crawler.write_changed('box_scores', rows, crawler.upsert_box_scores), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
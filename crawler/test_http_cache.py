@@ -0,0 +1,176 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.http_cache import HttpCache, merge_ttls, parse_duration
+from crawler.transport import HttpTransport
+from crawler.metrics import Metrics
+
+BASE = 'https://www.basketball-bund.net'
+LIST_URL = f'{BASE}/rest/competition/list'
+SPIELPLAN_URL = f'{BASE}/rest/competition/spielplan/id/49400'
+BOX_SCORE_URL = f'{BASE}/public/ergebnisDetails.jsp?type=1&spielplan_id=1'
+
+
+def make_response(content, status=200, headers=None):
+    response = MagicMock()
+    response.content = content
+    response.status_code = status
+    response.headers = headers or {'Content-Type': 'application/json'}
+    response.raw.tell.return_value = len(content)
+    return response
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.directory.name)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_ttl_per_endpoint(self):
+        """Test that league metadata is kept for days, the spielplan for minutes and box scores not at all"""
+        self.assertEqual(self.cache.ttl_for(LIST_URL), 7 * 24 * 3600)
+        self.assertEqual(self.cache.ttl_for(SPIELPLAN_URL), 5 * 60)
+        self.assertEqual(self.cache.ttl_for(BOX_SCORE_URL), 0)
+
+        ttls = merge_ttls([('spielplan', parse_duration('30s')), ('competition/list', parse_duration('14d'))])
+        self.assertEqual(ttls['/rest/competition/spielplan/'], 30)
+        self.assertEqual(ttls['/rest/competition/list'], 14 * 24 * 3600)
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('90'), 90)
+        self.assertEqual(parse_duration('1.5m'), 90)
+        self.assertEqual(parse_duration('5h45m'), 5 * 3600 + 45 * 60)
+        self.assertEqual(parse_duration('1d 12h'), 36 * 3600)
+        for invalid in ('', 'h', '5x', '5h45', '-5m'):
+            with self.assertRaises(ValueError, msg=invalid):
+                parse_duration(invalid)
+
+    def test_fresh_and_stale_entries(self):
+        """Test that a stored response is served until its TTL expires, then only with validators"""
+        self.cache.store('POST', LIST_URL, [49400], 200, {'Content-Type': 'application/json'}, b'{"a": 1}')
+        self.cache.store('GET', SPIELPLAN_URL, None, 200, {'ETag': '"v1"'}, b'{"b": 2}')
+
+        response, fresh, _ = self.cache.lookup('POST', LIST_URL, [49400])
+        self.assertTrue(fresh)
+        self.assertEqual(response.json(), {'a': 1})
+        self.assertIsNone(self.cache.lookup('POST', LIST_URL, [51234]))
+
+        with patch('crawler.http_cache.time.time', return_value=self.cache_time() + 3600):
+            response, fresh, validators = self.cache.lookup('GET', SPIELPLAN_URL)
+            self.assertFalse(fresh)
+            self.assertEqual(validators, {'If-None-Match': '"v1"'})
+            self.assertEqual(response.content, b'{"b": 2}')
+
+        with patch('crawler.http_cache.time.time', return_value=self.cache_time() + 30 * 24 * 3600):
+            # Without ETag or Last-Modified a stale entry is useless
+            self.assertIsNone(self.cache.lookup('POST', LIST_URL, [49400]))
+
+    def test_errors_are_not_cached(self):
+        self.cache.store('GET', SPIELPLAN_URL, None, 500, {}, b'error')
+        self.cache.store('GET', BOX_SCORE_URL, None, 200, {}, b'<html>')
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_api_errors_are_not_cached(self):
+        """Test that a HTTP 200 carrying an API error or a broken body is not kept for the TTL"""
+        self.cache.store('POST', LIST_URL, [49400], 200, {}, b'{"status": "1", "message": "error"}')
+        self.cache.store('GET', SPIELPLAN_URL, None, 200, {}, b'<html>Wartung</html>')
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+        self.cache.store('POST', LIST_URL, [49400], 200, {}, b'{"status": "0", "data": {}}')
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the size bound evicts the entries used longest ago"""
+        self.cache.max_bytes = 250
+        now = time.time()
+        with patch('crawler.http_cache.time.time', side_effect=[now + step for step in range(6)]):
+            self.cache.store('GET', f'{SPIELPLAN_URL}1', None, 200, {}, b'"' + b'x' * 98 + b'"')
+            self.cache.store('GET', f'{SPIELPLAN_URL}2', None, 200, {}, b'"' + b'x' * 98 + b'"')
+            self.cache.lookup('GET', f'{SPIELPLAN_URL}1')
+            self.cache.store('GET', f'{SPIELPLAN_URL}3', None, 200, {}, b'"' + b'x' * 98 + b'"')
+
+        self.assertIsNone(self.cache.lookup('GET', f'{SPIELPLAN_URL}2'))
+        self.assertIsNotNone(self.cache.lookup('GET', f'{SPIELPLAN_URL}1'))
+        self.assertIsNotNone(self.cache.lookup('GET', f'{SPIELPLAN_URL}3'))
+        self.assertEqual(self.cache.stats()['evicted'], 1)
+
+    def test_survives_reopening(self):
+        self.cache.store('POST', LIST_URL, [49400], 200, {}, b'{}')
+        self.cache.close()
+        self.cache = HttpCache(self.directory.name)
+        self.assertIsNotNone(self.cache.lookup('POST', LIST_URL, [49400]))
+
+    def cache_time(self):
+        return self.cache.db.execute("SELECT MAX(expires_at) FROM responses").fetchone()[0]
+
+
+class TestTransportCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.transport = HttpTransport(metrics=Metrics())
+        self.transport.session = MagicMock()
+        self.transport.cache = HttpCache(self.directory.name)
+
+    def tearDown(self):
+        self.transport.cache.close()
+        self.directory.cleanup()
+
+    def test_fresh_responses_skip_the_request(self):
+        """Test that a second run's competition list comes from the cache"""
+        self.transport.session.post.return_value = make_response(b'{"status": "0"}')
+
+        self.transport.post(LIST_URL, json=[49400], timeout=30)
+        second = self.transport.post(LIST_URL, json=[49400], timeout=30)
+
+        self.transport.session.post.assert_called_once()
+        self.assertEqual(second.json(), {'status': '0'})
+        self.assertEqual(self.transport.stats()['requests'], 1)
+        self.assertEqual(self.transport.metrics.counter('http_cache_total', result='hit'), 1)
+        self.assertEqual(self.transport.metrics.counter('http_cache_total', result='miss'), 1)
+
+    def test_api_error_responses_are_refetched(self):
+        """Test that a failed competition list is requested again by the next run"""
+        self.transport.session.post.return_value = make_response(b'{"status": "1"}')
+        self.transport.post(LIST_URL, json=[49400], timeout=30)
+
+        self.transport.session.post.return_value = make_response(b'{"status": "0"}')
+        response = self.transport.post(LIST_URL, json=[49400], timeout=30)
+
+        self.assertEqual(self.transport.session.post.call_count, 2)
+        self.assertEqual(response.content, b'{"status": "0"}')
+
+    def test_stale_responses_are_revalidated(self):
+        """Test that a 304 answer to If-None-Match serves the cached body"""
+        self.transport.session.get.return_value = make_response(b'{"v": 1}', headers={'ETag': '"v1"'})
+        self.transport.get(SPIELPLAN_URL, timeout=30)
+        self.transport.cache.db.execute("UPDATE responses SET expires_at = 0")
+
+        self.transport.session.get.return_value = make_response(b'', status=304)
+        response = self.transport.get(SPIELPLAN_URL, timeout=30)
+
+        self.assertEqual(response.json(), {'v': 1})
+        self.assertEqual(self.transport.session.get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertTrue(self.transport.cache.lookup('GET', SPIELPLAN_URL)[1])
+        self.assertEqual(self.transport.metrics.counter('http_cache_total', result='revalidated'), 1)
+
+    def test_uncached_endpoints_pass_through(self):
+        self.transport.session.get.return_value = make_response(b'<html>')
+        self.transport.get(BOX_SCORE_URL, timeout=30)
+        self.transport.get(BOX_SCORE_URL, timeout=30)
+
+        self.assertEqual(self.transport.session.get.call_count, 2)
+        self.assertEqual(self.transport.metrics.counter('http_cache_total'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import hashlib
+import os
+import sys
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.records import Game
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '123'
+}
+
+QUARTERS = {'first_quarter_home': 20, 'first_quarter_away': 18}
+
+
+def make_game(match_id, result='80:70', confirmed=True):
+    return Game.from_api({'matchId': match_id, 'result': result, 'ergebnisbestaetigt': confirmed})
+
+
+def stored_game(game_id, home_score=80, away_score=70, page_hash=None):
+    return {
+        'game_id': game_id,
+        'status': 'finished',
+        'home_score': home_score,
+        'away_score': away_score,
+        'quarter_scores': QUARTERS,
+        'box_score_hash': page_hash,
+        'has_box_scores': True
+    }
+
+
+class TestIncrementalCrawl(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.crawler = BasketballBundCrawler()
+
+    def test_skips_unchanged_final_games(self):
+        """Test that confirmed games stored with the same score are skipped"""
+        self.crawler.stored_games = {'1': stored_game('1', page_hash='abc'), '2': stored_game('2', 81, 70)}
+        games = [
+            make_game(1),                   # unchanged final -> skip
+            make_game(2),                   # score corrected -> fetch
+            make_game(3, confirmed=False),  # provisional -> fetch
+            make_game(4),                   # new -> fetch
+            make_game(5, result=None),      # not played -> ignore
+        ]
+
+        selected = [game_id for game_id, _ in self.crawler.select_games_to_fetch(games)]
+
+        # The unconfirmed result leads the queue
+        self.assertEqual(selected, ['3', '2', '4'])
+        # Skipped games keep their stored state for the games upsert
+        self.assertEqual(games[0].quarter_scores, QUARTERS)
+        self.assertEqual(games[0].box_score_hash, 'abc')
+
+    def test_full_crawl_fetches_everything(self):
+        """Test that full mode does not load or skip final games"""
+        full_crawler = self.crawler
+        full_crawler.full_crawl = True
+        full_crawler.load_stored_games = MagicMock()
+        full_crawler.fetch_competition_list = MagicMock(return_value={})
+        full_crawler.fetch_competition_table = MagicMock(return_value=[])
+        full_crawler.fetch_competition_spielplan = MagicMock(return_value=[make_game(1)])
+        full_crawler.fetch_box_scores = MagicMock(return_value=[])
+        full_crawler.stored_games = {'1': stored_game('1')}
+
+        full_crawler.fetch_league_data()
+
+        full_crawler.load_stored_games.assert_not_called()
+        self.assertEqual(full_crawler.stored_games, {})
+
+    def test_load_stored_games_marks_box_scores(self):
+        """Test that only finished games with stored box scores count as final"""
+        def select_all(table, columns, **filters):
+            if table == 'games':
+                provisional = dict(stored_game('3'), status='provisional')
+                return [stored_game('1'), stored_game('2'), provisional]
+            return [{'game_id': '1'}, {'game_id': '1'}, {'game_id': '3'}]
+
+        self.crawler.select_all = MagicMock(side_effect=select_all)
+        self.crawler.stored_games = self.crawler.load_stored_games()
+
+        self.assertEqual(sorted(self.crawler.stored_games), ['1', '2', '3'])
+        final = [game_id for game_id in self.crawler.stored_games if self.crawler.is_stored_final(game_id)]
+        self.assertEqual(final, ['1'])
+
+    def test_load_stored_games_falls_back_on_error(self):
+        """Test that a failing lookup results in a full fetch"""
+        self.crawler.select_all = MagicMock(side_effect=Exception("boom"))
+        self.assertEqual(self.crawler.load_stored_games(), {})
+
+    def test_database_without_box_score_hash(self):
+        """Test that an unmigrated games table is written and read without box_score_hash"""
+        missing = Exception("Could not find the 'box_score_hash' column of 'games' in the schema cache")
+
+        def upsert(rows, on_conflict=None):
+            if any('box_score_hash' in row for row in rows):
+                raise missing
+            return MagicMock()
+
+        upsert_mock = self.crawler.supabase.table.return_value.upsert
+        upsert_mock.side_effect = upsert
+        self.crawler.upsert_games(self.crawler.transform_games_data([make_game(1)]))
+        self.crawler.upsert_games(self.crawler.transform_games_data([make_game(2)]))
+
+        # The column is dropped after the first error and left out from then on
+        self.assertEqual(upsert_mock.call_count, 3)
+        self.assertNotIn('box_score_hash', upsert_mock.call_args_list[1][0][0][0])
+        self.assertEqual(upsert_mock.call_args_list[2][0][0][0]['game_id'], '2')
+
+        self.crawler.select_all = MagicMock(return_value=[{'game_id': '1', 'status': 'finished'}])
+        self.assertEqual(list(self.crawler.load_stored_games()), ['1'])
+        self.assertNotIn('box_score_hash', self.crawler.select_all.call_args_list[0][0][1])
+
+    def test_stored_games_without_box_score_hash(self):
+        """Test that the stored games of an unmigrated database still load"""
+        def select_all(table, columns, **filters):
+            if 'box_score_hash' in columns:
+                raise Exception("column games.box_score_hash does not exist")
+            return [{'game_id': '1', 'status': 'finished'}] if table == 'games' else [{'game_id': '1'}]
+
+        self.crawler.select_all = MagicMock(side_effect=select_all)
+        self.assertTrue(self.crawler.load_stored_games()['1']['has_box_scores'])
+
+    def test_select_all_pages_through_results(self):
+        """Test that select_all keeps paging until a short page arrives"""
+        query = MagicMock()
+        query.eq.return_value = query
+        query.order.return_value = query
+        query.range.return_value.execute.side_effect = [
+            MagicMock(data=[{'game_id': '1'}, {'game_id': '2'}]),
+            MagicMock(data=[{'game_id': '3'}]),
+        ]
+        self.crawler.supabase.table.return_value.select.return_value = query
+
+        rows = self.crawler.select_all('box_scores', 'game_id', page_size=2, league_id='123')
+
+        self.assertEqual([row['game_id'] for row in rows], ['1', '2', '3'])
+        query.range.assert_any_call(2, 3)
+        # Every page is ordered by the full box_scores key
+        self.assertEqual([c.args[0] for c in query.order.call_args_list],
+                         ['game_id', 'team_id', 'player_first_name', 'player_last_name'] * 2)
+
+
+class TestPageHash(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.crawler = BasketballBundCrawler()
+        self.crawler.parse_box_score_data = MagicMock(
+            return_value=([{'game_id': '1', 'points': 10}], ('1', QUARTERS))
+        )
+        self.page = b"<html>box score</html>"
+        self.page_hash = hashlib.sha256(self.page).hexdigest()
+
+    def test_unchanged_page_is_not_parsed(self):
+        """Test that a page with the stored hash skips parsing and writes"""
+        self.crawler.stored_games = {'1': stored_game('1', page_hash=self.page_hash)}
+        game = make_game(1)
+
+        entries, qs_update = self.crawler.process_box_score_page(self.page, '1', game)
+
+        self.assertEqual((entries, qs_update), ([], None))
+        self.crawler.parse_box_score_data.assert_not_called()
+        self.assertEqual(game.quarter_scores, QUARTERS)
+        self.assertEqual(game.box_score_hash, self.page_hash)
+        self.assertEqual((self.crawler.page_hash_hits, self.crawler.page_hash_misses), (1, 0))
+
+    def test_changed_page_is_parsed_and_hashed(self):
+        """Test that a changed page is parsed and its new hash recorded"""
+        self.crawler.stored_games = {'1': stored_game('1', page_hash='outdated')}
+        game = make_game(1)
+
+        entries, _ = self.crawler.process_box_score_page(self.page, '1', game)
+
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(game.box_score_hash, self.page_hash)
+        self.assertEqual((self.crawler.page_hash_hits, self.crawler.page_hash_misses), (0, 1))
+
+    def test_same_hash_without_box_scores_is_parsed(self):
+        """Test that a matching hash does not skip games whose rows are missing"""
+        self.crawler.stored_games = {'1': dict(stored_game('1', page_hash=self.page_hash), has_box_scores=False)}
+
+        entries, _ = self.crawler.process_box_score_page(self.page, '1', make_game(1))
+
+        self.assertEqual(len(entries), 1)
+
+    def test_hash_is_written_with_game_row(self):
+        """Test that transform_games_data carries the page hash"""
+        game = make_game(1)
+        game.box_score_hash = self.page_hash
+        self.assertEqual(self.crawler.transform_games_data([game])[0]['box_score_hash'], self.page_hash)
+
+if __name__ == '__main__':
+    unittest.main()
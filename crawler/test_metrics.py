@@ -0,0 +1,109 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.metrics import Histogram, Metrics, metrics_trends
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles_interpolate_inside_buckets(self):
+        """Test that quantiles are estimated from the bucket counts"""
+        histogram = Histogram(buckets=(0.1, 0.2, float('inf')))
+        for value in (0.05, 0.05, 0.15, 0.15):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 2, 0])
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.1)
+        self.assertAlmostEqual(histogram.quantile(0.75), 0.15)
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_spans_record_phases_and_errors(self):
+        """Test that spans add up per phase and mark failed phases"""
+        with self.metrics.span('store', league='49400'):
+            pass
+        with self.assertRaises(ValueError):
+            with self.metrics.span('store', league='49400'):
+                raise ValueError("write failed")
+
+        self.assertEqual([span['error'] for span in self.metrics.spans], [False, True])
+        self.assertEqual(set(self.metrics.phase_seconds(league='49400')), {'store'})
+        self.assertEqual(self.metrics.phase_seconds(league='1'), {})
+
+    def test_summary_is_per_league(self):
+        """Test that the scrape_log summary only counts the league's own rows and parses"""
+        self.metrics.observe('http_request_seconds', 0.2)
+        self.metrics.inc('http_bytes_received_total', 5000)
+        self.metrics.observe('parse_seconds', 0.004, league='49400')
+        self.metrics.observe('parse_seconds', 0.5, league='1')
+        self.metrics.inc('rows_written_total', 12, table='games', league='49400')
+        self.metrics.inc('rows_written_total', 3, table='games', league='1')
+        self.metrics.inc('store_retries_total', league='49400')
+
+        summary = self.metrics.summary(league='49400')
+
+        self.assertEqual(summary['http']['requests'], 1)
+        self.assertEqual(summary['http']['bytes'], 5000)
+        self.assertEqual(summary['parse'], {'pages': 1, 'avg_ms': 4.0})
+        self.assertEqual(summary['rows'], {'games': 12})
+        self.assertEqual(summary['retries'], 1)
+        json.dumps(summary)
+
+    def test_exports(self):
+        """Test the JSON and Prometheus textfile exports"""
+        self.metrics.observe('http_request_seconds', 0.03)
+        self.metrics.inc('rows_written_total', 2, table='games', league='49400')
+        with self.metrics.span('fetch', league='49400'):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'metrics.json')
+            prom_path = os.path.join(tmp, 'textfile', 'crawler.prom')
+            self.metrics.write_json(json_path)
+            self.metrics.write_prometheus(prom_path)
+
+            with open(json_path) as f:
+                snapshot = json.load(f)
+            with open(prom_path) as f:
+                text = f.read()
+
+        self.assertEqual(snapshot['spans'][0]['name'], 'fetch')
+        self.assertEqual(snapshot['histograms'][0]['buckets']['0.05'], 1)
+        self.assertIn('# TYPE crawler_rows_written_total counter', text)
+        self.assertIn('crawler_rows_written_total{league="49400",table="games"} 2', text)
+        self.assertIn('crawler_http_request_seconds_bucket{le="0.05"} 1', text)
+        self.assertIn('crawler_http_request_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('crawler_phase_seconds{league="49400",phase="fetch"}', text)
+
+
+class TestMetricsTrends(unittest.TestCase):
+    def test_latest_run_against_median(self):
+        """Test that the newest run is compared with the median of the earlier ones"""
+        summaries = [
+            {'phases': {'fetch': 30.0}, 'http': {'p95_ms': 400.0}},
+            {'phases': {'fetch': 10.0}, 'http': {'p95_ms': 200.0}},
+            None,
+            {'phases': {'fetch': 12.0}},
+            {'phases': {'fetch': 14.0}, 'http': {'p95_ms': 200.0}}
+        ]
+        lines = metrics_trends(summaries)
+
+        self.assertIn('fetch s: 30 (median of 3 earlier runs 12, +150%)', lines)
+        self.assertIn('http p95 ms: 400 (median of 2 earlier runs 200, +100%)', lines)
+        self.assertEqual(metrics_trends(summaries[:1]), [])
+        # Watch mode writes are not runs to compare with
+        watch = {'phases': {'watch_store': 2.0}, 'http': {'p95_ms': 90.0}, 'mode': 'watch'}
+        self.assertEqual(metrics_trends([watch] + summaries), lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.multi_league import MultiLeagueCrawler, resolve_targets, spool_path_for
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '49400'
+}
+
+SEASONS = [
+    {'id': 1, 'name': '2024/25', 'league_id': '40000', 'our_team_id': '1', 'start_date': '2024-08-01'},
+    {'id': 2, 'name': '2025/26', 'league_id': '49400', 'our_team_id': '168416', 'start_date': '2025-08-01'},
+    {'id': 3, 'name': 'U18 2025/26', 'league_id': '51000', 'our_team_id': '7', 'start_date': '2025-08-01'},
+]
+
+
+def seasons_client():
+    """Supabase stand-in answering seasons queries filtered with in_()"""
+    supabase = MagicMock()
+
+    def in_(column, values):
+        query = MagicMock()
+        query.execute.return_value.data = [row for row in SEASONS if row[column] in values]
+        return query
+
+    supabase.table.return_value.select.return_value.in_.side_effect = in_
+    return supabase
+
+
+class TestResolveTargets(unittest.TestCase):
+    def test_seasons_and_leagues(self):
+        """Test that names and league ids map to season rows, unknown leagues stay bare"""
+        targets = resolve_targets(seasons_client(), ['2024/25'], ['51000', '77777', '40000'])
+        self.assertEqual([(t['league_id'], t.get('id')) for t in targets],
+                         [('40000', 1), ('51000', 3), ('77777', None)])
+
+    def test_unknown_season(self):
+        """Test that a misspelled season name is an error"""
+        with self.assertRaises(ValueError):
+            resolve_targets(seasons_client(), ['2030/31'])
+
+    def test_spool_path_per_target(self):
+        """Test that each target gets its own spool file"""
+        self.assertEqual(spool_path_for('/tmp/spool.json', SEASONS[0]), '/tmp/spool.40000-1.json')
+        self.assertEqual(spool_path_for('/tmp/spool', {'league_id': '77777'}), '/tmp/spool.77777.json')
+        self.assertIsNone(spool_path_for(None, SEASONS[0]))
+
+
+class TestMultiLeagueCrawler(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.base = BasketballBundCrawler(parse_workers=0, request_interval=0.25, spool_path='/tmp/spool.json')
+
+    def test_crawlers_share_resources(self):
+        """Test that per-league crawlers share client, transport and rate budget"""
+        multi = MultiLeagueCrawler(self.base, SEASONS[1:])
+        crawlers = [crawler for _, crawler in multi.crawlers]
+
+        self.assertEqual([c.league_id for c in crawlers], ['49400', '51000'])
+        self.assertEqual([c.season_id for c in crawlers], [2, 3])
+        self.assertEqual(crawlers[1].our_team_id, '7')
+        for crawler in crawlers:
+            self.assertIs(crawler.supabase, self.base.supabase)
+            self.assertIs(crawler.transport, self.base.transport)
+            self.assertIs(crawler.rate_limiter, self.base.rate_limiter)
+            self.assertEqual(crawler.request_interval, 0.25)
+        # Fetch and write state is per league
+        self.assertIsNot(crawlers[0].change_detector, crawlers[1].change_detector)
+        self.assertEqual(crawlers[1].spool_path, '/tmp/spool.51000-3.json')
+
+    def test_failed_league_does_not_stop_others(self):
+        """Test that every league runs and failures are reported at the end"""
+        ran = []
+
+        def run(crawler):
+            ran.append(crawler.league_id)
+            if crawler.league_id == '49400':
+                raise Exception("Supabase unavailable")
+
+        with patch.object(BasketballBundCrawler, 'run', autospec=True, side_effect=run):
+            with self.assertRaises(RuntimeError) as context:
+                MultiLeagueCrawler(self.base, SEASONS, max_parallel=3).run()
+
+        self.assertEqual(sorted(ran), ['40000', '49400', '51000'])
+        self.assertIn('49400/2', str(context.exception))
+        self.assertNotIn('51000', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import tempfile
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler, ROW_KEYS
+from crawler.change_detection import FINGERPRINT_COLUMN
+from crawler.page_archive import PageArchive
+from crawler.records import Game
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '49400'
+}
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'box_scores')
+
+
+def make_game(match_id):
+    return Game.from_api({
+        'matchId': match_id, 'result': '80:70', 'ergebnisbestaetigt': True,
+        'homeTeam': {'teamPermanentId': 153170}, 'guestTeam': {'teamPermanentId': 168416}
+    })
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class TestPageArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(self.directory.name)
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def test_stores_identical_pages_once(self):
+        """Test that refetches of an unchanged page only add an index row"""
+        page = load_fixture('game_regular.html')
+        game = make_game(1)
+        game.quarter_scores = {'q': 1}
+        first = self.archive.add('1', '49400', None, game, page)
+        second = self.archive.add('1', '49400', None, game, page)
+        self.archive.add('2', '49400', None, make_game(2), load_fixture('game_small.html'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.archive.read(first), page)
+        self.assertLess(os.path.getsize(self.archive.object_path(first)), len(page))
+        stats = self.archive.stats()
+        self.assertEqual((stats['fetches'], stats['games'], stats['pages']), (3, 2, 2))
+        # Derived fields are not archived, the game is kept as the spielplan reported it
+        archived = self.archive.latest('49400')[0]['game']
+        self.assertNotIn('quarter_scores', archived)
+        self.assertEqual(Game.from_dict(archived), make_game(1))
+
+    def test_latest_fetch_per_game(self):
+        old, new = load_fixture('game_small.html'), load_fixture('game_regular.html')
+        with patch('crawler.page_archive.time.time', side_effect=[100.0, 200.0, 300.0]):
+            self.archive.add('1', '49400', None, make_game(1), old)
+            new_hash = self.archive.add('1', '49400', None, make_game(1), new)
+            self.archive.add('1', '51234', 7, make_game(1), old)
+
+        latest = self.archive.latest('49400')
+        self.assertEqual([(page['game_id'], page['page_hash']) for page in latest], [('1', new_hash)])
+        self.assertEqual(len(self.archive.history('1')), 3)
+        self.assertEqual(self.archive.latest('49400', game_ids=['2']), [])
+
+
+class TestReparse(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(self.directory.name)
+        self.crawler = self.make_crawler()
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def make_crawler(self, mock_create_client, stored=None):
+        mock_create_client.return_value = MagicMock()
+        crawler = BasketballBundCrawler(parse_workers=0)
+        crawler.change_detector.load_stored = MagicMock(side_effect=lambda table, key_columns: (stored or {}).get(table, {}))
+        crawler.upsert_games = MagicMock()
+        crawler.upsert_box_scores = MagicMock()
+        crawler.page_archive = self.archive
+        return crawler
+
+    def test_fetched_pages_are_archived(self):
+        """Test that pages are archived even when the stored hash says they are unchanged"""
+        page = load_fixture('game_regular.html')
+        game = make_game(1)
+        self.crawler.process_box_score_page(page, '1', game)
+        self.crawler.stored_games = {'1': {'has_box_scores': True, 'box_score_hash': game.box_score_hash}}
+        self.crawler.process_box_score_page(page, '1', make_game(1))
+
+        self.assertEqual(self.archive.stats()['fetches'], 2)
+
+    def test_reparse_writes_only_changed_rows(self):
+        """Test that a reparse rebuilds the rows offline and upserts only the differing ones"""
+        self.archive.add('1', '49400', None, make_game(1), load_fixture('game_regular.html'))
+        self.archive.add('2', '49400', None, make_game(2), load_fixture('game_small.html'))
+
+        changed = self.crawler.reparse_archive(self.archive)
+        games = self.crawler.upsert_games.call_args[0][0]
+        box_scores = self.crawler.upsert_box_scores.call_args[0][0]
+        self.assertEqual(changed, {'games': 2, 'box_scores': len(box_scores)})
+        self.assertEqual({game['box_score_hash'] for game in games}, {page['page_hash'] for page in self.archive.latest('49400')})
+
+        # The stored rows match the reparse except one box score row
+        stored = {
+            table: {tuple(str(row.get(column)) for column in ROW_KEYS[table]): row[FINGERPRINT_COLUMN] for row in rows}
+            for table, rows in (('games', games), ('box_scores', box_scores))
+        }
+        stale_key = next(iter(stored['box_scores']))
+        stored['box_scores'][stale_key] = 'stale'
+
+        crawler = self.make_crawler(stored=stored)
+        changed = crawler.reparse_archive(self.archive)
+
+        self.assertEqual(changed, {'games': 0, 'box_scores': 1})
+        crawler.upsert_games.assert_not_called()
+        written = crawler.upsert_box_scores.call_args[0][0]
+        self.assertEqual([tuple(str(row[column]) for column in ROW_KEYS['box_scores']) for row in written], [stale_key])
+
+    def test_dry_run_writes_nothing(self):
+        self.archive.add('1', '49400', None, make_game(1), load_fixture('game_regular.html'))
+        changed = self.crawler.reparse_archive(self.archive, dry_run=True)
+
+        self.assertEqual(changed['games'], 1)
+        self.crawler.upsert_games.assert_not_called()
+        self.crawler.upsert_box_scores.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
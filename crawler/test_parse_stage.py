@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import box_score_parser
+from crawler.main import BasketballBundCrawler
+from crawler.records import Game
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'box_scores')
+PAGES = ['game_regular.html', 'game_large_rosters.html', 'game_no_quarters.html', 'game_small.html']
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '49400'
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def make_game(match_id):
+    return Game.from_api({
+        'matchId': match_id,
+        'result': '80:70',
+        'homeTeam': {'teamPermanentId': 153170},
+        'guestTeam': {'teamPermanentId': 168416},
+    })
+
+
+class TestParseStage(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def make_crawler(self, mock_create_client, **kwargs):
+        mock_create_client.return_value = MagicMock()
+        return BasketballBundCrawler(fetch_mode='sync', request_interval=0, **kwargs)
+
+    def fetch_all(self, crawler):
+        pages = {str(index + 1): load_fixture(name) for index, name in enumerate(PAGES)}
+        games = [make_game(int(game_id)) for game_id in pages]
+        crawler.download_box_score = lambda game_id: pages[game_id]
+        return crawler.fetch_box_scores(games), games
+
+    def test_process_pool_matches_inline(self):
+        """Test that pooled parsing returns the inline results in game order"""
+        pooled, pooled_games = self.fetch_all(self.make_crawler(parse_workers=2))
+        inline, inline_games = self.fetch_all(self.make_crawler(parse_workers=0))
+
+        self.assertTrue(pooled)
+        self.assertEqual(pooled, inline)
+        self.assertEqual(pooled_games, inline_games)
+        # Hashes and quarter scores are attached in the parent process
+        self.assertTrue(all(game.box_score_hash for game in pooled_games))
+        self.assertIsNotNone(pooled_games[0].quarter_scores)
+
+    def test_parse_pool_lifetime(self):
+        """Test that the pool only exists while box scores are fetched"""
+        crawler = self.make_crawler(parse_workers=2)
+        with crawler.parse_stage():
+            self.assertIsNotNone(crawler.parse_pool)
+        self.assertIsNone(crawler.parse_pool)
+
+        # The soup engine always parses inline
+        crawler = self.make_crawler(parse_workers=2, parser_engine='soup')
+        with crawler.parse_stage():
+            self.assertIsNone(crawler.parse_pool)
+
+    def test_parser_backend_option(self):
+        """Test that html.parser is the default backend and unknown backends are rejected"""
+        crawler = self.make_crawler(parse_workers=0)
+        self.assertEqual(crawler.parser_backend, 'html.parser')
+        with patch.object(box_score_parser, 'parse_box_score', return_value=([], None)) as parse:
+            crawler.collect_box_score_page('1', make_game(1), crawler.submit_box_score_page(b'', '1', make_game(1)))
+        self.assertEqual(parse.call_args.args[-1], 'html.parser')
+
+        with self.assertRaises(ValueError):
+            self.make_crawler(parser_backend='regex')
+
+    def test_worker_error_is_contained(self):
+        """Test that a failing parse only loses that game's box score"""
+        crawler = self.make_crawler(parse_workers=0)
+        with patch.object(box_score_parser, 'parse_box_score', side_effect=ValueError('broken page')):
+            job = crawler.submit_box_score_page(b'<html></html>', '1', make_game(1))
+            game = make_game(1)
+            self.assertEqual(crawler.collect_box_score_page('1', game, job), ([], None))
+        self.assertIsNone(game.box_score_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
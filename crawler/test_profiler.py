@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.metrics import Metrics
+from crawler.profiler import Profiler
+
+
+def busy_parse(seconds):
+    pages = [bytearray(1000) for _ in range(2000)]
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(len(page) for page in pages[:50])
+    return pages
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.profiler = Profiler(interval=0.001)
+        self.metrics.observers.append(self.profiler)
+
+    def run_phases(self):
+        self.profiler.start()
+        try:
+            with self.metrics.span('fetch', league='49400'):
+                with self.metrics.span('box_scores', league='49400'):
+                    pages = busy_parse(0.2)
+        finally:
+            self.profiler.stop()
+        return pages
+
+    def test_samples_are_attributed_to_the_innermost_phase(self):
+        """Test that hot functions show up under the phase that ran them"""
+        self.run_phases()
+
+        stacks = self.profiler.collapsed().splitlines()
+        self.assertTrue(stacks)
+        self.assertTrue(any(line.startswith('box_scores[49400];MainThread;') and 'test_profiler.py:busy_parse' in line
+                            for line in stacks))
+        hot = self.profiler.hot_functions()
+        self.assertEqual(hot[0][0], 'box_scores[49400]')
+        self.assertTrue(hot[0][1].startswith('test_profiler.py:busy_parse'))
+
+    def test_parallel_leagues_keep_their_samples(self):
+        """Test that each thread's samples go to the spans open in that thread"""
+        started = threading.Barrier(2)
+
+        def crawl(league):
+            with self.metrics.span('box_scores', league=league):
+                started.wait()
+                busy_parse(0.2)
+
+        self.profiler.alloc_frames = 0
+        self.profiler.start()
+        try:
+            threads = [threading.Thread(target=crawl, args=(league,), name=f'league-{league}')
+                       for league in ('49400', '51234')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.profiler.stop()
+
+        phases = {}
+        for line in self.profiler.collapsed().splitlines():
+            phase, thread = line.split(';')[:2]
+            if thread.startswith('league-') and 'test_profiler.py:busy_parse' in line:
+                phases.setdefault(thread, set()).add(phase)
+        self.assertEqual(phases, {'league-49400': {'box_scores[49400]'}, 'league-51234': {'box_scores[51234]'}})
+        self.assertEqual(self.profiler.open_spans, {})
+
+    def test_allocations_per_phase(self):
+        """Test that every phase gets its peak and top allocation sites, written next to each other"""
+        pages = self.run_phases()
+
+        self.assertEqual([phase['phase'] for phase in self.profiler.allocations], ['box_scores[49400]', 'fetch[49400]'])
+        box_scores = self.profiler.allocations[0]
+        self.assertGreater(box_scores['peak_bytes'], len(pages) * 1000)
+        self.assertIn('test_profiler.py', box_scores['top'][0][0])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.profiler.write(tmp, prefix='run')
+            self.assertEqual([os.path.basename(path) for path in paths], ['run.collapsed', 'run-memory.txt'])
+            with open(paths[1]) as f:
+                self.assertIn('== box_scores[49400]', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
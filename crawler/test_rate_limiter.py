@@ -1,4 +1,6 @@
 import unittest
+import asyncio
+import threading
 import time
 import sys
 import os
@@ -6,7 +8,7 @@ import os
 # Add repo root to path to allow importing from crawler.main
 sys.path.append(os.getcwd())
 
-from crawler.rate_limiter import RateLimiter
+from crawler.rate_limiter import RateLimiter, parse_retry_after
 
 class TestRateLimiter(unittest.TestCase):
     def test_rate_limiter_interval(self):
@@ -55,5 +57,131 @@ class TestRateLimiter(unittest.TestCase):
         # Should not be significantly more than expected (no extra sleeps)
         self.assertLess(elapsed, expected_time + 0.1)
 
+class TestAsyncWait(unittest.TestCase):
+    def test_shared_budget_across_tasks(self):
+        """Test that concurrent tasks together respect one minimum interval"""
+        interval = 0.05
+        tasks_count = 5
+
+        async def run():
+            rate_limiter = RateLimiter(min_interval=interval)
+            starts = []
+
+            async def worker():
+                await rate_limiter.wait_async()
+                starts.append(time.monotonic())
+
+            await asyncio.gather(*(worker() for _ in range(tasks_count)))
+            return sorted(starts)
+
+        starts = asyncio.run(run())
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+
+        # Small tolerance for timer resolution
+        for gap in gaps:
+            self.assertGreaterEqual(gap, interval - 0.01)
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst(self):
+        """Test that a burst starts at once and later callers are spaced"""
+        rate_limiter = RateLimiter(min_interval=10, burst=3)
+        waits = [rate_limiter.reserve() for _ in range(4)]
+
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 10, delta=0.1)
+
+    def test_shared_by_threads_and_tasks(self):
+        """Test that threads and asyncio tasks draw from one budget"""
+        interval = 0.03
+        rate_limiter = RateLimiter(min_interval=interval)
+        starts = []
+        lock = threading.Lock()
+
+        def thread_worker():
+            rate_limiter.wait()
+            with lock:
+                starts.append(time.monotonic())
+
+        async def task_worker():
+            await rate_limiter.wait_async()
+            with lock:
+                starts.append(time.monotonic())
+
+        async def run_tasks():
+            await asyncio.gather(*(task_worker() for _ in range(3)))
+
+        threads = [threading.Thread(target=thread_worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        asyncio.run(run_tasks())
+        for thread in threads:
+            thread.join()
+
+        starts.sort()
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        self.assertEqual(len(starts), 6)
+        for gap in gaps:
+            self.assertGreaterEqual(gap, interval - 0.01)
+
+    def test_stats(self):
+        """Test that rate and wait times are reported"""
+        rate_limiter = RateLimiter(min_interval=0.5)
+        rate_limiter.reserve()
+        rate_limiter.reserve()
+
+        stats = rate_limiter.stats()
+        self.assertEqual(stats['rate'], 2.0)
+        self.assertEqual(stats['waits'], 2)
+        self.assertAlmostEqual(stats['max_wait'], 0.5, delta=0.05)
+        self.assertAlmostEqual(stats['avg_wait'], 0.25, delta=0.05)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def test_throttling_backs_off(self):
+        """Test that 429/503 double the interval up to max_interval"""
+        rate_limiter = RateLimiter(min_interval=0.5, adaptive=True, max_interval=1.5)
+        rate_limiter.record_response(429, 0.1)
+        self.assertEqual(rate_limiter.interval, 1.0)
+        rate_limiter.record_response(503, 0.1)
+        self.assertEqual(rate_limiter.interval, 1.5)
+        self.assertEqual(rate_limiter.stats()['throttled'], 2)
+
+    def test_retry_after_pauses_bucket(self):
+        """Test that Retry-After holds back the next slot"""
+        rate_limiter = RateLimiter(min_interval=0.01, adaptive=True)
+        rate_limiter.record_response(429, 0.1, retry_after='5')
+        self.assertAlmostEqual(rate_limiter.reserve(), 5, delta=0.1)
+
+    def test_healthy_responses_relax_to_floor(self):
+        """Test that fast responses shrink the interval down to the floor"""
+        rate_limiter = RateLimiter(min_interval=1.0, adaptive=True, floor_interval=0.25)
+        for _ in range(100):
+            rate_limiter.record_response(200, 0.1)
+        self.assertEqual(rate_limiter.interval, 0.25)
+
+    def test_rising_latency_tightens(self):
+        """Test that latency well above the baseline widens the interval"""
+        rate_limiter = RateLimiter(min_interval=1.0, adaptive=True, floor_interval=0.25)
+        for _ in range(5):
+            rate_limiter.record_response(200, 0.1)
+        relaxed = rate_limiter.interval
+        for _ in range(5):
+            rate_limiter.record_response(200, 1.0)
+        self.assertGreater(rate_limiter.interval, relaxed)
+
+    def test_fixed_rate_ignores_responses(self):
+        """Test that a non-adaptive limiter keeps its interval"""
+        rate_limiter = RateLimiter(min_interval=0.5)
+        rate_limiter.record_response(429, 0.1, retry_after='5')
+        self.assertEqual(rate_limiter.interval, 0.5)
+        self.assertEqual(rate_limiter.reserve(), 0)
+
+    def test_parse_retry_after(self):
+        """Test delta-seconds, HTTP dates and garbage"""
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import os
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler, aiohttp
+from crawler.cassette import Cassette
+from crawler.replay_server import ReplayServer
+from crawler.records import Game
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'box_scores')
+LIVE = 'https://www.basketball-bund.net'
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '49400'
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def box_score_path(game_id):
+    return f"{LIVE}/public/ergebnisDetails.jsp?type=1&spielplan_id={game_id}&liga_id=49400&defaultview=1"
+
+
+def make_cassette():
+    cassette = Cassette()
+    cassette.record('POST', f"{LIVE}/rest/competition/list", [49400], 200, 'application/json',
+                    json.dumps({'status': '0', 'data': {'name': 'Bezirksliga'}}).encode())
+    cassette.record('GET', box_score_path(1), None, 200, 'text/html; charset=utf-8', load_fixture('game_regular.html'))
+    cassette.record('GET', box_score_path(2), None, 200, 'text/html', load_fixture('game_small.html'))
+    return cassette
+
+
+def make_game(match_id):
+    return Game.from_api({
+        'matchId': match_id,
+        'result': '80:70',
+        'homeTeam': {'teamPermanentId': 153170},
+        'guestTeam': {'teamPermanentId': 168416},
+    })
+
+
+class TestCassette(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that bodies survive saving byte-identically, also non-UTF-8 pages"""
+        cassette = make_cassette()
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('cassette.json', 'cassette.json.gz'):
+                path = os.path.join(tmp, name)
+                cassette.save(path)
+                loaded = Cassette.load(path)
+                self.assertEqual(len(loaded), 3)
+                status, content_type, content = loaded.lookup('GET', box_score_path(2))
+                self.assertEqual((status, content), (200, load_fixture('game_small.html')))
+
+    def test_key_ignores_host_and_query_order(self):
+        """Test that a recorded request matches under another base URL"""
+        cassette = make_cassette()
+        self.assertIsNotNone(cassette.lookup(
+            'GET', 'http://127.0.0.1:8765/public/ergebnisDetails.jsp?liga_id=49400&spielplan_id=1&type=1&defaultview=1'
+        ))
+        self.assertIsNotNone(cassette.lookup('POST', '/rest/competition/list', b'[49400]'))
+        self.assertIsNone(cassette.lookup('POST', '/rest/competition/list', b'[1]'))
+
+
+class TestReplayServer(unittest.TestCase):
+    def test_replays_recorded_responses(self):
+        """Test GET/POST replay and 404 for unknown requests"""
+        with ReplayServer(make_cassette()) as server:
+            request = urllib.request.Request(f"{server.base_url}/rest/competition/list", data=b'[49400]',
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request) as response:
+                self.assertEqual(json.load(response)['data']['name'], 'Bezirksliga')
+
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f"{server.base_url}/rest/unknown")
+            self.assertEqual(context.exception.code, 404)
+            self.assertEqual(server.stats()['not_found'], 1)
+
+    def test_error_injection(self):
+        """Test that injected errors carry the configured status and Retry-After"""
+        with ReplayServer(make_cassette(), error_rate=1.0, error_status=429, retry_after=3) as server:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(f"{server.base_url}/rest/competition/list", data=b'[49400]')
+            self.assertEqual(context.exception.code, 429)
+            self.assertEqual(context.exception.headers['Retry-After'], '3')
+            self.assertEqual(server.stats()['errors_injected'], 1)
+
+    @unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def test_async_fetch_phase_against_replay(self, mock_create_client):
+        """Test the async engine end-to-end against the stand-in"""
+        mock_create_client.return_value = MagicMock()
+        with ReplayServer(make_cassette(), latency=0.02) as server:
+            crawler = BasketballBundCrawler(base_url=server.base_url, fetch_mode='async', max_concurrency=2,
+                                            request_interval=0, parse_workers=0)
+            box_scores = crawler.fetch_box_scores([make_game(1), make_game(2), make_game(3)])
+
+            self.assertEqual(crawler.box_score_url(1).split('/public')[0], server.base_url)
+            self.assertEqual(len({entry.game_id for entry in box_scores}), 2)
+            self.assertEqual(server.stats()['requests'], 3)
+            self.assertEqual(server.stats()['not_found'], 1)
+            self.assertEqual(crawler.transport.stats()['requests'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import os
+import sys
+import tempfile
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.spool import save_spool, load_spool, discard_spool
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '123'
+}
+
+DATA = {
+    'league_id': '123',
+    'scraped_at': '2026-10-16T02:00:00+00:00',
+    'league_details': {},
+    'teams': [{'team_id': '1', 'name': 'Home', 'league_id': '123'}],
+    'games': [{'matchId': 7, 'result': '80:70', 'homeTeam': {'teamPermanentId': 1}, 'guestTeam': {'teamPermanentId': 2}}],
+    'standings': [{'team': {'teamPermanentId': 1, 'teamname': 'Home'}, 'rang': 1}],
+    'box_scores': [{'game_id': '7', 'team_id': '1', 'player_last_name': 'Müller', 'player_first_name': 'Marius'}],
+    'streamed_box_scores': 0
+}
+
+
+class TestSpool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'spool', 'crawler-spool.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        """Test that a spooled payload is loaded for the same league and season"""
+        save_spool(self.path, DATA, season_id=3)
+        self.assertEqual(load_spool(self.path, '123', season_id=3), DATA)
+
+        discard_spool(self.path)
+        self.assertIsNone(load_spool(self.path, '123', season_id=3))
+        discard_spool(self.path)
+
+    def test_rejects_other_league_stale_or_broken(self):
+        """Test that unusable spools are ignored"""
+        save_spool(self.path, DATA, season_id=3)
+        self.assertIsNone(load_spool(self.path, '999', season_id=3))
+        self.assertIsNone(load_spool(self.path, '123', season_id=4))
+        self.assertIsNone(load_spool(self.path, '123', season_id=3, max_age=-1))
+
+        with open(self.path, 'w') as f:
+            f.write('{"truncated": ')
+        self.assertIsNone(load_spool(self.path, '123', season_id=3))
+
+
+class TestCheckpointedStore(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.crawler = BasketballBundCrawler(diff_writes=False)
+        self.crawler.test_supabase_connection = MagicMock()
+        self.crawler.assign_tsv_game_numbers = MagicMock()
+        self.writes = []
+        self.box_score_failures = 1
+
+        def upsert_box_scores(rows):
+            if self.box_score_failures:
+                self.box_score_failures -= 1
+                raise Exception("timeout")
+            self.writes.append('box_scores')
+
+        self.crawler.upsert_teams = lambda rows: self.writes.append('teams')
+        self.crawler.upsert_games = lambda rows: self.writes.append('games')
+        self.crawler.upsert_standings = lambda rows: self.writes.append('standings')
+        self.crawler.upsert_box_scores = upsert_box_scores
+
+    @patch('crawler.main.time.sleep')
+    def test_retry_resumes_failed_table(self, mock_sleep):
+        """Test that a retry only writes the table that failed"""
+        self.assertTrue(self.crawler.store_data(json.loads(json.dumps(DATA))))
+
+        self.assertEqual(sorted(self.writes), ['box_scores', 'games', 'standings', 'teams'])
+        self.assertEqual(self.crawler.test_supabase_connection.call_count, 1)
+        self.assertEqual(self.crawler.assign_tsv_game_numbers.call_count, 1)
+        mock_sleep.assert_called_once_with(5)
+        self.crawler.supabase.table('scrape_log').insert.assert_called_once()
+
+    @patch('crawler.main.time.sleep')
+    def test_run_resumes_from_spool(self, mock_sleep):
+        """Test that run() stores a spooled payload without fetching"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'spool.json')
+            save_spool(path, DATA, self.crawler.season_id)
+            self.crawler.spool_path = path
+            self.crawler.fetch_league_data = MagicMock()
+            self.crawler.log_transport_stats = MagicMock()
+
+            self.crawler.run()
+
+            self.crawler.fetch_league_data.assert_not_called()
+            self.assertIn('box_scores', self.writes)
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+import threading
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.records import Game
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '123'
+}
+
+
+def make_game(match_id):
+    return Game.from_api({
+        'matchId': match_id,
+        'result': '80:70',
+        'homeTeam': {'teamPermanentId': 1, 'teamname': 'Home'},
+        'guestTeam': {'teamPermanentId': 2, 'teamname': 'Guest'},
+    })
+
+
+def fake_parse(content, game_id, game_data):
+    """Two players per game"""
+    entries = [
+        {'game_id': game_id, 'team_id': '1', 'player_last_name': f'Player{n}', 'player_first_name': 'A', 'points': n}
+        for n in range(2)
+    ]
+    return entries, (game_id, {'first_quarter_home': int(game_id)})
+
+
+class AsyncNullContext:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class TestBoxScoreStreaming(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.crawler = BasketballBundCrawler(fetch_mode='sync', request_interval=0, parse_workers=0,
+                                             stream_chunk_size=3)
+        self.crawler.test_supabase_connection = MagicMock()
+        self.crawler.download_box_score = lambda game_id: f'page-{game_id}'.encode()
+        self.crawler.parse_box_score_data = fake_parse
+        self.writes = []
+        self.crawler.upsert_teams = lambda rows: self.writes.append(('teams', len(rows)))
+        self.crawler.upsert_games = lambda rows: self.writes.append(('games', [r['game_id'] for r in rows]))
+        self.crawler.upsert_box_scores = lambda rows: self.writes.append(('box_scores', len(rows)))
+
+    def test_chunks_are_written_during_the_crawl(self):
+        """Test that entries are upserted in chunks, games before their box scores"""
+        games = [make_game(n) for n in range(1, 6)]
+        leftover = self.crawler.fetch_box_scores(games, teams=[{'team_id': '1'}, {'team_id': '2'}])
+
+        self.assertEqual(leftover, [])
+        self.assertEqual(self.crawler.streamed_box_scores, 10)
+        self.assertEqual(self.writes, [
+            ('teams', 2),
+            ('games', ['1', '2']), ('box_scores', 4),
+            ('games', ['3', '4']), ('box_scores', 4),
+            ('games', ['5']), ('box_scores', 2),
+        ])
+        # Quarter scores still reach the game objects for the final games upsert
+        self.assertEqual(games[4].quarter_scores, {'first_quarter_home': 5})
+
+    def test_failed_chunk_is_deferred(self):
+        """Test that a chunk that cannot be written is returned for store_data"""
+        def upsert_box_scores(rows):
+            if not self.writes.count(('failed', 1)):
+                self.writes.append(('failed', 1))
+                raise Exception("request entity too large")
+            self.writes.append(('box_scores', len(rows)))
+        self.crawler.upsert_box_scores = upsert_box_scores
+
+        leftover = self.crawler.fetch_box_scores([make_game(n) for n in range(1, 4)])
+
+        self.assertEqual(len(leftover), 4)
+        self.assertEqual({e['game_id'] for e in leftover}, {'1', '2'})
+        self.assertEqual(self.crawler.streamed_box_scores, 2)
+
+    def test_async_flushes_run_off_the_event_loop(self):
+        """Test that the async engine writes stream chunks outside the event loop thread"""
+        async def fetch_single_game_box_score_async(session, game_id, game_data):
+            return fake_parse(b'', game_id, game_data)
+        self.crawler.fetch_mode = 'async'
+        self.crawler.fetch_single_game_box_score_async = fetch_single_game_box_score_async
+        self.crawler.transport.async_session = MagicMock(return_value=AsyncNullContext())
+        threads = []
+        self.crawler.upsert_box_scores = lambda rows: threads.append(threading.current_thread())
+
+        leftover = self.crawler.fetch_box_scores([make_game(n) for n in range(1, 6)])
+
+        self.assertEqual(leftover, [])
+        self.assertEqual(self.crawler.streamed_box_scores, 10)
+        # Two chunks flushed during the crawl, the last one by close()
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.main_thread(), threads[:2])
+
+    def test_streaming_off_returns_all_entries(self):
+        """Test that without a chunk size nothing is written while fetching"""
+        self.crawler.stream_chunk_size = 0
+        box_scores = self.crawler.fetch_box_scores([make_game(n) for n in range(1, 4)])
+
+        self.assertEqual(len(box_scores), 6)
+        self.assertEqual(self.writes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
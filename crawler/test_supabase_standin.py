@@ -0,0 +1,227 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import sys
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler
+from crawler.supabase_standin import SupabaseStandin, StandinStore, RPC_FUNCTIONS
+
+try:
+    from postgrest import SyncPostgrestClient, APIError
+except ImportError:
+    SyncPostgrestClient = None
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '123'
+}
+
+DATA = {
+    'league_id': '123',
+    'scraped_at': '2026-10-16T02:00:00+00:00',
+    'league_details': {},
+    'teams': [{'team_id': '1', 'name': 'Home', 'league_id': '123'}, {'team_id': '2', 'name': 'Pitbulls', 'league_id': '123'}],
+    'games': [{'matchId': 7, 'result': '80:70', 'kickoffDate': '2026-10-10', 'homeTeam': {'teamPermanentId': 1, 'teamname': 'Home'},
+               'guestTeam': {'teamPermanentId': 2, 'teamname': 'Pitbulls'}}],
+    'standings': [{'team': {'teamPermanentId': 1, 'teamname': 'Home'}, 'rang': 1}],
+    'box_scores': [{'game_id': '7', 'team_id': '1', 'player_last_name': 'Müller', 'player_first_name': 'Marius', 'points': 12}],
+    'streamed_box_scores': 0
+}
+
+
+def standin_client(base_url):
+    """postgrest client shaped like supabase's, whose rpc() params are optional"""
+    class Client(SyncPostgrestClient):
+        def rpc(self, func, params=None, **kwargs):
+            return super().rpc(func, params or {}, **kwargs)
+
+    return Client(base_url + '/rest/v1')
+
+
+@unittest.skipIf(SyncPostgrestClient is None, "postgrest is not installed")
+class TestSupabaseStandin(unittest.TestCase):
+    def setUp(self):
+        self.server = SupabaseStandin(StandinStore())
+        self.server.start()
+        self.client = standin_client(self.server.base_url)
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.stop()
+
+    def test_upsert_merges_on_conflict_columns(self):
+        """Test that an upsert updates the sent columns and keeps the others"""
+        key = 'game_id,team_id,player_first_name,player_last_name'
+        row = {'game_id': '7', 'team_id': '1', 'player_first_name': 'Marius', 'player_last_name': 'Müller', 'points': 12}
+        self.client.table('box_scores').upsert(dict(row, minutes_played=31), on_conflict=key).execute()
+        result = self.client.table('box_scores').upsert(dict(row, points=14), on_conflict=key).execute()
+
+        self.assertEqual(result.data[0]['points'], 14)
+        rows = self.server.store.rows('box_scores')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['points'], rows[0]['minutes_played']), (14, 31))
+
+    def test_upsert_errors_like_postgrest(self):
+        """Test that duplicate keys in one batch and unknown conflict targets fail"""
+        with self.assertRaises(APIError) as raised:
+            self.client.table('games').upsert([{'game_id': '7'}, {'game_id': '7'}], on_conflict='game_id').execute()
+        self.assertEqual(raised.exception.code, '21000')
+        self.assertEqual(self.server.store.rows('games'), [])
+
+        with self.assertRaises(APIError) as raised:
+            self.client.table('games').upsert({'game_id': '8'}, on_conflict='home_team_id').execute()
+        self.assertEqual(raised.exception.code, '42P10')
+
+        self.client.table('teams').insert({'team_id': '1'}).execute()
+        with self.assertRaises(APIError) as raised:
+            self.client.table('teams').insert({'team_id': '1'}).execute()
+        self.assertEqual(raised.exception.code, '23505')
+
+    def test_select_filters_order_range_and_count(self):
+        """Test the select features used by the crawler and health_check.py"""
+        self.client.table('scrape_log').insert([
+            {'league_id': '123', 'status': 'success', 'scraped_at': '2026-10-14T02:00:00+00:00'},
+            {'league_id': '123', 'status': 'failed', 'scraped_at': '2026-10-15T02:00:00+00:00'},
+            {'league_id': '123', 'status': 'success', 'scraped_at': '2026-10-16T02:00:00+00:00'},
+            {'league_id': '999', 'status': 'success', 'scraped_at': '2026-10-16T02:00:00+00:00'}
+        ]).execute()
+
+        result = self.client.table('scrape_log').select('*').eq('status', 'success') \
+            .gte('scraped_at', '2026-10-15T00:00:00+00:00').eq('league_id', '123').execute()
+        self.assertEqual([row['scraped_at'] for row in result.data], ['2026-10-16T02:00:00+00:00'])
+
+        result = self.client.table('scrape_log').select('league_id, status').order('scraped_at', desc=True) \
+            .range(1, 2).execute()
+        self.assertEqual(result.data, [{'league_id': '999', 'status': 'success'}, {'league_id': '123', 'status': 'failed'}])
+
+        result = self.client.table('scrape_log').select('count').limit(1).execute()
+        self.assertEqual(result.data, [{'count': 4}])
+        result = self.client.table('scrape_log').select('*').in_('league_id', ['999']).execute()
+        self.assertEqual(len(result.data), 1)
+
+    def test_assign_tsv_game_numbers(self):
+        """Test that the RPC numbers our unnumbered games after the highest number by date"""
+        self.client.table('seasons').insert({'name': '2026/27', 'league_id': '123', 'our_team_id': '2'}).execute()
+        season_id = self.server.store.rows('seasons')[0]['id']
+        self.client.table('games').upsert([
+            {'game_id': '1', 'tsv_game_number': 40, 'home_team_name': 'Pitbulls', 'game_date': '2026-05-01'},
+            {'game_id': '3', 'season_id': season_id, 'home_team_id': '2', 'game_date': '2026-10-20'},
+            {'game_id': '2', 'season_id': season_id, 'away_team_id': '2', 'game_date': '2026-10-10'},
+            {'game_id': '4', 'season_id': season_id, 'home_team_id': '5', 'away_team_id': '6', 'game_date': '2026-10-11'}
+        ], on_conflict='game_id').execute()
+
+        result = self.client.rpc('assign_tsv_game_numbers').execute()
+
+        self.assertEqual(result.data, 2)
+        numbers = {row['game_id']: row.get('tsv_game_number') for row in self.server.store.rows('games')}
+        self.assertEqual(numbers, {'1': 40, '2': 41, '3': 42, '4': None})
+
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def test_store_data_round_trips(self, mock_create_client):
+        """Test that store_data writes every table and a rerun only sends the scrape_log row"""
+        crawler = BasketballBundCrawler()
+        crawler.supabase = self.client
+
+        self.assertTrue(crawler.store_data(DATA))
+        self.assertEqual(len(self.server.store.rows('teams')), 2)
+        self.assertEqual(self.server.store.rows('games')[0]['tsv_game_number'], 1)
+        self.assertEqual(self.server.store.rows('box_scores')[0]['points'], 12)
+        scrape = self.server.store.rows('scrape_log')[0]
+        self.assertEqual(scrape['status'], 'success')
+        self.assertEqual(scrape['metrics']['rows'], {'teams': 2, 'games': 1, 'standings': 1, 'box_scores': 1})
+
+        stats = self.server.stats()['tables']
+        self.assertEqual(stats['box_scores']['methods'], {'GET': 1, 'POST': 1})
+        self.assertEqual(stats['rpc/assign_tsv_game_numbers']['requests'], 1)
+        self.assertGreater(stats['games']['bytes_in'], 0)
+
+        self.server.reset_stats()
+        rerun = BasketballBundCrawler()
+        rerun.supabase = self.client
+        self.assertTrue(rerun.store_data(DATA))
+        posted = {table for table, stats in self.server.stats()['tables'].items() if stats['methods'].get('POST')}
+        self.assertEqual(posted, {'rpc/assign_tsv_game_numbers', 'scrape_log'})
+
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def test_unnumbered_games_are_numbered_next_run(self, mock_create_client):
+        """Test that games a failed numbering call left behind are numbered although unchanged"""
+        crawler = BasketballBundCrawler()
+        crawler.supabase = self.client
+        with patch.dict(RPC_FUNCTIONS):
+            del RPC_FUNCTIONS['assign_tsv_game_numbers']
+            self.assertTrue(crawler.store_data(DATA))
+        self.assertIsNone(self.server.store.rows('games')[0].get('tsv_game_number'))
+
+        rerun = BasketballBundCrawler()
+        rerun.supabase = self.client
+        self.assertTrue(rerun.store_data(DATA))
+        self.assertEqual(rerun.change_detector.counts['games'], {'written': 0, 'skipped': 1})
+        self.assertEqual(self.server.store.rows('games')[0]['tsv_game_number'], 1)
+
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def test_store_data_with_ingest_rpc(self, mock_create_client):
+        """Test that --ingest rpc stores the run with a single request and then fills in its metrics"""
+        crawler = BasketballBundCrawler(ingest_mode='rpc')
+        crawler.supabase = self.client
+
+        self.assertTrue(crawler.store_data(DATA))
+        stats = self.server.stats()['tables']
+        self.assertEqual({table: stats[table]['methods'] for table in stats},
+                         {'rpc/ingest_crawl': {'POST': 1}, 'scrape_log': {'PATCH': 1}})
+        self.assertEqual(len(self.server.store.rows('teams')), 2)
+        self.assertEqual(self.server.store.rows('games')[0]['tsv_game_number'], 1)
+        self.assertEqual(self.server.store.rows('box_scores')[0]['points'], 12)
+        metrics = self.server.store.rows('scrape_log')[0]['metrics']
+        self.assertEqual(metrics['mode'], 'crawl')
+        self.assertEqual(metrics['rows'], {'teams': 2, 'games': 1, 'standings': 1, 'box_scores': 1})
+        self.assertIn('ingest', metrics['phases'])
+
+        rerun = BasketballBundCrawler(ingest_mode='rpc')
+        rerun.supabase = self.client
+        self.assertTrue(rerun.store_data(DATA))
+        self.assertEqual(rerun.change_detector.counts['box_scores'], {'written': 0, 'skipped': 1})
+        self.assertEqual(len(self.server.store.rows('scrape_log')), 2)
+
+    def test_ingest_rpc_is_atomic(self):
+        """Test that a failing table rolls back the rows of the others"""
+        row = {'game_id': '7', 'team_id': '1', 'player_first_name': 'Marius', 'player_last_name': 'Müller'}
+        with self.assertRaises(APIError) as raised:
+            self.client.rpc('ingest_crawl', {'payload': {
+                'teams': [{'team_id': '1'}], 'games': [{'game_id': '7'}], 'box_scores': [row, row],
+                'scrape_log': {'status': 'success'}
+            }}).execute()
+        self.assertEqual(raised.exception.code, '21000')
+        for table in ('teams', 'games', 'box_scores', 'scrape_log'):
+            self.assertEqual(self.server.store.rows(table), [], table)
+
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def test_ingest_rpc_falls_back_to_tables(self, mock_create_client):
+        """Test that databases without ingest_crawl() are written table by table"""
+        crawler = BasketballBundCrawler(ingest_mode='rpc')
+        crawler.supabase = self.client
+
+        with patch.dict(RPC_FUNCTIONS):
+            del RPC_FUNCTIONS['ingest_crawl']
+            self.assertTrue(crawler.store_data(DATA))
+
+        self.assertEqual(crawler.ingest_mode, 'tables')
+        self.assertEqual(len(self.server.store.rows('box_scores')), 1)
+        self.assertEqual(self.server.stats()['tables']['rpc/ingest_crawl']['requests'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
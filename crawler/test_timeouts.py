@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
 import os
 import sys
 
@@ -13,6 +13,7 @@ sys.modules['bs4'] = MagicMock()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from crawler.main import BasketballBundCrawler
+from crawler.records import Game
 
 class TestTimeout(unittest.TestCase):
     def setUp(self):
@@ -83,28 +84,24 @@ class TestTimeout(unittest.TestCase):
 
     def test_fetch_game_box_score_timeout(self):
         """Test that fetch_game_box_score calls get with timeout"""
-        # Create a new session mock for the local session
-        html_session_mock = MagicMock()
-        response_mock = MagicMock()
-        response_mock.content = b"<html></html>"
-        html_session_mock.get.return_value = response_mock
+        game_data = Game.from_api({'homeTeam': {'teamPermanentId': '1'}, 'guestTeam': {'teamPermanentId': '2'}})
+        self.crawler.fetch_game_box_score('12345', game_data)
 
-        # Configure the Session class to return:
-        # 1. self.mock_session_instance (init)
-        # 2. html_session_mock (fetch_game_box_score)
-        self.mock_session_cls.side_effect = [self.mock_session_instance, html_session_mock]
+        # Box score pages go through the shared pooled session
+        args, kwargs = self.mock_session_instance.get.call_args
+        self.assertIn('timeout', kwargs, "timeout parameter missing in fetch_game_box_score")
+        self.assertGreater(kwargs['timeout'], 0)
 
-        # Re-init crawler to consume the first side_effect
-        self.crawler = BasketballBundCrawler()
+    def test_fetch_game_box_score_reuses_session(self):
+        """Test that box score pages do not open a new session per game"""
+        game_data = Game.from_api({'homeTeam': {'teamPermanentId': '1'}, 'guestTeam': {'teamPermanentId': '2'}})
+        sessions_before = self.mock_session_cls.call_count
 
-        # Now call the method
-        game_data = {'homeTeam': {'teamPermanentId': '1'}, 'guestTeam': {'teamPermanentId': '2'}}
         self.crawler.fetch_game_box_score('12345', game_data)
+        self.crawler.fetch_game_box_score('12346', game_data)
 
-        # Check html_session_mock.get call
-        args, kwargs = html_session_mock.get.call_args
-        self.assertIn('timeout', kwargs, "timeout parameter missing in fetch_game_box_score")
-        self.assertGreater(kwargs['timeout'], 0)
+        self.assertEqual(self.mock_session_cls.call_count, sessions_before)
+        self.assertEqual(self.mock_session_instance.get.call_count, 2)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+from unittest.mock import MagicMock
+import asyncio
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.circuit_breaker import CircuitBreaker, CircuitOpenError
+from crawler.transport import HttpTransport
+from crawler.metrics import Metrics
+
+
+def make_response(content, wire_bytes=None):
+    response = MagicMock()
+    response.content = content
+    response.raw.tell.return_value = wire_bytes if wire_bytes is not None else len(content)
+    return response
+
+
+class SlowResponse:
+    """aiohttp response stand-in answering after delay seconds"""
+    def __init__(self, content, delay):
+        self.content = content
+        self.delay = delay
+        self.status = 200
+        self.headers = {}
+        self.content_length = len(content)
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self):
+        return self.content
+
+
+class TestHttpTransport(unittest.TestCase):
+    def setUp(self):
+        self.transport = HttpTransport()
+        self.transport.session = MagicMock()
+
+    def test_counts_wire_and_decoded_bytes(self):
+        """Test that compressed and decoded sizes are tracked separately"""
+        self.transport.session.get.return_value = make_response(b"x" * 1000, wire_bytes=200)
+        self.transport.session.post.return_value = make_response(b"{}")
+
+        self.transport.get('https://example.com/page', timeout=30)
+        self.transport.post('https://example.com/rest', json=[1], timeout=30)
+
+        stats = self.transport.stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['bytes_received'], 202)
+        self.assertEqual(stats['bytes_decoded'], 1002)
+
+    def test_passes_request_arguments_through(self):
+        """Test that timeout and headers reach the pooled session"""
+        self.transport.session.get.return_value = make_response(b"")
+        self.transport.get('https://example.com', headers={'Accept': 'text/html'}, timeout=30)
+        self.transport.session.get.assert_called_once_with(
+            'https://example.com', headers={'Accept': 'text/html'}, timeout=30
+        )
+
+    def test_connections_opened_counts_both_engines(self):
+        """Test that sync and async connects add up"""
+        self.transport._count_sync_connection()
+        self.transport._count_sync_connection()
+        self.transport.async_connections_opened = 3
+
+        self.assertEqual(self.transport.stats()['connections_opened'], 5)
+
+    def test_reports_responses_to_rate_limiter(self):
+        """Test that status, latency and Retry-After reach the attached rate limiter"""
+        self.transport.rate_limiter = MagicMock()
+        response = make_response(b"")
+        response.status_code = 429
+        response.headers = {'Retry-After': '7'}
+        self.transport.session.get.return_value = response
+
+        self.transport.get('https://example.com/page', timeout=30)
+
+        status, latency, retry_after = self.transport.rate_limiter.record_response.call_args[0]
+        self.assertEqual((status, retry_after), (429, '7'))
+        self.assertGreaterEqual(latency, 0)
+
+    def test_records_request_metrics(self):
+        """Test that latency, status, throttling and bytes reach the attached metrics"""
+        self.transport.metrics = Metrics()
+        response = make_response(b"x" * 1000, wire_bytes=300)
+        response.status_code = 503
+        response.headers = {}
+        self.transport.session.get.return_value = response
+
+        self.transport.get('https://example.com/page', timeout=30)
+
+        self.assertEqual(self.transport.metrics.histogram('http_request_seconds').count, 1)
+        self.assertEqual(self.transport.metrics.counter('http_responses_total', status=503), 1)
+        self.assertEqual(self.transport.metrics.counter('http_throttled_total'), 1)
+        self.assertEqual(self.transport.metrics.counter('http_bytes_received_total'), 300)
+
+    def test_open_breaker_rejects_without_sending(self):
+        """Test that server errors trip the breaker and later requests do not go out"""
+        self.transport = HttpTransport(metrics=Metrics(), breaker=CircuitBreaker(failure_threshold=2))
+        self.transport.session = MagicMock()
+        response = make_response(b"")
+        response.status_code = 503
+        response.headers = {}
+        self.transport.session.get.return_value = response
+
+        self.transport.get('https://example.com/page', timeout=30)
+        self.transport.get('https://example.com/page', timeout=30)
+        self.assertTrue(self.transport.circuit_open())
+        with self.assertRaises(CircuitOpenError):
+            self.transport.get('https://example.com/page', timeout=30)
+
+        self.assertEqual(self.transport.session.get.call_count, 2)
+        summary = self.transport.metrics.summary()
+        self.assertEqual(summary['breaker'], {'trips': 1, 'rejected': 1})
+
+    def test_slow_request_is_hedged(self):
+        """Test that a GET slower than the usual latency is sent again and the faster answer wins"""
+        self.transport.metrics = Metrics()
+        self.transport.hedge_after = 0.05
+        self.transport.latencies.extend([0.01] * 20)
+        slow, fast = make_response(b"slow"), make_response(b"fast")
+        for response in (slow, fast):
+            response.status_code = 200
+            response.headers = {}
+
+        def get(url, **kwargs):
+            if self.transport.session.get.call_count == 1:
+                time.sleep(0.3)
+                return slow
+            return fast
+
+        self.transport.session.get.side_effect = get
+        self.assertIs(self.transport.get('https://example.com/page', timeout=30), fast)
+        self.assertEqual(self.transport.metrics.counter('http_hedged_total', result='sent'), 1)
+        self.assertEqual(self.transport.metrics.counter('http_hedged_total', result='won'), 1)
+
+        # Without enough latency samples nothing is hedged
+        self.transport.latencies.clear()
+        self.assertIsNone(self.transport.hedge_delay())
+
+    def test_slow_async_request_is_hedged(self):
+        """Test that the async engine hedges a slow page and cancels the slower request"""
+        self.transport.metrics = Metrics()
+        self.transport.hedge_after = 0.05
+        self.transport.latencies.extend([0.01] * 20)
+        session = MagicMock()
+        session.get.side_effect = [SlowResponse(b"slow", 5.0), SlowResponse(b"fast", 0.01)]
+
+        async def fetch():
+            start = time.monotonic()
+            content = await self.transport.get_async(session, 'https://example.com/page')
+            return content, time.monotonic() - start
+
+        content, seconds = asyncio.run(fetch())
+        self.assertEqual(content, b"fast")
+        self.assertLess(seconds, 1.0)
+        self.assertEqual(self.transport.metrics.counter('http_hedged_total', result='won'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shlex
+import sys
+from datetime import datetime
+
+# Mock external dependencies before importing the module under test
+sys.modules['requests'] = MagicMock()
+sys.modules['supabase'] = MagicMock()
+sys.modules['dotenv'] = MagicMock()
+sys.modules['bs4'] = MagicMock()
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.main import BasketballBundCrawler, parse_args
+from crawler.records import BoxScoreEntry, Game
+from crawler.watch import GameDayWatcher, KICKOFF_TZ, kickoff_time
+
+ENV = {
+    'SUPABASE_URL': 'https://example.com',
+    'SUPABASE_KEY': 'dummy_key',
+    'LEAGUE_ID': '49400'
+}
+
+# Saturday 2026-10-17 19:30 in Germany (CEST)
+KICKOFF = datetime(2026, 10, 17, 19, 30, tzinfo=KICKOFF_TZ).timestamp()
+MINUTE = 60
+
+WATCH_WORKFLOW = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              '.github', 'workflows', 'basketball-watch.yml')
+
+
+def make_game(match_id, result=None, kickoff_date='2026-10-17', kickoff_time='19:30'):
+    return Game.from_api({
+        'matchId': match_id, 'result': result, 'kickoffDate': kickoff_date, 'kickoffTime': kickoff_time,
+        'homeTeam': {'teamPermanentId': 153170, 'teamname': 'Pitbulls'},
+        'guestTeam': {'teamPermanentId': 168416, 'teamname': 'Gäste'}
+    })
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        return False
+
+
+class TestGameDayWatcher(unittest.TestCase):
+    @patch.dict(os.environ, ENV)
+    @patch('crawler.main.create_client')
+    def setUp(self, mock_create_client):
+        mock_create_client.return_value = MagicMock()
+        self.crawler = BasketballBundCrawler(parse_workers=0)
+        self.crawler.load_stored_games = MagicMock(return_value={})
+        self.crawler.load_deferred_games = MagicMock(return_value=set())
+        self.crawler.fetch_competition_table = MagicMock(return_value=[])
+        self.crawler.fetch_box_scores = MagicMock(return_value=[BoxScoreEntry(game_id='1', points=12)])
+        self.crawler.store_data = MagicMock(return_value=True)
+
+    def watcher(self, now, spielplans):
+        clock = FakeClock(now)
+        self.crawler.fetch_competition_spielplan = MagicMock(side_effect=spielplans)
+        return GameDayWatcher(self.crawler, clock=clock, sleep=clock.sleep), clock
+
+    def test_kickoff_is_german_local_time(self):
+        self.assertEqual(kickoff_time(make_game(1)), datetime.fromisoformat('2026-10-17T17:30:00+00:00').timestamp())
+        self.assertIsNone(kickoff_time(make_game(1, kickoff_time=None)))
+
+    def test_sleeps_until_the_next_window(self):
+        """Test that far from any game only the spielplan is read, then the watch sleeps"""
+        watcher, clock = self.watcher(KICKOFF - 120 * MINUTE, [[make_game(1)]] * 2)
+        watcher.run(duration=60 * MINUTE)
+
+        # The window opens 90 min after kickoff, after the end of this watch
+        self.assertEqual(self.crawler.fetch_competition_spielplan.call_count, 1)
+        self.assertEqual(clock.sleeps, [])
+
+        watcher, clock = self.watcher(KICKOFF - 120 * MINUTE, [[make_game(1)], [make_game(1)]])
+        watcher.refresh_interval = 24 * 3600
+        watcher.run(duration=211 * MINUTE)
+        self.assertEqual(clock.sleeps[0], 210 * MINUTE)
+        self.crawler.load_stored_games.assert_called_once()
+
+    def test_stores_the_result_as_soon_as_it_appears(self):
+        """Test that only the finished game is fetched and stored, once"""
+        other = make_game(2, kickoff_date='2026-10-18')
+        spielplans = [[make_game(1), other], [make_game(1, '80:70'), other], [make_game(1, '80:70'), other]]
+        watcher, clock = self.watcher(KICKOFF + 100 * MINUTE, spielplans)
+        watcher.run(duration=5 * MINUTE)
+
+        self.assertEqual(clock.sleeps, [2 * MINUTE, 2 * MINUTE])
+        fetched = self.crawler.fetch_box_scores.call_args[0][0]
+        self.assertEqual([game.game_id for game in fetched], ['1'])
+        data = self.crawler.store_data.call_args[0][0]
+        self.assertEqual([game.game_id for game in data['games']], ['1'])
+        self.assertEqual(self.crawler.store_data.call_count, 1)
+        self.assertEqual(watcher.stored_ids, {'1'})
+        self.assertEqual(self.crawler.run_mode, 'watch')
+        self.assertEqual(self.crawler.metrics.histogram('watch_store_delay_seconds', league='49400').count, 1)
+
+    def test_keeps_polling_until_the_box_score_is_entered(self):
+        self.crawler.fetch_box_scores.side_effect = [[], [BoxScoreEntry(game_id='1')]]
+        watcher, clock = self.watcher(KICKOFF + 100 * MINUTE, [[make_game(1, '80:70')]] * 3)
+        watcher.run(duration=5 * MINUTE)
+
+        self.assertEqual(self.crawler.store_data.call_count, 2)
+        self.assertEqual(watcher.stored_ids, {'1'})
+
+    def test_skips_games_stored_before(self):
+        """Test that a result the nightly crawl stored already is not fetched again"""
+        self.crawler.load_stored_games.return_value = {
+            '1': {'game_id': '1', 'status': 'provisional', 'home_score': 80, 'away_score': 70, 'has_box_scores': True}
+        }
+        watcher, clock = self.watcher(KICKOFF + 100 * MINUTE, [[make_game(1, '80:70')]] * 2)
+        watcher.run(duration=5 * MINUTE)
+
+        self.crawler.fetch_box_scores.assert_not_called()
+        self.assertEqual(self.crawler.fetch_competition_spielplan.call_count, 1)
+
+    def test_carries_the_deferred_games_forward(self):
+        """Test that a watch write keeps the nightly run's deferred games and adds its own"""
+        self.crawler.load_deferred_games.return_value = {'1', '5'}
+
+        def fetch_box_scores(games, teams):
+            self.crawler.deferred_games = ['2']
+            return [BoxScoreEntry(game_id='1')]
+
+        self.crawler.fetch_box_scores.side_effect = fetch_box_scores
+        watcher, clock = self.watcher(KICKOFF + 100 * MINUTE, [[make_game(1, '80:70'), make_game(2, '70:60')]])
+        watcher.run(duration=1 * MINUTE)
+
+        data = self.crawler.store_data.call_args[0][0]
+        self.assertEqual(data['deferred_games'], ['2', '5'])
+        self.assertEqual(self.crawler.previously_deferred, {'2', '5'})
+
+
+
+class TestWatchWorkflow(unittest.TestCase):
+    def test_workflow_arguments_parse(self):
+        """Test that the crawl options of the watch workflow are accepted"""
+        with open(WATCH_WORKFLOW, encoding='utf-8') as f:
+            commands = [line.split('run:', 1)[1] for line in f if 'cli.py crawl' in line]
+        self.assertEqual(len(commands), 1)
+        argv = shlex.split(commands[0])
+        args = parse_args(argv[argv.index('crawl') + 1:])
+
+        self.assertTrue(args.watch)
+        self.assertEqual(args.watch_for, 5 * 3600 + 45 * 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to sys.path to allow imports from crawler
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.write_planner import WritePlanner, chunk_rows
+
+
+class TestChunkRows(unittest.TestCase):
+    def test_row_limit(self):
+        """Test that chunks hold at most max_rows rows"""
+        chunks = chunk_rows([{'id': n} for n in range(25)], max_rows=10)
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+
+    def test_byte_limit(self):
+        """Test that chunks stay below max_bytes of JSON"""
+        rows = [{'id': n, 'name': 'x' * 90} for n in range(10)]
+        chunks = chunk_rows(rows, max_bytes=350)
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 3, 1])
+        self.assertEqual([row for chunk in chunks for row in chunk], rows)
+
+    def test_oversized_row(self):
+        """Test that a row larger than max_bytes gets its own chunk"""
+        chunks = chunk_rows([{'big': 'x' * 100}, {'id': 1}], max_bytes=50)
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
+
+
+class TestWritePlanner(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.events = []
+
+    def writer(self, table, delay=0.0):
+        def write(chunk):
+            with self.lock:
+                self.events.append(('start', table))
+            time.sleep(delay)
+            with self.lock:
+                self.events.append(('end', table))
+        return write
+
+    def test_dependency_order(self):
+        """Test that a table only starts after its dependencies are written"""
+        planner = WritePlanner(max_workers=4, max_chunk_rows=2)
+        hooks = []
+        planner.add('teams', [{}] * 2, self.writer('teams'))
+        planner.add('games', [{}] * 6, self.writer('games', 0.01), depends_on=['teams'],
+                    after=lambda: hooks.append(len([e for e in self.events if e == ('end', 'games')])))
+        planner.add('standings', [{}] * 2, self.writer('standings', 0.05), depends_on=['teams'])
+        planner.add('box_scores', [{}] * 4, self.writer('box_scores'), depends_on=['games'])
+
+        stats = planner.run()
+
+        def index(event):
+            return self.events.index(event)
+
+        last_games_end = max(i for i, e in enumerate(self.events) if e == ('end', 'games'))
+        first_box_start = index(('start', 'box_scores'))
+        self.assertGreater(first_box_start, last_games_end)
+        self.assertGreater(index(('start', 'games')), index(('end', 'teams')))
+        # Standings do not wait for games or box scores
+        self.assertLess(index(('start', 'standings')), last_games_end)
+        # The games hook ran after all three games chunks
+        self.assertEqual(hooks, [3])
+        self.assertEqual(stats['games']['chunks'], 3)
+        self.assertEqual(stats['box_scores']['rows'], 4)
+
+    def test_missing_dependency_is_ignored(self):
+        """Test that a dependency on an unplanned (empty) table does not block"""
+        planner = WritePlanner()
+        planner.add('box_scores', [{}], self.writer('box_scores'), depends_on=['games'])
+        planner.run()
+        self.assertEqual(self.events, [('start', 'box_scores'), ('end', 'box_scores')])
+
+    def test_failed_chunk_raises(self):
+        """Test that a failing chunk stops dependent tables and is raised"""
+        def fail(chunk):
+            raise RuntimeError("payload too large")
+
+        planner = WritePlanner()
+        planner.add('games', [{}], fail)
+        planner.add('box_scores', [{}], self.writer('box_scores'), depends_on=['games'])
+
+        with self.assertRaises(RuntimeError):
+            planner.run()
+        self.assertEqual(self.events, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,378 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+import requests
+try:
+    import aiohttp
+except ImportError:  # async engine is optional, sync engine works without it
+    aiohttp = None
+
+try:
+    from crawler.circuit_breaker import CircuitOpenError, CLOSED
+    from crawler.rate_limiter import THROTTLE_STATUSES
+except ImportError:
+    from circuit_breaker import CircuitOpenError, CLOSED
+    from rate_limiter import THROTTLE_STATUSES
+
+# urllib3 and aiohttp only decode brotli responses when the brotli package is
+# installed, so only advertise 'br' when it is.
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'BasketballBund-Crawler/1.0'
+HTML_ACCEPT = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+
+# Request latencies the hedge delay is taken from, and how many are needed
+# before hedging starts
+HEDGE_LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_QUANTILE = 0.95
+
+
+class HttpTransport:
+    """Shared HTTP transport for all crawler requests.
+
+    One requests.Session with a keep-alive connection pool per host serves
+    the REST calls and the box score pages, so a run pays for the TCP+TLS
+    handshake once per host instead of once per page. The async engine gets
+    its aiohttp sessions from here as well, so both engines report into the
+    same per-run counters.
+
+    When a rate_limiter is attached, the status, latency and Retry-After of
+    every response are reported to it, so an adaptive limiter can follow
+    the server's load. When a recorder (a cassette.Cassette) is attached,
+    every exchange is recorded for offline replay. When metrics are
+    attached, request latency, statuses and received bytes are recorded.
+    When a cache (an http_cache.HttpCache) is attached, GET/POST requests to
+    endpoints with a TTL are served from or revalidated against it.
+
+    When a breaker (a circuit_breaker.CircuitBreaker) is attached, every
+    outcome is reported to it and requests raise CircuitOpenError without
+    going out while it is open. With hedge_after, a GET that has not been
+    answered after the 95th percentile of the recent request latencies (at
+    least hedge_after seconds) is sent a second time and the first answer
+    wins; at most about one request in twenty is hedged that way, and none
+    while the breaker is not closed.
+    """
+    def __init__(self, pool_maxsize=10, pool_connections=4, rate_limiter=None, metrics=None, breaker=None,
+                 hedge_after=None):
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING
+        })
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+        self._lock = threading.Lock()
+        self.requests_count = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.sync_connections_opened = 0
+        self.async_connections_opened = 0
+        self._install_connection_counter()
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.recorder = None
+        self.cache = None
+        self.breaker = breaker
+        if breaker is not None:
+            breaker.on_state_change = self._on_breaker_state_change
+        self.hedge_after = hedge_after
+        self.latencies = deque(maxlen=HEDGE_LATENCY_WINDOW)
+        self._hedge_pool = None
+
+    def _install_connection_counter(self):
+        """Count real socket connects of the pooled session.
+
+        urllib3 reconnects a dropped keep-alive connection on the same
+        connection object, so pool.num_connections undercounts handshakes;
+        hooking connect() counts every one of them.
+        """
+        try:
+            from urllib3.connection import HTTPConnection, HTTPSConnection
+            from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+        except ImportError:
+            return
+
+        transport = self
+
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                super().connect()
+                transport._count_sync_connection()
+
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                super().connect()
+                transport._count_sync_connection()
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+    def _count_sync_connection(self):
+        with self._lock:
+            self.sync_connections_opened += 1
+
+    def get(self, url, **kwargs):
+        """GET through the pooled session"""
+        return self._send('GET', url, kwargs)
+
+    def post(self, url, **kwargs):
+        """POST through the pooled session"""
+        return self._send('POST', url, kwargs)
+
+    def _send(self, method, url, kwargs):
+        body = kwargs.get('json')
+        cached = self.cache.lookup(method, url, body) if self.cache is not None else None
+        if cached is not None:
+            cached_response, fresh, validators = cached
+            if fresh:
+                self._count_cache('hit')
+                self._record_exchange(method, url, body, cached_response.status_code,
+                                      cached_response.headers, cached_response.content)
+                return cached_response
+            kwargs = dict(kwargs, headers=dict(kwargs.get('headers') or {}, **validators))
+
+        self._check_breaker(url)
+        if method == 'GET':
+            response = self._hedged(lambda: self._request(method, url, kwargs))
+        else:
+            response = self._request(method, url, kwargs)
+        if cached is not None and response.status_code == 304:
+            self.cache.renew(method, url, body)
+            self._count_cache('revalidated')
+            response = cached_response
+        elif self.cache is not None and self.cache.ttl_for(url) > 0:
+            self.cache.store(method, url, body, response.status_code, response.headers, response.content)
+            self._count_cache('miss')
+        self._record_exchange(method, url, body, response.status_code, response.headers, response.content)
+        return response
+
+    def _request(self, method, url, kwargs):
+        """Send one request through the pooled session"""
+        start = time.monotonic()
+        try:
+            response = getattr(self.session, method.lower())(url, **kwargs)
+        except requests.RequestException:
+            self._record_failure()
+            raise
+        self._observe(response.status_code, time.monotonic() - start, response.headers)
+        self._record_response(response)
+        return response
+
+    def hedge_delay(self):
+        """Seconds after which a GET is sent again, None when it is not hedged"""
+        if self.hedge_after is None:
+            return None
+        if self.breaker is not None and self.breaker.state != CLOSED:
+            return None
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.hedge_after, latencies[int(HEDGE_QUANTILE * (len(latencies) - 1))])
+
+    def _hedged(self, send):
+        """Result of send(), sent a second time when the first one is slow"""
+        delay = self.hedge_delay()
+        if delay is None:
+            return send()
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hedge')
+            pool = self._hedge_pool
+        primary = pool.submit(send)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        self._count_hedge('sent')
+        hedge = pool.submit(send)
+        # The first successful answer wins; the other request finishes in
+        # the background and is only counted
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count_hedge('won')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _hedged_async(self, send):
+        """Result of the coroutine send(), started a second time when the first one is slow"""
+        delay = self.hedge_delay()
+        if delay is None:
+            return await send()
+        primary = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        self._count_hedge('sent')
+        hedge = asyncio.ensure_future(send())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count_hedge('won')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Unlike a thread, the slower request can be cancelled
+            for task in pending:
+                task.cancel()
+
+    def _count_hedge(self, result):
+        if self.metrics is not None:
+            self.metrics.inc('http_hedged_total', result=result)
+
+    def _check_breaker(self, url):
+        if self.breaker is not None and not self.breaker.allow():
+            if self.metrics is not None:
+                self.metrics.inc('circuit_breaker_rejected_total')
+            raise CircuitOpenError(f"Circuit breaker open, not requesting {url}")
+
+    def circuit_open(self):
+        """True while the breaker rejects requests"""
+        return self.breaker is not None and self.breaker.is_open()
+
+    def _record_failure(self):
+        """A request failed without a response (connection error, timeout)"""
+        if self.breaker is not None:
+            self.breaker.record(failed=True)
+        if self.metrics is not None:
+            self.metrics.inc('http_errors_total')
+
+    def _on_breaker_state_change(self, old, new):
+        if self.metrics is not None:
+            self.metrics.inc('circuit_breaker_transitions_total', state=new)
+
+    def _count_cache(self, result):
+        if self.metrics is not None:
+            self.metrics.inc('http_cache_total', result=result)
+
+    def _observe(self, status, latency, headers):
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_response(status, latency, headers.get('Retry-After'))
+        if self.breaker is not None:
+            self.breaker.record(failed=isinstance(status, int) and status >= 500, latency=latency)
+        with self._lock:
+            self.latencies.append(latency)
+        if self.metrics is not None:
+            self.metrics.observe('http_request_seconds', latency)
+            self.metrics.inc('http_responses_total', status=status)
+            if status in THROTTLE_STATUSES:
+                self.metrics.inc('http_throttled_total')
+
+    def _record_exchange(self, method, url, body, status, headers, content):
+        if self.recorder is not None:
+            self.recorder.record(method, url, body, status, headers.get('Content-Type'), content)
+
+    def _record_response(self, response):
+        content = response.content
+        decoded = len(content) if isinstance(content, (bytes, str)) else 0
+        # raw.tell() counts the bytes read off the socket, i.e. before
+        # gzip/brotli decoding
+        wire = getattr(response.raw, 'tell', lambda: None)()
+        self._record(wire if isinstance(wire, int) else decoded, decoded)
+
+    def _record(self, wire_bytes, decoded_bytes):
+        with self._lock:
+            self.requests_count += 1
+            self.bytes_received += wire_bytes
+            self.bytes_decoded += decoded_bytes
+        if self.metrics is not None:
+            self.metrics.inc('http_bytes_received_total', wire_bytes)
+
+    def async_session(self, limit_per_host=4, timeout=30):
+        """Create an aiohttp session for the async engine.
+
+        aiohttp sessions are bound to the running event loop, so the async
+        engine opens one per fetch_box_scores_async call.
+        """
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_async_connection_created)
+        return aiohttp.ClientSession(
+            headers={
+                'User-Agent': USER_AGENT,
+                'Accept': HTML_ACCEPT,
+                'Accept-Encoding': ACCEPT_ENCODING
+            },
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=aiohttp.TCPConnector(limit_per_host=limit_per_host),
+            trace_configs=[trace_config]
+        )
+
+    async def _on_async_connection_created(self, session, trace_config_ctx, params):
+        with self._lock:
+            self.async_connections_opened += 1
+
+    async def get_async(self, session, url, **kwargs):
+        """GET through an aiohttp session from async_session, returns the body"""
+        self._check_breaker(url)
+        return await self._hedged_async(lambda: self._get_async(session, url, kwargs))
+
+    async def _get_async(self, session, url, kwargs):
+        start = time.monotonic()
+        observed = False
+        try:
+            async with session.get(url, **kwargs) as response:
+                self._observe(response.status, time.monotonic() - start, response.headers)
+                observed = True
+                response.raise_for_status()
+                content = await response.read()
+                # Content-Length is the compressed size when the server encoded
+                # the body; fall back to the decoded size otherwise
+                wire = response.content_length
+                self._record_exchange('GET', url, kwargs.get('json'), response.status, response.headers, content)
+        except Exception as e:
+            # Error statuses were reported with the response, a body that
+            # never arrives was not
+            if not observed or not isinstance(e, aiohttp.ClientResponseError):
+                self._record_failure()
+            raise
+
+        self._record(wire if isinstance(wire, int) else len(content), len(content))
+        return content
+
+    def stats(self):
+        """Per-run transport counters"""
+        with self._lock:
+            return {
+                'requests': self.requests_count,
+                'connections_opened': self.sync_connections_opened + self.async_connections_opened,
+                'bytes_received': self.bytes_received,
+                'bytes_decoded': self.bytes_decoded
+            }
+
+    def close(self):
+        self.session.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
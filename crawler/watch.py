@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# kickoffDate/kickoffTime of the spielplan are German local time
+KICKOFF_TZ = ZoneInfo('Europe/Berlin')
+
+# Watch window relative to the kickoff: a result cannot appear before the
+# final buzzer (about 1.5 h after tip-off) and is normally entered within
+# a few hours; later results are left to the nightly crawl
+DEFAULT_WINDOW_START = 90 * 60
+DEFAULT_WINDOW_END = 5 * 3600
+DEFAULT_POLL_INTERVAL = 2 * 60
+DEFAULT_REFRESH_INTERVAL = 6 * 3600
+
+
+def kickoff_time(game):
+    """Kickoff of a records.Game as epoch seconds, None without date and time"""
+    if not game.kickoff_date or not game.kickoff_time:
+        return None
+    try:
+        kickoff = datetime.strptime(f"{game.kickoff_date} {game.kickoff_time[:5]}", '%Y-%m-%d %H:%M')
+    except ValueError:
+        return None
+    return kickoff.replace(tzinfo=KICKOFF_TZ).timestamp()
+
+
+class GameDayWatcher:
+    """Poll games around their kickoff and store each result as it appears.
+
+    Every game gets a window from window_start to window_end seconds after
+    its kickoff. While any game is inside its window, the spielplan (one
+    request for the whole league) is polled every poll_interval; once a
+    watched game has a result, only that game's box score page is fetched
+    and the game, its box scores and the standings are stored. A game
+    leaves the watch once it is stored with box scores or its window ends.
+
+    Between windows the watcher sleeps until the next window opens, waking
+    every refresh_interval at most to pick up rescheduled games. With a
+    duration, run() returns at the deadline, or right away when no window
+    opens before it.
+    """
+    def __init__(self, crawler, poll_interval=DEFAULT_POLL_INTERVAL, window_start=DEFAULT_WINDOW_START,
+                 window_end=DEFAULT_WINDOW_END, refresh_interval=DEFAULT_REFRESH_INTERVAL, clock=time.time,
+                 sleep=None):
+        self.crawler = crawler
+        self.poll_interval = poll_interval
+        self.window_start = window_start
+        self.window_end = window_end
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._stop = threading.Event()
+        # sleep(seconds) returns True when the watch should end
+        self.sleep = sleep or self._stop.wait
+
+        # Few games per write: streaming chunks would only add round trips
+        crawler.stream_chunk_size = 0
+        crawler.run_mode = 'watch'
+
+        self.games = []
+        self.watching = False
+        self.stored_ids = set()
+
+    def stop(self):
+        self._stop.set()
+
+    def window(self, game):
+        """(start, end) epoch seconds of a game's watch window, None without kickoff"""
+        kickoff = kickoff_time(game)
+        if kickoff is None:
+            return None
+        return kickoff + self.window_start, kickoff + self.window_end
+
+    def in_window(self, game, now):
+        window = self.window(game)
+        return window is not None and window[0] <= now < window[1] and not game.cancelled
+
+    def next_window_start(self, now):
+        """Start of the next window opening after now, None when there is none"""
+        starts = [window[0] for window in map(self.window, self.games) if window is not None and window[0] > now]
+        return min(starts, default=None)
+
+    def is_stored(self, game):
+        """True once the game's current result is stored with its box scores"""
+        if game.game_id in self.stored_ids:
+            return True
+        stored = self.crawler.stored_games.get(game.game_id)
+        return bool(stored) and stored.get('has_box_scores', False) and \
+            self.crawler.parse_result(game.result) == (stored.get('home_score'), stored.get('away_score'))
+
+    def reload_stored_state(self):
+        """Stored games, fingerprints and deferred games may have changed since the last window (nightly crawl)"""
+        self.crawler.stored_games = self.crawler.load_stored_games()
+        self.crawler.previously_deferred = self.crawler.load_deferred_games()
+        self.crawler.change_detector.reset()
+
+    def poll(self, now):
+        """Fetch the spielplan and store the watched games with a result, returns the watched games"""
+        crawler = self.crawler
+        crawler.metrics.inc('watch_polls_total', league=crawler.league_id)
+        # A failed fetch returns no games, keep watching the known schedule then
+        self.games = crawler.fetch_competition_spielplan() or self.games
+
+        candidates = [game for game in self.games if self.in_window(game, now) and game.game_id not in self.stored_ids]
+        if candidates and not self.watching:
+            self.reload_stored_state()
+        watched = [game for game in candidates if not self.is_stored(game)]
+        self.watching = bool(watched)
+
+        ready = [game for game in watched if game.has_result]
+        if ready:
+            self.store_results(ready)
+        return watched
+
+    def store_results(self, ready):
+        """Fetch and store the box scores of games whose result appeared"""
+        crawler = self.crawler
+        with crawler.metrics.span('watch_store', league=crawler.league_id):
+            standings = crawler.fetch_competition_table()
+            teams = crawler.extract_teams_from_data(standings, self.games)
+            box_scores = crawler.fetch_box_scores(ready, teams)
+            # The newest scrape_log row holds the deferred games for the next
+            # run: carry the list forward, without the games fetched now and
+            # with the ones this poll deferred (e.g. open circuit breaker)
+            fetched = {game.game_id for game in ready} - set(crawler.deferred_games)
+            deferred = (crawler.previously_deferred - fetched) | set(crawler.deferred_games)
+            stored = crawler.store_data({
+                'league_id': crawler.league_id,
+                'scraped_at': datetime.now(timezone.utc).isoformat(),
+                'league_details': {},
+                'teams': teams,
+                'games': ready,
+                'standings': standings,
+                'box_scores': box_scores,
+                'streamed_box_scores': 0,
+                'deferred_games': sorted(deferred)
+            })
+            if stored:
+                crawler.previously_deferred = deferred
+
+        with_box_scores = {entry.game_id for entry in box_scores}
+        now = self.clock()
+        for game in ready:
+            if game.game_id not in with_box_scores:
+                logger.info(f"Game {game.game_id}: result {game.result} stored, box score not entered yet")
+                continue
+            self.stored_ids.add(game.game_id)
+            delay = now - kickoff_time(game)
+            crawler.metrics.observe('watch_store_delay_seconds', delay, league=crawler.league_id)
+            logger.info(f"Game {game.game_id} {game.home_team_name} {game.result} {game.away_team_name}: "
+                        f"stored with box score {delay / 60:.0f} min after kickoff")
+
+    def run(self, duration=None):
+        """Watch until stopped or for duration seconds, returns the ids of the games stored"""
+        deadline = None if duration is None else self.clock() + duration
+        logger.info(f"Watching league {self.crawler.league_id}: polling games from "
+                    f"{self.window_start / 60:.0f} to {self.window_end / 60:.0f} min after kickoff "
+                    f"every {self.poll_interval:.0f}s")
+        while True:
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                break
+            try:
+                watched = self.poll(now)
+            except Exception as e:
+                logger.error(f"Watch poll failed: {e}")
+                # Inside a window retry at the poll interval
+                watched = self.watching
+
+            if watched:
+                wait = self.poll_interval
+            else:
+                next_start = self.next_window_start(now)
+                if deadline is not None and (next_start is None or next_start >= deadline):
+                    logger.info("No game window opens before the end of the watch")
+                    break
+                wait = self.refresh_interval if next_start is None else min(next_start - now, self.refresh_interval)
+                logger.info(f"No game in its window, sleeping {wait / 60:.0f} min")
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if self.sleep(max(0, wait)):
+                break
+        return self.stored_ids
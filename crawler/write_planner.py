@@ -0,0 +1,122 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_rows(rows, max_bytes=512 * 1024, max_rows=1000):
+    """Split rows into chunks of at most max_rows rows and about max_bytes of JSON.
+
+    A single row larger than max_bytes still gets a chunk of its own.
+    """
+    chunks = []
+    chunk = []
+    size = 0
+    for row in rows:
+        row_size = len(json.dumps(row, default=str)) + 1
+        if chunk and (size + row_size > max_bytes or len(chunk) >= max_rows):
+            chunks.append(chunk)
+            chunk = []
+            size = 0
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+class TableWrite:
+    """Rows of one table, how to write a chunk of them and what must be written first"""
+    def __init__(self, table, rows, write, depends_on=(), after=None):
+        self.table = table
+        self.rows = rows
+        self.write = write
+        self.depends_on = tuple(depends_on)
+        self.after = after
+        self.chunks = []
+        self.pending = 0
+        self.started_at = None
+        self.seconds = None
+
+
+class WritePlanner:
+    """Write several tables in dependency order with independent tables in parallel.
+
+    A table starts as soon as every table it depends on is completely
+    written; its rows are split into size-bounded chunks that are upserted
+    concurrently on a thread pool. The optional after hook of a table runs
+    once all its chunks are stored. The first failing chunk cancels the chunks not yet started and
+    is raised, so the caller's retry logic sees the error.
+    """
+    def __init__(self, max_workers=4, max_chunk_bytes=512 * 1024, max_chunk_rows=1000):
+        self.max_workers = max(1, int(max_workers))
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_chunk_rows = max_chunk_rows
+        self.tables = {}
+        self.completed = set()
+
+    def add(self, table, rows, write, depends_on=(), after=None):
+        """Plan a table write; write(chunk) is called once per chunk"""
+        self.tables[table] = TableWrite(table, rows, write, depends_on, after)
+
+    def run(self):
+        """Write all planned tables, returns {table: {'rows', 'chunks', 'seconds'}}.
+
+        Tables that were completely written are in self.completed, also
+        when run() raises, so a retry can resume with the remaining ones.
+        """
+        for step in self.tables.values():
+            # Tables without rows are not planned, there is nothing to wait for
+            step.depends_on = tuple(dep for dep in step.depends_on if dep in self.tables)
+            step.chunks = chunk_rows(step.rows, self.max_chunk_bytes, self.max_chunk_rows)
+
+        done = self.completed
+        started = set()
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            def start_ready_tables():
+                for name, step in self.tables.items():
+                    if name in started or not all(dep in done for dep in step.depends_on):
+                        continue
+                    started.add(name)
+                    step.started_at = time.monotonic()
+                    step.pending = len(step.chunks)
+                    for chunk in step.chunks:
+                        in_flight[pool.submit(step.write, chunk)] = step
+                    if not step.chunks:
+                        finish_table(step)
+
+            def finish_table(step):
+                if step.after is not None:
+                    step.after()
+                step.seconds = time.monotonic() - step.started_at
+                logger.info(f"Stored {len(step.rows)} {step.table} rows in {len(step.chunks)} chunks"
+                            f" ({step.seconds:.2f}s)")
+                done.add(step.table)
+                start_ready_tables()
+
+            start_ready_tables()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = in_flight.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in in_flight:
+                            other.cancel()
+                        raise error
+                    step.pending -= 1
+                    if step.pending == 0:
+                        finish_table(step)
+
+        missing = set(self.tables) - done
+        if missing:
+            raise ValueError(f"Unresolvable write dependencies for tables: {sorted(missing)}")
+
+        return {
+            name: {'rows': len(step.rows), 'chunks': len(step.chunks), 'seconds': step.seconds}
+            for name, step in self.tables.items()
+        }
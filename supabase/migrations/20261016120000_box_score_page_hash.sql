@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Box-Score-Seiten-Hash
+--
+-- Der Crawler lädt bei jedem Lauf die ergebnisDetails.jsp-Seite jedes noch
+-- nicht endgültigen Spiels und parst sie neu, obwohl das HTML meist
+-- byte-identisch zum Vorlauf ist. Der sha256 der Rohseite wird jetzt neben
+-- box_score_url gespeichert; bei unverändertem Hash überspringt der Crawler
+-- Parsing und Box-Score-Upsert für dieses Spiel.
+-- ============================================================================
+
+ALTER TABLE games ADD COLUMN IF NOT EXISTS box_score_hash TEXT;
+
+COMMENT ON COLUMN games.box_score_hash IS 'sha256 (hex) der zuletzt geparsten ergebnisDetails.jsp-Seite. NULL = beim nächsten Lauf neu parsen.';
@@ -0,0 +1,19 @@
+-- ============================================================================
+-- Zeilen-Fingerprints für differenzielle Upserts
+--
+-- Der Crawler hat bisher bei jedem Lauf jede Team-, Spiel-, Tabellen- und
+-- Box-Score-Zeile neu geschrieben (scraped_at ändert sich immer), auch wenn
+-- sich inhaltlich nichts geändert hat. Jede Zeile bekommt jetzt den sha256
+-- ihres Payloads ohne scraped_at; der Crawler lädt die gespeicherten
+-- Fingerprints einmal pro Lauf und sendet nur neue oder geänderte Zeilen.
+-- ============================================================================
+
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS row_fingerprint TEXT;
+ALTER TABLE games ADD COLUMN IF NOT EXISTS row_fingerprint TEXT;
+ALTER TABLE standings ADD COLUMN IF NOT EXISTS row_fingerprint TEXT;
+ALTER TABLE box_scores ADD COLUMN IF NOT EXISTS row_fingerprint TEXT;
+
+COMMENT ON COLUMN teams.row_fingerprint IS 'sha256 (hex) des vom Crawler geschriebenen Payloads ohne scraped_at. NULL = beim nächsten Lauf neu schreiben.';
+COMMENT ON COLUMN games.row_fingerprint IS 'sha256 (hex) des vom Crawler geschriebenen Payloads ohne scraped_at. NULL = beim nächsten Lauf neu schreiben.';
+COMMENT ON COLUMN standings.row_fingerprint IS 'sha256 (hex) des vom Crawler geschriebenen Payloads ohne scraped_at. NULL = beim nächsten Lauf neu schreiben.';
+COMMENT ON COLUMN box_scores.row_fingerprint IS 'sha256 (hex) des vom Crawler geschriebenen Payloads ohne scraped_at. NULL = beim nächsten Lauf neu schreiben.';
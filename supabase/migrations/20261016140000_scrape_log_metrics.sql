@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Laufzeit-Metriken pro Crawler-Lauf in scrape_log
+--
+-- Bisher standen in scrape_log nur Zeilenzahlen; ob ein langsamer Lauf am
+-- Netzwerk, am Parsen oder an Supabase lag, war nicht erkennbar. Der Crawler
+-- schreibt jetzt eine kompakte Zusammenfassung (Phasendauern, Requests,
+-- Latenz p50/p95, Parse-Zeit pro Seite, geschriebene Zeilen pro Tabelle,
+-- Retries) als JSON mit. health_check.py zeigt daraus Trends an.
+-- ============================================================================
+
+ALTER TABLE scrape_log ADD COLUMN IF NOT EXISTS metrics JSONB;
+
+COMMENT ON COLUMN scrape_log.metrics IS 'Kompakte Laufzeit-Metriken des Crawler-Laufs: phases (Sekunden pro Phase), http (requests, bytes, p50_ms, p95_ms, throttled), parse (pages, avg_ms), rows (geschriebene Zeilen pro Tabelle), retries. NULL bei Läufen vor dieser Migration.';
@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Zurückgestellte Spiele pro Crawler-Lauf in scrape_log
+--
+-- Mit --time-budget startet der Crawler nach Ablauf des Zeitbudgets keinen
+-- Box-Score-Abruf mehr. Die übrig gebliebenen Spiele werden hier vermerkt;
+-- der nächste Lauf derselben Liga liest die Liste aus dem letzten
+-- erfolgreichen Eintrag und holt diese Spiele zuerst.
+-- ============================================================================
+
+ALTER TABLE scrape_log ADD COLUMN IF NOT EXISTS deferred_games TEXT[];
+
+COMMENT ON COLUMN scrape_log.deferred_games IS 'game_ids, deren Box Score der Lauf wegen des Zeitbudgets (--time-budget) nicht mehr abgerufen hat; der nächste Lauf holt sie zuerst. NULL, wenn nichts zurückgestellt wurde.';
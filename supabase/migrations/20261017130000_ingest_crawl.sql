@@ -0,0 +1,135 @@
+-- ============================================================================
+-- Crawler-Lauf in einem Round Trip und einer Transaktion speichern
+--
+-- store_data brauchte bisher mindestens sieben Supabase-Requests
+-- (Verbindungstest, teams, games, assign_tsv_game_numbers, standings,
+-- box_scores, scrape_log), und ein Abbruch dazwischen hinterließ einen halb
+-- geschriebenen Lauf. Mit `--ingest rpc` schickt der Crawler das komplette
+-- transformierte Payload an ingest_crawl(): Die Funktion schreibt alle
+-- Tabellen, vergibt die tsv_game_numbers und legt die scrape_log-Zeile an,
+-- alles in einer Transaktion.
+--
+-- Unveränderte Zeilen (gleicher row_fingerprint) überspringt die Funktion
+-- selbst; der Crawler muss die gespeicherten Fingerprints dafür nicht mehr
+-- laden.
+--
+-- Payload:
+--   {"teams": [...], "games": [...], "standings": [...], "box_scores": [...],
+--    "standings_conflict": "season_id,team_id" | null,
+--    "rewrite": false,
+--    "scrape_log": {...}}
+-- Rückgabe: geschriebene Zeilen pro Tabelle und vergebene tsv_game_numbers,
+--   {"teams": 2, "games": 1, "standings": 0, "box_scores": 24, "tsv_game_numbers": 1}
+-- ============================================================================
+
+-- ----------------------------------------------------------------------------
+-- Hilfsfunktion: Upsert eines JSON-Arrays in eine Tabelle. Geschrieben werden
+-- nur die Spalten, die im Payload vorkommen (wie PostgREST mit columns=...);
+-- ohne Konfliktspalten wird nur eingefügt.
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION ingest_upsert(p_table TEXT, p_rows JSONB, p_conflict TEXT[], p_rewrite BOOLEAN DEFAULT false)
+RETURNS INTEGER AS $$
+DECLARE
+  payload_columns TEXT[];
+  column_list TEXT;
+  conflict_list TEXT;
+  update_list TEXT;
+  unchanged_filter TEXT := '';
+  written INTEGER := 0;
+BEGIN
+  IF p_rows IS NULL OR jsonb_typeof(p_rows) <> 'array' OR jsonb_array_length(p_rows) = 0 THEN
+    RETURN 0;
+  END IF;
+
+  SELECT array_agg(DISTINCT payload_column ORDER BY payload_column) INTO payload_columns
+  FROM jsonb_array_elements(p_rows) AS row_data, jsonb_object_keys(row_data) AS payload_column;
+
+  SELECT string_agg(format('%I', payload_column), ', ') INTO column_list
+  FROM unnest(payload_columns) AS payload_column;
+
+  IF p_conflict IS NULL THEN
+    EXECUTE format('INSERT INTO %1$I (%2$s) SELECT %2$s FROM jsonb_populate_recordset(NULL::%1$I, $1)',
+                   p_table, column_list)
+    USING p_rows;
+  ELSE
+    SELECT string_agg(format('%I', conflict_column), ', ') INTO conflict_list
+    FROM unnest(p_conflict) AS conflict_column;
+
+    SELECT string_agg(format('%1$I = EXCLUDED.%1$I', payload_column), ', ') INTO update_list
+    FROM unnest(payload_columns) AS payload_column
+    WHERE payload_column <> ALL (p_conflict);
+
+    -- Zeilen mit gespeichertem, gleichem Fingerprint bleiben unangetastet
+    IF NOT p_rewrite AND 'row_fingerprint' = ANY (payload_columns) THEN
+      unchanged_filter := ' WHERE target.row_fingerprint IS DISTINCT FROM EXCLUDED.row_fingerprint';
+    END IF;
+
+    EXECUTE format(
+      'INSERT INTO %1$I AS target (%2$s) SELECT %2$s FROM jsonb_populate_recordset(NULL::%1$I, $1) '
+      'ON CONFLICT (%3$s) DO %4$s',
+      p_table, column_list, conflict_list,
+      CASE WHEN update_list IS NULL THEN 'NOTHING' ELSE 'UPDATE SET ' || update_list || unchanged_filter END
+    )
+    USING p_rows;
+  END IF;
+
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql SET search_path = public;
+
+-- ----------------------------------------------------------------------------
+-- ingest_crawl(): ein kompletter Lauf, alles oder nichts
+-- ----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION ingest_crawl(payload JSONB)
+RETURNS JSONB AS $$
+DECLARE
+  rewrite BOOLEAN := COALESCE((payload->>'rewrite')::BOOLEAN, false);
+  standings_conflict TEXT[] := string_to_array(payload->>'standings_conflict', ',');
+  written JSONB;
+  games_written INTEGER;
+  assigned INTEGER := 0;
+BEGIN
+  -- Reihenfolge wie im Crawler: teams vor games und standings, games vor box_scores
+  written := jsonb_build_object('teams', ingest_upsert('teams', payload->'teams', ARRAY['team_id'], rewrite));
+
+  games_written := ingest_upsert('games', payload->'games', ARRAY['game_id'], rewrite);
+  IF games_written > 0 THEN
+    -- Gleichzeitige Läufe (mehrere Ligen) nummerieren nacheinander, sonst
+    -- sähen beide dasselbe MAX(tsv_game_number)
+    PERFORM pg_advisory_xact_lock(hashtext('assign_tsv_game_numbers'));
+    assigned := assign_tsv_game_numbers();
+  END IF;
+
+  written := written || jsonb_build_object(
+    'games', games_written,
+    'standings', ingest_upsert('standings', payload->'standings', standings_conflict, rewrite),
+    'box_scores', ingest_upsert('box_scores', payload->'box_scores',
+                                ARRAY['game_id', 'team_id', 'player_first_name', 'player_last_name'], rewrite),
+    'tsv_game_numbers', assigned
+  );
+
+  IF jsonb_typeof(payload->'scrape_log') = 'object' THEN
+    PERFORM ingest_upsert('scrape_log', jsonb_build_array(payload->'scrape_log'), NULL);
+  END IF;
+
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Nur Backend (service role) darf schreiben
+REVOKE EXECUTE ON FUNCTION ingest_upsert(TEXT, JSONB, TEXT[], BOOLEAN) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION ingest_crawl(JSONB) FROM PUBLIC;
+DO $$ BEGIN
+  IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+    REVOKE EXECUTE ON FUNCTION ingest_upsert(TEXT, JSONB, TEXT[], BOOLEAN) FROM anon;
+    REVOKE EXECUTE ON FUNCTION ingest_crawl(JSONB) FROM anon;
+  END IF;
+  IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'authenticated') THEN
+    REVOKE EXECUTE ON FUNCTION ingest_upsert(TEXT, JSONB, TEXT[], BOOLEAN) FROM authenticated;
+    REVOKE EXECUTE ON FUNCTION ingest_crawl(JSONB) FROM authenticated;
+  END IF;
+END $$;
+
+COMMENT ON FUNCTION ingest_upsert IS 'Upsert eines JSON-Arrays in eine Tabelle (nur die Spalten des Payloads), überspringt Zeilen mit unverändertem row_fingerprint. Hilfsfunktion von ingest_crawl().';
+COMMENT ON FUNCTION ingest_crawl IS 'Speichert einen Crawler-Lauf (teams, games, standings, box_scores, tsv_game_numbers, scrape_log) in einer Transaktion. Wird vom Crawler mit --ingest rpc aufgerufen.';